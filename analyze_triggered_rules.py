@@ -9,54 +9,85 @@ Generate a simple report showing remaining Rector rules after LLM migration.
 import json
 from pathlib import Path
 from collections import defaultdict
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterator, Optional, Tuple
 from datetime import datetime
 
+from report_store import load_summary_columns, iter_metadata_files
+from rule_matrix import EVALUATION_DIR, split_rule
+
+# Per-file fields the reports need from metadata.json
+RULE_FIELDS = ("filename", "rector_analysis.php_version_changes", "rector_analysis.rules_triggered")
+
 class SimpleRulesAnalyzer:
     """Simple analyzer to view remaining Rector rules after LLM migration."""
     
-    def __init__(self, model_name: str = None):
+    def __init__(self, model_name: str = None, results: Optional[List[Dict[str, Any]]] = None):
         if model_name:
             self.reports_dir = Path(f"evaluation_reports/{model_name}")
             self.model_name = model_name
         else:
             self.reports_dir = Path("rector_reports")
             self.model_name = None
-            
-        self.metadata = self.load_metadata()
-    
-    def load_metadata(self) -> Dict[str, Any]:
-        """Load metadata from JSON file."""
-        metadata_file = self.reports_dir / "metadata.json"
         
-        if not metadata_file.exists():
+        # Compact reports have a columnar summary; only the needed columns are read from it.
+        # Otherwise metadata.json is streamed entry by entry (see iter_file_rules).
+        # In-process callers (evaluate_llm_models) pass the fresh results and skip both.
+        self.metadata_file = self.reports_dir / "metadata.json"
+        self.results = results
+        self.columns = load_summary_columns(self.reports_dir) if results is None else None
+        if self.columns is None and results is None:
+            self.check_metadata()
+        self._file_summaries = None
+    
+    def check_metadata(self) -> None:
+        """Raise FileNotFoundError if there is no analysis to report on."""
+        if not self.metadata_file.exists():
             if self.model_name:
                 raise FileNotFoundError(f"No evaluation found for {self.model_name}. Run: python process_all_files.py {self.model_name}")
             else:
                 raise FileNotFoundError(f"No analysis found. Run: python process_all_files.py")
-        
-        with open(metadata_file, 'r', encoding='utf-8') as f:
+    
+    def load_metadata(self) -> Dict[str, Any]:
+        """Load metadata from JSON file (the whole tree; reports stream it instead)."""
+        self.check_metadata()
+        with open(self.metadata_file, 'r', encoding='utf-8') as f:
             return json.load(f)
     
+    def iter_file_rules(self) -> Iterator[Tuple[str, int, List[str]]]:
+        """Yield (filename, php_version_changes, rules_triggered) per file."""
+        if self.results is not None:
+            for result in self.results:
+                rector = result["rector_analysis"]
+                yield result["filename"], rector["php_version_changes"], rector["rules_triggered"]
+            return
+        
+        if self.columns is not None:
+            filenames = self.columns["filename"]
+            changes = self.columns["php_version_changes"]
+            for i, rules in enumerate(self.columns.rules()):
+                yield str(filenames[i]), int(changes[i]), rules
+            return
+        
+        for file_data in iter_metadata_files(self.metadata_file, RULE_FIELDS):
+            rector = file_data["rector_analysis"]
+            yield file_data["filename"], rector["php_version_changes"], rector["rules_triggered"]
+    
     def get_file_summaries(self) -> List[Dict[str, Any]]:
         """Get simple summary of each file's remaining rules."""
+        if self._file_summaries is not None:
+            return self._file_summaries
         summaries = []
         
-        for file_data in self.metadata["files"]:
-            filename = file_data["filename"]
-            changes = file_data["rector_analysis"]["php_version_changes"]
-            rules = file_data["rector_analysis"]["rules_triggered"]
-            
+        for filename, changes, rules in self.iter_file_rules():
             # Extract PHP versions and rule names
             php_versions = set()
             rule_names = []
             
             for rule in rules:
-                parts = rule.split("\\")
-                if len(parts) > 1:
-                    php_versions.add(parts[1].replace('Php', 'PHP '))
-                if len(parts) > 0:
-                    rule_names.append(parts[-1])
+                php_version, rule_name = split_rule(rule)
+                if "\\" in rule:
+                    php_versions.add(php_version)
+                rule_names.append(rule_name)
             
             summaries.append({
                 'filename': filename,
@@ -68,6 +99,7 @@ class SimpleRulesAnalyzer:
         
         # Sort by number of changes (most problematic first)
         summaries.sort(key=lambda x: x['total_changes'], reverse=True)
+        self._file_summaries = summaries
         return summaries
     
     def get_quality_rating(self, changes: int) -> str:
@@ -86,11 +118,9 @@ class SimpleRulesAnalyzer:
         rule_count = defaultdict(int)
         rule_versions = {}
         
-        for file_data in self.metadata["files"]:
-            for rule in file_data["rector_analysis"]["rules_triggered"]:
-                parts = rule.split("\\")
-                rule_name = parts[-1] if parts else rule
-                php_version = parts[1].replace('Php', 'PHP ') if len(parts) > 1 else "Unknown"
+        for _, _, rules in self.iter_file_rules():
+            for rule in rules:
+                php_version, rule_name = split_rule(rule)
                 
                 rule_count[rule_name] += 1
                 rule_versions[rule_name] = php_version
@@ -163,8 +193,8 @@ class SimpleRulesAnalyzer:
         
         return report
     
-    def save_report(self) -> None:
-        """Generate and save the simple report."""
+    def save_report(self) -> Path:
+        """Generate and save the simple report; returns its path."""
         print("📊 Generating simple migration report...")
         
         report = self.generate_simple_report()
@@ -193,13 +223,21 @@ class SimpleRulesAnalyzer:
             worst_file = file_summaries[0]  # Already sorted by changes desc
             if worst_file['total_changes'] > 0:
                 print(f"   Most issues: {worst_file['filename']} ({worst_file['total_changes']} changes)")
+        
+        return report_file
 
 def main():
     """Main execution function."""
     import sys
     
-    # Check if we're running in evaluation mode
-    if len(sys.argv) > 1 and sys.argv[1] in ["gemini_1_5_flash", "mistralai_mistral_small_3_2_24b_instruct_free"]:
+    # Check if we're running in evaluation mode (models with an evaluation_reports/<model>/metadata.json)
+    available_models = [metadata_file.parent.name
+                        for metadata_file in sorted(Path(EVALUATION_DIR).glob("*/metadata.json"))]
+    if len(sys.argv) > 1 and sys.argv[1] not in available_models:
+        print(f"❌ Unknown model: {sys.argv[1]}")
+        print(f"Available models: {', '.join(available_models) or 'none'}")
+        return
+    if len(sys.argv) > 1:
         model_name = sys.argv[1]
         print(f"🔍 Simple Migration Report for {model_name}")
         print("=" * 50)
@@ -213,8 +251,8 @@ def main():
         print("  python analyze_triggered_rules.py <model_name>")
         print()
         print("Available models:")
-        print("  - gemini_1_5_flash")
-        print("  - mistralai_mistral_small_3_2_24b_instruct_free")
+        for model in available_models:
+            print(f"  - {model}")
         print()
         print("Or run without arguments for original dataset analysis.")
         print()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Evaluation Pipeline Benchmark
+=============================
+
+Runs BatchRectorProcessor against fake_rector.py (recorded Rector output with
+configurable latency) so the Python pipeline's own throughput and scaling can
+be measured without PHP or Rector.
+
+Usage:
+    python benchmark_pipeline.py [--dataset selected_100_files] [--workers 1,2,4]
+                                 [--batch-sizes 1,25] [--startup 0.5] [--per-file 0.05]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Any
+
+from fake_rector import DEFAULT_RECORDINGS_DIR, fake_rector_command
+from process_all_files import BatchRectorProcessor
+
+
+def run_once(dataset_dir: str, workers: int, batch_size: int, rector_bin: List[str]) -> Dict[str, Any]:
+    """Time one full uncached evaluation (analysis + report writing) into a scratch directory."""
+    reports_dir = Path(tempfile.mkdtemp(prefix="pipeline_bench_"))
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            processor = BatchRectorProcessor(dataset_dir=dataset_dir, use_cache=False,
+                                             rector_bin=rector_bin, reports_dir=str(reports_dir))
+            files = len(processor.find_all_php_files())
+            start = time.perf_counter()
+            results = processor.process_all_files(max_workers=workers, batch_size=batch_size)
+            analyzed = time.perf_counter()
+            if results:
+                processor.save_results(results)
+            finished = time.perf_counter()
+    finally:
+        shutil.rmtree(reports_dir, ignore_errors=True)
+
+    return {"workers": workers, "batch_size": batch_size, "files": files, "results": len(results),
+            "analysis_seconds": analyzed - start, "save_seconds": finished - analyzed,
+            "wall_seconds": finished - start}
+
+
+def ideal_rector_seconds(files: int, workers: int, batch_size: int, startup: float, per_file: float) -> float:
+    """Wall time the fake Rector alone needs with perfect parallelism."""
+    invocations = math.ceil(files / max(batch_size, 1))
+    return (invocations * startup + files * per_file) / max(min(workers, invocations), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Rector evaluation pipeline with a fake Rector")
+    parser.add_argument("--dataset", default="selected_100_files", help="Directory of PHP files to evaluate")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts")
+    parser.add_argument("--batch-sizes", default="1,25", help="Comma-separated files per Rector invocation")
+    parser.add_argument("--startup", type=float, default=0.0, help="Fake Rector seconds per invocation")
+    parser.add_argument("--per-file", type=float, default=0.0, help="Fake Rector seconds per file")
+    parser.add_argument("--recordings", default=DEFAULT_RECORDINGS_DIR, help="Recorded reports to replay")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per configuration (best is kept)")
+    parser.add_argument("--json", help="Also write the measurements to this file")
+    args = parser.parse_args()
+
+    rector_bin = fake_rector_command(args.startup, args.per_file, args.recordings)
+    configurations = [(int(w), int(b)) for w in args.workers.split(",") for b in args.batch_sizes.split(",")]
+
+    print("⏱️  Evaluation Pipeline Benchmark (fake Rector)")
+    print("=" * 60)
+    print(f"Dataset: {args.dataset} | latency: {args.startup}s/invocation + {args.per_file}s/file")
+    print(f"   {'workers':>7} {'batch':>5} {'files':>5} {'wall s':>8} {'files/s':>8} {'rector s':>8} {'overhead s':>10}")
+
+    rows = []
+    for workers, batch_size in configurations:
+        row = min((run_once(args.dataset, workers, batch_size, rector_bin) for _ in range(max(args.repeat, 1))),
+                  key=lambda r: r["wall_seconds"])
+        row["ideal_rector_seconds"] = ideal_rector_seconds(row["files"], workers, batch_size,
+                                                           args.startup, args.per_file)
+        row["overhead_seconds"] = row["wall_seconds"] - row["ideal_rector_seconds"]
+        row["files_per_second"] = row["files"] / row["wall_seconds"] if row["wall_seconds"] else 0.0
+        rows.append(row)
+        print(f"   {workers:>7} {batch_size:>5} {row['files']:>5} {row['wall_seconds']:>8.2f} "
+              f"{row['files_per_second']:>8.1f} {row['ideal_rector_seconds']:>8.2f} {row['overhead_seconds']:>10.2f}")
+        if row["results"] != row["files"]:
+            print(f"   ⚠️  Only {row['results']}/{row['files']} files produced results")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"settings": vars(args), "runs": rows}, f, indent=2)
+        print(f"📊 Measurements saved: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
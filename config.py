@@ -1,13 +1,15 @@
 """
 Configuration and Environment Setup for LLM Migration Tool
 Handles API keys, client initialization, and global settings.
+
+Provider clients (and the openai / google.genai SDKs) are only set up on first
+use, so commands that never call a model start without importing them.
 """
 
 import os
 import warnings
 from datetime import datetime
 from dotenv import load_dotenv
-import openai
 
 # Suppress warnings
 warnings.filterwarnings('ignore')
@@ -26,10 +28,14 @@ class Config:
         self.google_api_key = os.getenv('GOOGLE_API_KEY')
         self.openrouter_client = None
         self.google_client = None
-        self.providers = {}
-        
-        # Initialize clients and providers
-        self._initialize_clients()
+        self._providers = None
+    
+    @property
+    def providers(self):
+        """Provider configuration; clients are initialized on first access."""
+        if self._providers is None:
+            self._initialize_clients()
+        return self._providers
         
     def _initialize_clients(self):
         """Initialize API clients for different providers."""
@@ -51,6 +57,8 @@ class Config:
             if not self.openrouter_api_key:
                 raise ValueError("OPENROUTER_API_KEY not found in environment variables.")
             
+            import openai
+            
             self.openrouter_client = openai.OpenAI(
                 base_url="https://openrouter.ai/api/v1",
                 api_key=self.openrouter_api_key,
@@ -78,7 +86,7 @@ class Config:
     
     def _setup_providers(self):
         """Setup provider configuration dictionary."""
-        self.providers = {
+        self._providers = {
             'openrouter': {
                 'client': self.openrouter_client,
                 'api_key': self.openrouter_api_key,
@@ -108,5 +116,5 @@ class Config:
         """Check if a provider is enabled."""
         return self.providers.get(provider_name, {}).get('enabled', False)
 
-# Global configuration instance
+# Global configuration instance (cheap: clients are created on first use)
 config = Config()
@@ -0,0 +1,287 @@
+"""
+Corpus Index
+Lazy, memory-mapped access to the PHP files being migrated.
+"""
+
+import csv
+import hashlib
+import mmap
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Union
+
+SELECTION_SUMMARY_FILE = 'selection_summary.csv'
+DEFAULT_MAX_OPEN_MAPS = 64
+
+
+def decode_source(data: bytes) -> str:
+    """Decode raw PHP bytes the same way the old text-mode reads did (\r\n and \r become \n)."""
+    return data.decode('utf-8', errors='ignore').replace('\r\n', '\n').replace('\r', '\n')
+
+
+def is_blank_file(path: Path, block_size: int = 1 << 16) -> bool:
+    """True if a file holds only whitespace; stops at the first non-blank block."""
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            if decode_source(block).strip():
+                return False
+    return True
+
+
+def load_size_categories(root: Path) -> Dict[str, str]:
+    """Load filename -> size_category from the nearest selection_summary.csv.
+
+    The summary only lists bare file names (which the flat model outputs use too).
+    """
+    for directory in [root, *root.parents]:
+        summary_file = directory / SELECTION_SUMMARY_FILE
+        if summary_file.exists():
+            break
+    else:
+        return {}
+
+    categories = {}
+    try:
+        with open(summary_file, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                category = row.get('size_category')
+                filename = row.get('filename', '')
+                if not category or not filename:
+                    continue
+                categories[filename] = category
+                # Selected files were renumbered by file_id (052_x.php -> 001_x.php)
+                if '_' in filename and row.get('file_id', '').isdigit():
+                    renumbered = f"{int(row['file_id']):03d}_{filename.split('_', 1)[1]}"
+                    categories[renumbered] = category
+    except Exception as e:
+        print(f"⚠️  Could not load size categories from {summary_file}: {e}")
+
+    return categories
+
+
+class LineView:
+    """Read-only sequence of lines backed by a file's line-offset index."""
+
+    def __init__(self, source: 'CorpusFile'):
+        self.source = source
+
+    def __len__(self) -> int:
+        return self.source.line_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self.source.line(i) for i in range(start, stop, step)]
+            return self.source.slice_lines(start, stop).split('\n') if stop > start else []
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('line index out of range')
+        return self.source.line(index)
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self.source.line(i)
+
+    def join(self, start: int, stop: int) -> str:
+        """Equivalent to '\\n'.join(lines[start:stop]) without the list copy."""
+        return self.source.slice_lines(start, stop)
+
+
+class CorpusFile:
+    """A single corpus entry whose content is only mapped when first needed."""
+
+    def __init__(self, corpus: 'Corpus', rel_path: str, path: Optional[Path], size: int,
+                 category: Optional[str] = None, data: Optional[bytes] = None):
+        self.corpus = corpus
+        self.rel_path = rel_path
+        self.path = path
+        self.size = size
+        self.category = category
+        self._data = data
+        self._hash = None
+        self._line_offsets = None
+
+    @property
+    def name(self) -> str:
+        return Path(self.rel_path).name
+
+    @property
+    def buffer(self) -> Union[bytes, mmap.mmap]:
+        """Raw file bytes (an mmap for on-disk files)."""
+        if self._data is not None:
+            return self._data
+        return self.corpus._acquire(self)
+
+    @property
+    def content_hash(self) -> str:
+        """SHA-256 of the raw file bytes."""
+        if self._hash is None:
+            self._hash = hashlib.sha256(self.buffer).hexdigest()
+        return self._hash
+
+    @property
+    def line_offsets(self) -> array:
+        """Byte offset of the start of every line (same count as split('\\n'))."""
+        if self._line_offsets is None:
+            buf = self.buffer
+            offsets = array('q', [0])
+            pos = buf.find(b'\n')
+            while pos != -1:
+                offsets.append(pos + 1)
+                pos = buf.find(b'\n', pos + 1)
+            self._line_offsets = offsets
+        return self._line_offsets
+
+    @property
+    def line_count(self) -> int:
+        return len(self.line_offsets)
+
+    @property
+    def lines(self) -> LineView:
+        return LineView(self)
+
+    def byte_range(self, start: int, stop: int) -> tuple:
+        """Byte span of lines [start, stop), excluding the final newline (\n or \r\n)."""
+        offsets = self.line_offsets
+        stop = min(stop, len(offsets))
+        if start >= stop:
+            return 0, 0
+        end = offsets[stop] - 1 if stop < len(offsets) else self.size
+        if stop < len(offsets) and end > offsets[start] and self.buffer[end - 1:end] == b'\r':
+            end -= 1
+        return offsets[start], end
+
+    def slice_lines(self, start: int, stop: int) -> str:
+        """Decode lines [start, stop) (0-based) straight from the buffer."""
+        begin, end = self.byte_range(start, stop)
+        return decode_source(self.buffer[begin:end])
+
+    def line(self, index: int) -> str:
+        return self.slice_lines(index, index + 1)
+
+    def read_text(self) -> str:
+        """Decode the whole file."""
+        return decode_source(self.buffer[:])
+
+    def close(self):
+        """Release the memory map backing this file, if any."""
+        self.corpus._release(self)
+
+    def __repr__(self) -> str:
+        return f"CorpusFile({self.rel_path!r}, size={self.size}, category={self.category!r})"
+
+
+def in_memory_file(text: str, rel_path: str = '<memory>') -> 'CorpusFile':
+    """Wrap a source string as a standalone corpus entry."""
+    return Corpus.from_texts({rel_path: text}).files[rel_path]
+
+
+class Corpus(Mapping):
+    """Index of PHP files keyed by relative path, with lazily mapped content.
+
+    Behaves like the old ``Dict[str, str]`` of file contents, but only stats
+    files up front; content is memory-mapped on first access and at most
+    ``max_open`` maps are kept open at once.
+    """
+
+    def __init__(self, root: Union[str, Path, None] = None, pattern: str = '*.php',
+                 max_open: int = DEFAULT_MAX_OPEN_MAPS):
+        self.root = Path(root) if root is not None else None
+        self.max_open = max_open
+        self.files: Dict[str, CorpusFile] = {}
+        self._by_name: Dict[str, list] = {}
+        self._open_maps: 'OrderedDict[str, mmap.mmap]' = OrderedDict()
+
+        if self.root is not None and self.root.exists():
+            self._index(pattern)
+
+    @classmethod
+    def from_texts(cls, texts: Mapping) -> 'Corpus':
+        """Build an in-memory corpus from an existing filename -> content mapping."""
+        corpus = cls()
+        for rel_path, content in texts.items():
+            data = content.encode('utf-8')
+            corpus._add(CorpusFile(corpus, rel_path, None, len(data), data=data))
+        return corpus
+
+    def _index(self, pattern: str):
+        categories = load_size_categories(self.root)
+        for php_file in sorted(self.root.rglob(pattern)):
+            try:
+                size = php_file.stat().st_size
+                # Empty and whitespace-only files have nothing to migrate
+                if size == 0 or is_blank_file(php_file):
+                    continue
+            except OSError as e:
+                print(f"⚠️  Could not read {php_file}: {e}")
+                continue
+            rel_path = php_file.relative_to(self.root).as_posix()
+            self._add(CorpusFile(self, rel_path, php_file, size, categories.get(php_file.name)))
+
+    def _add(self, entry: CorpusFile):
+        self.files[entry.rel_path] = entry
+        self._by_name.setdefault(entry.name, []).append(entry.rel_path)
+
+    def _acquire(self, entry: CorpusFile) -> mmap.mmap:
+        mapped = self._open_maps.get(entry.rel_path)
+        if mapped is not None:
+            self._open_maps.move_to_end(entry.rel_path)
+            return mapped
+
+        with open(entry.path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._open_maps[entry.rel_path] = mapped
+
+        while len(self._open_maps) > self.max_open:
+            _, oldest = self._open_maps.popitem(last=False)
+            oldest.close()
+        return mapped
+
+    def _release(self, entry: CorpusFile):
+        mapped = self._open_maps.pop(entry.rel_path, None)
+        if mapped is not None:
+            mapped.close()
+
+    def close(self):
+        """Close every open memory map."""
+        while self._open_maps:
+            _, mapped = self._open_maps.popitem()
+            mapped.close()
+
+    def resolve(self, key: str) -> Optional[str]:
+        """Resolve a relative path, or a bare filename if it is unambiguous."""
+        key = key.replace('\\', '/')
+        if key in self.files:
+            return key
+        matches = self._by_name.get(key, [])
+        if len(matches) == 1:
+            return matches[0]
+        if len(matches) > 1:
+            print(f"⚠️  '{key}' is ambiguous: {sorted(matches)}")
+        return None
+
+    def file(self, key: str) -> CorpusFile:
+        """Get the corpus entry for a relative path or unambiguous filename."""
+        rel_path = self.resolve(key)
+        if rel_path is None:
+            raise KeyError(key)
+        return self.files[rel_path]
+
+    def __getitem__(self, key: str) -> str:
+        return self.file(key).read_text()
+
+    def __contains__(self, key) -> bool:
+        return isinstance(key, str) and self.resolve(key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.files)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def total_size(self) -> int:
+        return sum(entry.size for entry in self.files.values())
@@ -0,0 +1,263 @@
+"""
+Corpus Statistics and Run Forecasting
+Vectorized per-file statistics over a Corpus and request/token/time forecasts
+per model and concurrency level, calibrated from recorded response telemetry.
+"""
+
+import ast
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterable
+
+import numpy as np
+
+from corpus import Corpus
+from file_metrics import CHARS_PER_TOKEN, metrics_engine, chunk_line_count
+from prompts import prompt_manager
+from response_store import ResponseStore, DEFAULT_STORE_PATH
+
+DEFAULT_LATENCY_SECONDS = 30.0  # Used when no telemetry exists for a model
+DEFAULT_COMPLETION_RATIO = 0.9  # completion tokens per prompt token (migrated code ≈ input size)
+LINE_BUCKETS = [0, 200, 500, 1000, 2000, np.inf]
+TELEMETRY_DIRS = ('model_output', 'chunked_model_output')
+HEADER_LINES = 15
+
+
+class CorpusStatistics:
+    """Per-file line/byte/token/chunk arrays for a corpus, from the shared file metrics."""
+
+    def __init__(self, corpus: Corpus, chunk_size: int = 500):
+        self.corpus = corpus
+        self.chunk_size = chunk_size
+        self.filenames = list(corpus.files)
+
+        entries = [corpus.files[name] for name in self.filenames]
+        metrics = [metrics_engine.measure_entry(entry) for entry in entries]
+
+        def column(values):
+            return np.fromiter(values, dtype=np.int64, count=len(metrics))
+
+        self.bytes = column(m['bytes'] for m in metrics)
+        self.lines = column(chunk_line_count(m) for m in metrics)
+        self.code_lines = column(m['code_lines'] for m in metrics)
+        self.comment_lines = column(m['comment_lines'] for m in metrics)
+        self.functions = column(m['functions'] for m in metrics)
+        self.classes = column(m['classes'] for m in metrics)
+        self.tokens = column(m['tokens'] for m in metrics)
+        self.categories = np.array([entry.category or 'unknown' for entry in entries], dtype=object)
+
+        self.chunks = np.where(self.lines > chunk_size, -(-self.lines // chunk_size), 1).astype(np.int64)
+
+    def category_histograms(self) -> Dict[str, Dict[str, Any]]:
+        """Line-count histogram and totals per size_category."""
+        histograms = {}
+        for category in sorted(set(self.categories)):
+            mask = self.categories == category
+            counts, _ = np.histogram(self.lines[mask], bins=LINE_BUCKETS)
+            histograms[category] = {
+                'files': int(mask.sum()),
+                'lines': int(self.lines[mask].sum()),
+                'code_lines': int(self.code_lines[mask].sum()),
+                'comment_lines': int(self.comment_lines[mask].sum()),
+                'functions': int(self.functions[mask].sum()),
+                'bytes': int(self.bytes[mask].sum()),
+                'tokens': int(self.tokens[mask].sum()),
+                'chunks': int(self.chunks[mask].sum()),
+                'line_histogram': counts.tolist(),
+            }
+        return histograms
+
+    def totals(self) -> Dict[str, int]:
+        return {
+            'files': len(self.filenames),
+            'lines': int(self.lines.sum()),
+            'code_lines': int(self.code_lines.sum()),
+            'comment_lines': int(self.comment_lines.sum()),
+            'functions': int(self.functions.sum()),
+            'classes': int(self.classes.sum()),
+            'bytes': int(self.bytes.sum()),
+            'tokens': int(self.tokens.sum()),
+            'chunks': int(self.chunks.sum()),
+            'chunked_files': int((self.chunks > 1).sum()),
+        }
+
+
+def _parse_header(response_file: Path) -> Dict[str, str]:
+    """Read the metadata header of a saved response without loading the body."""
+    header = {}
+    with open(response_file, 'r', encoding='utf-8', errors='ignore') as f:
+        for _ in range(HEADER_LINES):
+            line = f.readline()
+            if not line or line.startswith('====='):
+                break
+            if ':' in line:
+                key, value = line.split(':', 1)
+                header[key.strip().lower()] = value.strip()
+    return header
+
+
+def load_latency_telemetry(base_dirs: Iterable[str] = TELEMETRY_DIRS,
+                           store_path: Optional[Path] = DEFAULT_STORE_PATH) -> Dict[str, Dict[str, np.ndarray]]:
+    """Collect (prompt_tokens, completion_tokens, latency) samples per model.
+
+    Reads typed rows from the response store when it exists, then legacy response
+    files: those use the recorded ``Latency:`` header when present, otherwise the
+    latency of a chunk is approximated by the gap to the previous chunk's timestamp.
+    """
+    samples: Dict[str, List[tuple]] = {}
+
+    if store_path is not None and Path(store_path).exists():
+        store = ResponseStore(store_path)
+        for row in store.telemetry():
+            samples.setdefault(row['model'], []).append(tuple(
+                float(row[key]) if row[key] is not None else np.nan
+                for key in ('prompt_tokens', 'completion_tokens', 'latency')))
+        store.close()
+
+    for base_dir in base_dirs:
+        base_path = Path(base_dir)
+        if not base_path.exists():
+            continue
+
+        for directory in sorted({p.parent for p in base_path.rglob('*.txt')}):
+            previous_timestamp = None
+            response_files = sorted(directory.glob('*.txt'),
+                                    key=lambda p: (0, int(p.stem), '') if p.stem.isdigit() else (1, 0, p.name))
+            for response_file in response_files:
+                header = _parse_header(response_file)
+                model = header.get('model')
+                if not model:
+                    continue
+
+                try:
+                    usage = ast.literal_eval(header.get('usage', '{}')) or {}
+                except (ValueError, SyntaxError):
+                    usage = {}
+                timestamp = None
+                if header.get('timestamp'):
+                    try:
+                        timestamp = datetime.fromisoformat(header['timestamp'])
+                    except ValueError:
+                        pass
+
+                latency = None
+                if header.get('latency'):
+                    match = re.match(r'[\d.]+', header['latency'])
+                    latency = float(match.group()) if match else None
+                elif timestamp and previous_timestamp and header.get('chunk'):
+                    gap = (timestamp - previous_timestamp).total_seconds()
+                    latency = gap if gap > 0 else None
+                previous_timestamp = timestamp
+
+                samples.setdefault(model, []).append((
+                    float(usage.get('prompt_tokens') or np.nan),
+                    float(usage.get('completion_tokens') or np.nan),
+                    float(latency) if latency is not None else np.nan,
+                ))
+
+    return {
+        model: dict(zip(('prompt_tokens', 'completion_tokens', 'latency'), np.array(rows, dtype=float).T))
+        for model, rows in samples.items()
+    }
+
+
+class RunForecaster:
+    """Forecast requests, token spend and wall time for migrating a corpus."""
+
+    def __init__(self, stats: CorpusStatistics, telemetry: Optional[Dict[str, Dict[str, np.ndarray]]] = None,
+                 strategy: str = 'basic', store_path: Optional[Path] = DEFAULT_STORE_PATH):
+        self.stats = stats
+        self.telemetry = telemetry if telemetry is not None else load_latency_telemetry(store_path=store_path)
+        self.strategy = strategy
+
+    def _template_tokens(self, strategy: str) -> float:
+        template = prompt_manager.templates[strategy]
+        return len(template) / CHARS_PER_TOKEN
+
+    def _latency_model(self, model: str) -> Dict[str, Any]:
+        """Fit latency = base + per_token * completion_tokens from telemetry."""
+        samples = self.telemetry.get(model)
+        if samples is None:
+            return {'base': DEFAULT_LATENCY_SECONDS, 'per_token': 0.0,
+                    'completion_ratio': DEFAULT_COMPLETION_RATIO, 'samples': 0}
+
+        completion, prompt, latency = samples['completion_tokens'], samples['prompt_tokens'], samples['latency']
+
+        ratio_mask = ~np.isnan(completion) & ~np.isnan(prompt) & (prompt > 0)
+        ratio = float(np.median(completion[ratio_mask] / prompt[ratio_mask])) if ratio_mask.any() else DEFAULT_COMPLETION_RATIO
+
+        has_latency = ~np.isnan(latency)
+        base = float(latency[has_latency].mean()) if has_latency.any() else DEFAULT_LATENCY_SECONDS
+        per_token = 0.0
+        fit_mask = ~np.isnan(completion) & has_latency
+        if fit_mask.sum() >= 2 and np.ptp(completion[fit_mask]) > 0:
+            per_token, intercept = np.polyfit(completion[fit_mask], latency[fit_mask], 1)
+            if per_token > 0:
+                base, per_token = max(float(intercept), 0.0), float(per_token)
+            else:
+                per_token = 0.0
+
+        return {'base': base, 'per_token': per_token, 'completion_ratio': ratio,
+                'samples': int(has_latency.sum())}
+
+    def forecast(self, models: Iterable[str], concurrency_levels: Iterable[int] = (1,)) -> List[Dict[str, Any]]:
+        """Forecast one row per (model, concurrency)."""
+        stats = self.stats
+        chunked = stats.chunks > 1
+        overhead = np.where(chunked, self._template_tokens(f"chunk_{self.strategy}"),
+                            self._template_tokens(self.strategy))
+
+        requests = int(stats.chunks.sum())
+        prompt_tokens = stats.tokens + overhead * stats.chunks
+        per_request_code_tokens = stats.tokens / stats.chunks
+
+        rows = []
+        for model in models:
+            latency_model = self._latency_model(model)
+            completion_tokens = stats.tokens * latency_model['completion_ratio']
+            request_latency = latency_model['base'] + latency_model['per_token'] * per_request_code_tokens * latency_model['completion_ratio']
+            file_seconds = request_latency * stats.chunks
+            serial_seconds = float(file_seconds.sum())
+            # Chunks of one file are sequential, so the longest file bounds the wall time
+            longest_chain = float(file_seconds.max()) if len(file_seconds) else 0.0
+
+            for concurrency in concurrency_levels:
+                wall_seconds = max(serial_seconds / max(concurrency, 1), longest_chain)
+                rows.append({
+                    'model': model,
+                    'concurrency': concurrency,
+                    'requests': requests,
+                    'prompt_tokens': int(prompt_tokens.sum()),
+                    'completion_tokens': int(completion_tokens.sum()),
+                    'wall_minutes': wall_seconds / 60,
+                    'telemetry_samples': latency_model['samples'],
+                })
+        return rows
+
+
+def print_corpus_report(stats: CorpusStatistics, forecast_rows: Optional[List[Dict[str, Any]]] = None):
+    """Print corpus histograms and (optionally) run forecasts."""
+    totals = stats.totals()
+    bucket_labels = [f"≤{int(b)}" for b in LINE_BUCKETS[1:-1]] + [f">{int(LINE_BUCKETS[-2])}"]
+
+    print("📊 Corpus Statistics")
+    print("=" * 40)
+    print(f"📄 Files: {totals['files']:,} ({totals['chunked_files']:,} need chunking at {stats.chunk_size} lines)")
+    print(f"📏 Lines: {totals['lines']:,} | Bytes: {totals['bytes']:,} | ~Tokens: {totals['tokens']:,}")
+    print(f"🧾 Code lines: {totals['code_lines']:,} | Comment lines: {totals['comment_lines']:,} | "
+          f"Functions: {totals['functions']:,} | Classes: {totals['classes']:,}")
+    print(f"📦 Planned requests (chunks): {totals['chunks']:,}")
+
+    print(f"\n📂 Per size category (line buckets: {', '.join(bucket_labels)}):")
+    for category, info in stats.category_histograms().items():
+        print(f"   {category}: {info['files']} files, {info['lines']:,} lines, "
+              f"{info['chunks']} chunks, ~{info['tokens']:,} tokens → {info['line_histogram']}")
+
+    if forecast_rows:
+        print("\n🔮 Run Forecast")
+        print(f"   {'model':<48} {'conc':>4} {'requests':>8} {'prompt tok':>11} {'compl tok':>10} {'minutes':>8}")
+        for row in forecast_rows:
+            source = f"{row['telemetry_samples']} samples" if row['telemetry_samples'] else "default latency"
+            print(f"   {row['model']:<48} {row['concurrency']:>4} {row['requests']:>8,} "
+                  f"{row['prompt_tokens']:>11,} {row['completion_tokens']:>10,} {row['wall_minutes']:>8.1f}  ({source})")
@@ -4,87 +4,278 @@ LLM Evaluation Runner
 ====================
 
 Easy script to run evaluation on specific LLM models.
+
+Rector analysis and the rules report run in this process: the analysis
+results are handed to the report in memory instead of being re-read from
+metadata.json, and several models can be evaluated concurrently.
+
+Models are discovered from new-version/ and chunked_model_output/; with
+--all-models every model's Rector work is scheduled on one shared worker pool.
+
+Usage:
+    python evaluate_llm_models.py <model_name> [<model_name> ...] [--parallel N]
+                                  [--workers N] [--batch-size N] [--no-cache] [--full-rebuild]
+    python evaluate_llm_models.py --all-models [--workers N] [--batch-size N] [--no-cache] [--full-rebuild]
 """
 
-import subprocess
+import io
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
 from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+from analyze_triggered_rules import SimpleRulesAnalyzer
+from process_all_files import BatchRectorProcessor
+from rector_analyzer import DEFAULT_BATCH_SIZE
+from utils import discover_models
+
+# Output of the model evaluated in the current context (None: straight to the console)
+_output_buffer: ContextVar[Optional[io.StringIO]] = ContextVar("output_buffer", default=None)
+
+
+class _BufferedStdout(io.TextIOBase):
+    """sys.stdout stand-in sending each concurrently evaluated model's output to its own buffer."""
+
+    def __init__(self, console):
+        self.console = console
+
+    def write(self, text: str) -> int:
+        buffer = _output_buffer.get()
+        return (buffer if buffer is not None else self.console).write(text)
+
+    def flush(self):
+        self.console.flush()
+
+
+def evaluate_model(model_name: str, max_workers: int = 4, batch_size: int = DEFAULT_BATCH_SIZE,
+                   incremental: bool = True, **processor_options) -> Dict[str, Any]:
+    """Rector analysis and rules report for one model; returns a summary dict.
+
+    ``processor_options`` are passed to BatchRectorProcessor (use_cache, use_daemon, ...).
+    """
+    started = time.perf_counter()
+    summary = {"model": model_name, "success": False, "files": 0, "perfect_files": 0,
+               "total_changes": 0, "report_file": None, "seconds": 0.0}
 
-def run_evaluation(model_name: str):
-    """Run evaluation for a specific model."""
-    print(f"🚀 Starting evaluation for {model_name}")
-    print("=" * 60)
-    
     # Check if model directory exists
     model_dir = Path(f"new-version/{model_name}")
     if not model_dir.exists():
-        print(f"❌ Model directory not found: {model_dir}")
-        return False
-    
-    # Step 1: Run Rector analysis
-    print("\n📋 Step 1: Running Rector analysis...")
-    try:
-        result = subprocess.run([sys.executable, "process_all_files.py", model_name], 
-                              capture_output=False, text=True)
-        if result.returncode != 0:
-            print(f"❌ Rector analysis failed with return code {result.returncode}")
-            return False
-    except Exception as e:
-        print(f"❌ Error running Rector analysis: {e}")
-        return False
-    
-    # Step 2: Run triggered rules analysis
-    print("\n📊 Step 2: Running triggered rules analysis...")
-    try:
-        result = subprocess.run([sys.executable, "analyze_triggered_rules.py", model_name], 
-                              capture_output=False, text=True)
-        if result.returncode != 0:
-            print(f"❌ Triggered rules analysis failed with return code {result.returncode}")
-            return False
-    except Exception as e:
-        print(f"❌ Error running triggered rules analysis: {e}")
+        summary["error"] = f"Model directory not found: {model_dir}"
+        return summary
+
+    # Step 1: Rector analysis
+    print(f"\n📋 [{model_name}] Step 1: Running Rector analysis...")
+    processor = BatchRectorProcessor(model_name=model_name, evaluation_mode=True, **processor_options)
+    results = processor.process_all_files(max_workers=max_workers, batch_size=batch_size, incremental=incremental)
+    if not results:
+        summary["error"] = "No files were successfully processed"
+        return summary
+    return _report_model(processor, results, summary, started)
+
+
+def _report_model(processor: BatchRectorProcessor, results: List[Dict[str, Any]],
+                  summary: Dict[str, Any], started: float) -> Dict[str, Any]:
+    """Save a model's Rector results and its rules report; fill in the summary."""
+    model_name = processor.model_name
+    processor.save_results(results)
+
+    # Step 2: Triggered rules report from the in-memory results
+    print(f"\n📊 [{model_name}] Step 2: Running triggered rules analysis...")
+    analyzer = SimpleRulesAnalyzer(model_name=model_name, results=results)
+    report_file = analyzer.save_report()
+    file_summaries = analyzer.get_file_summaries()
+
+    summary.update({
+        "success": True,
+        "files": len(results),
+        "perfect_files": sum(1 for f in file_summaries if f["total_changes"] == 0),
+        "total_changes": sum(f["total_changes"] for f in file_summaries),
+        "report_file": str(report_file),
+        "seconds": time.perf_counter() - started,
+    })
+    return summary
+
+
+def evaluate_all_models(model_names: List[str], max_workers: int = 4, batch_size: int = DEFAULT_BATCH_SIZE,
+                        incremental: bool = True, **processor_options) -> List[Dict[str, Any]]:
+    """Evaluate models with every model's Rector batches scheduled on one shared worker pool.
+
+    Files still to analyze from all models are pooled, so the workers stay busy
+    across model boundaries; ``processor_options`` such as use_daemon and
+    rule_subsets apply to that shared run. Each model's results and report are
+    then written as usual.
+    """
+    pool_started = time.perf_counter()
+    processors = {model: BatchRectorProcessor(model_name=model, evaluation_mode=True, **processor_options)
+                  for model in model_names}
+    runs = {model: processor.prepare_run(incremental) for model, processor in processors.items()}
+    pending = [file_path for _, to_analyze, _ in runs.values() for file_path in to_analyze]
+
+    analyses = {}
+    if pending:
+        print(f"\n⚙️  One shared Rector run for {len(pending)} files from {len(processors)} models")
+        # Every processor has the same options: the first one's daemons, rule subsets or pool serve them all
+        runner = next(iter(processors.values()))
+        with runner.warm_daemons(max_workers):
+            analyses = runner.analyze_files(pending, max_workers, batch_size)
+        if runner.cache is not None:
+            runner.cache.print_summary()
+    print(f"⏱️  Shared Rector pool: {time.perf_counter() - pool_started:.1f}s for all models")
+
+    summaries = []
+    for model, processor in processors.items():
+        # Rector time is shared; a model's own time covers building its results and report
+        started = time.perf_counter()
+        php_files, to_analyze, unchanged = runs[model]
+        summary = {"model": model, "success": False, "files": 0, "perfect_files": 0,
+                   "total_changes": 0, "report_file": None, "seconds": 0.0}
+        results = processor.merge_results(php_files, unchanged, processor.build_results(to_analyze, analyses))
+        if results:
+            _report_model(processor, results, summary, started)
+        else:
+            summary["error"] = "No files were successfully processed"
+        summaries.append(summary)
+
+    print_summaries(summaries)
+    return summaries
+
+
+def run_evaluation(model_name: str, **options) -> bool:
+    """Run evaluation for a specific model."""
+    print(f"🚀 Starting evaluation for {model_name}")
+    print("=" * 60)
+
+    summary = evaluate_model(model_name, **options)
+    if not summary["success"]:
+        print(f"❌ {summary['error']}")
         return False
-    
+
     print(f"\n✅ Evaluation complete for {model_name}!")
     print(f"📁 Results saved in: evaluation_reports/{model_name}/")
     return True
 
+
+def evaluate_models(model_names: List[str], parallel: int = 2, **options) -> List[Dict[str, Any]]:
+    """Evaluate several models, ``parallel`` at a time; summaries keep input order.
+
+    Rector runs out of process, so the models share this interpreter on threads.
+    Each model's progress output is buffered and printed in one block when it finishes.
+    """
+    console = sys.stdout
+    console_lock = threading.Lock()
+
+    def evaluate(model_name: str) -> Dict[str, Any]:
+        buffer = io.StringIO()
+        token = _output_buffer.set(buffer)
+        try:
+            summary = evaluate_model(model_name, **options)
+        except Exception as e:
+            summary = {"model": model_name, "success": False, "error": str(e)}
+        finally:
+            _output_buffer.reset(token)
+        with console_lock:
+            console.write(f"\n{'─' * 60}\n🔬 {model_name}\n{'─' * 60}{buffer.getvalue()}")
+            console.flush()
+        return summary
+
+    print(f"🚀 Evaluating {len(model_names)} models ({max(parallel, 1)} at a time)")
+    print("=" * 60)
+    sys.stdout = _BufferedStdout(console)
+    try:
+        with ThreadPoolExecutor(max_workers=max(parallel, 1)) as executor:
+            summaries = list(executor.map(evaluate, model_names))
+    finally:
+        sys.stdout = console
+
+    print_summaries(summaries)
+    return summaries
+
+
+def print_summaries(summaries: List[Dict[str, Any]]):
+    """One line per evaluated model."""
+    print("\n🏁 Evaluation summary:")
+    for summary in summaries:
+        if summary["success"]:
+            print(f"   ✅ {summary['model']}: {summary['perfect_files']}/{summary['files']} perfect, "
+                  f"{summary['total_changes']} changes left ({summary['seconds']:.1f}s)")
+        else:
+            print(f"   ❌ {summary['model']}: {summary['error']}")
+
+
 def main():
     """Main function."""
-    available_models = [
-        "gemini_1_5_flash",
-        "mistralai_mistral_small_3_2_24b_instruct_free"
-    ]
-    
-    if len(sys.argv) > 1:
-        model_name = sys.argv[1]
-        if model_name not in available_models:
-            print(f"❌ Unknown model: {model_name}")
+    # Models are discovered from new-version/ (evaluable) and chunked_model_output/ (not yet reconstructed)
+    discovered = discover_models()
+    available_models = [model for model, output in discovered.items() if output["files"]]
+
+    # --parallel N models at a time, --workers N Rector workers per model, --batch-size N files per Rector call
+    options = {"use_cache": "--no-cache" not in sys.argv, "incremental": "--full-rebuild" not in sys.argv}
+    parallel = 2
+    args = []
+    argv = iter(sys.argv[1:])
+    for arg in argv:
+        if arg == "--parallel":
+            parallel = int(next(argv))
+        elif arg == "--workers":
+            options["max_workers"] = int(next(argv))
+        elif arg == "--batch-size":
+            options["batch_size"] = int(next(argv))
+        elif not arg.startswith("--"):
+            args.append(arg)
+
+    if "--all-models" in sys.argv:
+        # Every evaluable model, all Rector work on one shared worker pool
+        if not available_models:
+            print("❌ No model output found in new-version/")
+            sys.exit(1)
+        summaries = evaluate_all_models(available_models, **options)
+        if not all(s["success"] for s in summaries):
+            sys.exit(1)
+
+    elif args:
+        unknown = [model for model in args if model not in available_models]
+        if unknown:
+            pending = [model for model in unknown if model in discovered]
+            if pending:
+                print(f"❌ Not reconstructed yet: {', '.join(pending)} (run: python migrate.py --reconstruct)")
+            if len(pending) < len(unknown):
+                print(f"❌ Unknown model: {', '.join(m for m in unknown if m not in pending)}")
             print(f"Available models: {', '.join(available_models)}")
             return
-        
-        # Run evaluation for specific model
-        success = run_evaluation(model_name)
+
+        if len(args) == 1:
+            # Run evaluation for specific model
+            success = run_evaluation(args[0], **options)
+        else:
+            success = all(s["success"] for s in evaluate_models(args, parallel, **options))
         if not success:
             sys.exit(1)
-    
-    elif len(sys.argv) == 1:
+
+    else:
         # Show usage
         print("🔬 LLM Evaluation Runner")
         print("=" * 30)
         print()
         print("Usage:")
-        print(f"  python {sys.argv[0]} <model_name>")
+        print(f"  python {sys.argv[0]} <model_name> [<model_name> ...] [--parallel N] [--workers N]"
+              " [--batch-size N] [--no-cache] [--full-rebuild]")
+        print(f"  python {sys.argv[0]} --all-models [--workers N] [--batch-size N]  # shared Rector worker pool")
         print()
         print("Available models:")
-        for model in available_models:
-            model_dir = Path(f"new-version/{model}")
-            status = "✅" if model_dir.exists() else "❌"
-            print(f"  {status} {model}")
+        for model, output in discovered.items():
+            if output["files"]:
+                print(f"  ✅ {model} ({output['files']} files)")
+            else:
+                print(f"  ⏳ {model} ({output['chunked_files']} chunked files, run: python migrate.py --reconstruct)")
         print()
         print("Examples:")
-        print(f"  python {sys.argv[0]} gemini_1_5_flash")
-        print(f"  python {sys.argv[0]} mistralai_mistral_small_3_2_24b_instruct_free")
+        if available_models:
+            print(f"  python {sys.argv[0]} {available_models[0]}")
+        print(f"  python {sys.argv[0]} {' '.join(available_models[:2])} --parallel 2")
+        print(f"  python {sys.argv[0]} --all-models --workers 8")
         print()
         print("Or run individual steps:")
         print("  python process_all_files.py <model_name>     # Step 1: Rector analysis")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Fake Rector
+===========
+
+Stand-in for `vendor/bin/rector` that replays the recorded analyses in
+`rector_reports/individual_files` instead of running PHP, with configurable
+latency, so the Python evaluation pipeline can be run and benchmarked without
+PHP, composer or Rector installed.
+
+Usage (the same command line RectorAnalyzer builds for the real binary):
+    python fake_rector.py [--startup S] [--per-file S] [--recordings DIR] --version
+    python fake_rector.py [--startup S] [--per-file S] [--recordings DIR] process <files...> --dry-run --output-format json
+
+Files are matched to recordings by name (`<stem>_rector.json`); files without
+a recording are reported as unchanged.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+DEFAULT_RECORDINGS_DIR = "rector_reports/individual_files"
+REPLAY_SUFFIX = "-replay"  # Marks the version so replayed results never mix with real ones in caches
+
+
+def fake_rector_command(startup: float = 0.0, per_file: float = 0.0,
+                        recordings_dir: Optional[str] = None) -> List[str]:
+    """Command for ``RectorAnalyzer(rector_bin=...)`` that runs this fake."""
+    command = [sys.executable, str(Path(__file__).absolute()), "--startup", str(startup), "--per-file", str(per_file)]
+    if recordings_dir:
+        command.extend(["--recordings", str(Path(recordings_dir).absolute())])
+    return command
+
+
+def recorded_version(recordings_dir: Path) -> str:
+    """Rector version the recordings were made with."""
+    for report_file in sorted(recordings_dir.glob("*_rector.json")):
+        try:
+            with open(report_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get("analysis_metadata", {}).get("rector_version", "0.0.0")
+        except (OSError, json.JSONDecodeError):
+            continue
+    return "0.0.0"
+
+
+def replay(file_paths: List[str], recordings_dir: Path) -> Dict[str, Any]:
+    """Combined Rector JSON output for the given files from their recordings."""
+    file_diffs = []
+    changed_files = []
+    for file_path in file_paths:
+        report_file = recordings_dir / f"{Path(file_path).stem}_rector.json"
+        if not report_file.exists():
+            continue
+        with open(report_file, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        if "storage" in report:
+            # Compact report: restore the diffs from the blob store
+            from report_store import load_report
+            report = load_report(report_file, load_diffs=True)
+        raw = report.get("raw_rector_output") or {}
+        for file_diff in raw.get("file_diffs", []):
+            file_diffs.append({**file_diff, "file": file_path})
+        if raw.get("file_diffs"):
+            changed_files.append(file_path)
+
+    output: Dict[str, Any] = {"totals": {"changed_files": len(changed_files), "errors": 0}}
+    if file_diffs:
+        output["file_diffs"] = file_diffs
+        output["changed_files"] = changed_files
+    return output
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay recorded Rector output")
+    parser.add_argument("--startup", type=float, default=0.0, help="Seconds of latency per invocation")
+    parser.add_argument("--per-file", type=float, default=0.0, help="Seconds of latency per analyzed file")
+    parser.add_argument("--recordings", default=DEFAULT_RECORDINGS_DIR, help="Recorded individual reports")
+    parser.add_argument("--version", action="store_true")
+    parser.add_argument("command", nargs="?")
+    parser.add_argument("paths", nargs="*")
+    # Rector options the analyzer passes; accepted and ignored
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--output-format", default="json")
+    parser.add_argument("--config")
+    args = parser.parse_args()
+
+    recordings_dir = Path(args.recordings)
+    if args.version:
+        print(f"Rector {recorded_version(recordings_dir)}{REPLAY_SUFFIX}")
+        return 0
+    if args.command != "process":
+        print(f"fake_rector: unsupported command {args.command!r}", file=sys.stderr)
+        return 64
+
+    time.sleep(args.startup + args.per_file * len(args.paths))
+    output = replay(args.paths, recordings_dir)
+    print(json.dumps(output, ensure_ascii=False))
+    return 1 if output["totals"]["changed_files"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
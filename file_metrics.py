@@ -0,0 +1,188 @@
+"""
+File Metrics
+Single-pass per-file metrics shared by the Rector analyzer, the chunker and the
+corpus reports: each file is read once (memory-mapped) and its lines, code/
+comment/blank lines, bytes, content hash, function/class counts and token
+estimate are computed together and cached by content hash.
+"""
+
+import hashlib
+import math
+import mmap
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple, Union
+
+CHARS_PER_TOKEN = 4.0  # Rough heuristic for code-heavy prompts
+
+# Everything that decides whether a line is code or comment, plus the declarations we count.
+# Strings and heredocs are matched so comment markers and keywords inside them are ignored;
+# inline HTML after ``?>`` counts as code.
+TOKEN_PATTERN = re.compile(rb"""
+      (?P<block_comment>/\*.*?(?:\*/|\Z))
+    | (?P<line_comment>(?://|\#(?!\[))(?:[^\n?]|\?(?!>))*)
+    | (?P<heredoc><<<[ \t]*(?P<quote>['"]?)(?P<label>[A-Za-z_]\w*)(?P=quote)\r?\n.*?\n[ \t]*(?P=label)\b)
+    | (?P<string>'(?:\\.|[^'\\])*'|"(?:\\.|[^"\\])*"|`(?:\\.|[^`\\])*`)
+    | (?P<html>\?>.*?(?:<\?php|<\?=|<\?|\Z))
+    | (?P<function>(?<![\w$>:])function\b)
+    | (?P<class>(?<![\w$>:])(?:class|interface|trait|enum)\s+[A-Za-z_\x80-\xff])
+""", re.S | re.X | re.I)
+
+Buffer = Union[bytes, mmap.mmap]
+
+
+class _LineTally:
+    """Classifies lines as blank, comment or code while segments are fed in order."""
+
+    def __init__(self):
+        self.code_lines = 0
+        self.comment_lines = 0
+        self.blank_lines = 0
+        self.newlines = 0
+        self._has_code = False
+        self._has_comment = False
+
+    def feed(self, segment: bytes, is_comment: bool):
+        parts = segment.split(b'\n')
+        self.newlines += len(parts) - 1
+        for index, part in enumerate(parts):
+            if index:
+                self.end_line()
+            if part.strip():
+                if is_comment:
+                    self._has_comment = True
+                else:
+                    self._has_code = True
+
+    def end_line(self):
+        if self._has_code:
+            self.code_lines += 1
+        elif self._has_comment:
+            self.comment_lines += 1
+        else:
+            self.blank_lines += 1
+        self._has_code = self._has_comment = False
+
+
+def compute_metrics(buffer: Buffer, content_hash: Optional[str] = None) -> Dict[str, Any]:
+    """Compute every metric for one file's bytes in a single scan.
+
+    ``lines`` counts lines as ``readlines()`` does (a final unterminated line
+    counts, a trailing newline does not open a new one); ``newlines`` is the raw
+    newline count, so the chunker's ``split('\\n')`` line count is ``newlines + 1``.
+    """
+    size = len(buffer)
+    tally = _LineTally()
+    functions = classes = 0
+
+    # Anything before the first open tag is inline HTML
+    position = buffer.find(b'<?')
+    position = size if position == -1 else position
+    if position:
+        tally.feed(buffer[:position], False)
+
+    for match in TOKEN_PATTERN.finditer(buffer, position):
+        if match.start() > position:
+            tally.feed(buffer[position:match.start()], False)
+        kind = match.lastgroup
+        if kind == 'function':
+            functions += 1
+        elif kind == 'class':
+            classes += 1
+        tally.feed(match.group(), kind in ('block_comment', 'line_comment'))
+        position = match.end()
+    if position < size:
+        tally.feed(buffer[position:], False)
+
+    unterminated = size > 0 and buffer[size - 1:size] != b'\n'
+    if unterminated:
+        tally.end_line()
+
+    return {
+        'sha256': content_hash or hashlib.sha256(buffer).hexdigest(),
+        'bytes': size,
+        'lines': tally.newlines + int(unterminated),
+        'newlines': tally.newlines,
+        'code_lines': tally.code_lines,
+        'comment_lines': tally.comment_lines,
+        'blank_lines': tally.blank_lines,
+        'functions': functions,
+        'classes': classes,
+        'tokens': math.ceil(size / CHARS_PER_TOKEN),
+    }
+
+
+def chunk_line_count(metrics: Dict[str, Any]) -> int:
+    """Line count as the chunker sees it (``split('\\n')``)."""
+    return metrics['newlines'] + 1
+
+
+class FileMetricsEngine:
+    """Computes file metrics once per distinct content.
+
+    Results are cached by content hash; files are additionally indexed by
+    (path, size, mtime) so an unchanged file is not even re-hashed.
+    """
+
+    def __init__(self):
+        self._by_hash: Dict[str, Dict[str, Any]] = {}
+        self._by_stat: Dict[Tuple[str, int, int], str] = {}
+        self._lock = threading.Lock()
+        self.stats = {"computed": 0, "reused": 0}
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def measure_buffer(self, buffer: Buffer, content_hash: Optional[str] = None) -> Dict[str, Any]:
+        """Metrics for raw file bytes (pass ``content_hash`` if it is already known)."""
+        content_hash = content_hash or hashlib.sha256(buffer).hexdigest()
+        metrics = self._by_hash.get(content_hash)
+        if metrics is not None:
+            self._count("reused")
+            return metrics
+
+        metrics = compute_metrics(buffer, content_hash)
+        self._count("computed")
+        with self._lock:
+            self._by_hash[content_hash] = metrics
+        return metrics
+
+    def measure_file(self, file_path: Union[str, Path]) -> Dict[str, Any]:
+        """Metrics for a file on disk, read through a memory map."""
+        file_path = Path(file_path)
+        stat = file_path.stat()
+        stat_key = (str(file_path.absolute()), stat.st_size, stat.st_mtime_ns)
+
+        content_hash = self._by_stat.get(stat_key)
+        if content_hash is not None and content_hash in self._by_hash:
+            self._count("reused")
+            return self._by_hash[content_hash]
+
+        with open(file_path, 'rb') as f:
+            if stat.st_size == 0:
+                metrics = self.measure_buffer(b'')
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    metrics = self.measure_buffer(buffer)
+        with self._lock:
+            self._by_stat[stat_key] = metrics['sha256']
+        return metrics
+
+    def measure_entry(self, entry) -> Dict[str, Any]:
+        """Metrics for a ``CorpusFile``, reusing its mapped buffer and cached hash."""
+        return self.measure_buffer(entry.buffer, entry.content_hash)
+
+    def content_hash(self, file_path: Union[str, Path]) -> str:
+        """SHA-256 of a file, shared with its metrics."""
+        return self.measure_file(file_path)['sha256']
+
+
+metrics_engine = FileMetricsEngine()
+
+
+def file_metrics(file_path: Union[str, Path]) -> Dict[str, Any]:
+    """Metrics for a file through the shared engine."""
+    return metrics_engine.measure_file(os.fspath(file_path))
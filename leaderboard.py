@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Multi-Model Leaderboard
+=======================
+
+Discovers every `evaluation_reports/<model>/`, loads the models in parallel
+into the cached results table (only changed models are re-read) and computes
+per-model, per-size-category and per-PHP-version residual statistics in one
+vectorized pass, emitting a single comparison report.
+
+Usage:
+    python leaderboard.py [--workers N] [--force] [--rebuild]
+"""
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict
+
+import pandas as pd
+
+from results_table import ResultsTable
+from rule_matrix import BASELINE, EVALUATION_DIR
+
+LEADERBOARD_FILE = "leaderboard.md"
+LEADERBOARD_STATE_FILE = ".leaderboard_state.json"
+
+
+def compute_leaderboard(table: ResultsTable) -> Dict[str, pd.DataFrame]:
+    """Leaderboard, per-category and per-PHP-version residual frames for all models at once."""
+    files = table.files[table.files["source"] != BASELINE]
+    rules = table.rules
+
+    grouped = files.groupby("source", observed=True)
+    board = pd.DataFrame({
+        "files": grouped.size(),
+        "perfect_files": grouped["php_version_changes"].agg(lambda changes: int((changes == 0).sum())),
+        "residual_changes": grouped["php_version_changes"].sum(),
+        "avg_changes": grouped["php_version_changes"].mean(),
+        "residual_rule_hits": grouped["rule_count"].sum(),
+    })
+
+    # Rule hits fixed/introduced against the baseline, on the files each model produced
+    baseline_hits = rules.loc[rules["source"] == BASELINE, ["filename", "rule"]].astype(str)
+    expected = files[["source", "filename"]].astype(str).merge(baseline_hits, on="filename")
+    observed = rules.loc[rules["source"] != BASELINE, ["source", "filename", "rule"]].astype(str)
+    compared = expected.merge(observed, on=["source", "filename", "rule"], how="outer", indicator=True)
+    outcome = compared.groupby(["source", "_merge"], observed=False).size().unstack(fill_value=0)
+    board["baseline_rule_hits"] = outcome.get("left_only", 0) + outcome.get("both", 0)
+    board["fixed_rule_hits"] = outcome.get("left_only", 0)
+    board["introduced_rule_hits"] = outcome.get("right_only", 0)
+    board = board.fillna(0)
+    board["perfect_rate"] = board["perfect_files"] / board["files"]
+    board["fix_rate"] = (board["fixed_rule_hits"] / board["baseline_rule_hits"].where(board["baseline_rule_hits"] > 0)).fillna(0)
+    board = board.sort_values(["avg_changes", "perfect_rate"], ascending=[True, False])
+    board.insert(0, "rank", range(1, len(board) + 1))
+
+    by_category = files.pivot_table(index="source", columns="size_category", values="php_version_changes",
+                                    aggfunc="mean", observed=True).reindex(board.index)
+    model_rules = rules[rules["source"] != BASELINE]
+    by_version = model_rules.pivot_table(index="source", columns="php_version", values="filename",
+                                         aggfunc="count", fill_value=0, observed=True).reindex(board.index).fillna(0)
+    return {"leaderboard": board, "by_category": by_category, "by_php_version": by_version.astype(int)}
+
+
+def _markdown_table(frame: pd.DataFrame, float_format: str = "{:.2f}") -> str:
+    """Render a frame (index = model) as a Markdown table."""
+    header = ["model", *map(str, frame.columns)]
+    lines = ["| " + " | ".join(header) + " |", "|" + "---|" * len(header)]
+    for model, row in frame.iterrows():
+        cells = [f"`{model}`"]
+        for value in row:
+            if pd.isna(value):
+                cells.append("–")
+            elif isinstance(value, float) and not value.is_integer():
+                cells.append(float_format.format(value))
+            else:
+                cells.append(str(int(value)) if isinstance(value, float) else str(value))
+        lines.append("| " + " | ".join(cells) + " |")
+    return "\n".join(lines)
+
+
+def render_report(frames: Dict[str, pd.DataFrame]) -> str:
+    """Single Markdown comparison report for every model."""
+    board = frames["leaderboard"]
+    report = f"""# LLM Migration Leaderboard
+
+*Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} for {len(board)} models*
+
+Ranked by average remaining Rector changes per file (lower is better). Fixed and
+introduced rule hits compare each model's output with the original files.
+
+## Leaderboard
+
+"""
+    columns = ["rank", "files", "perfect_files", "perfect_rate", "avg_changes", "residual_changes",
+               "fixed_rule_hits", "introduced_rule_hits", "fix_rate"]
+    report += _markdown_table(board[columns]) + "\n"
+    report += "\n## Average Remaining Changes per Size Category\n\n"
+    report += _markdown_table(frames["by_category"]) + "\n"
+    report += "\n## Residual Rule Hits per PHP Version\n\n"
+    report += _markdown_table(frames["by_php_version"]) + "\n"
+    return report
+
+
+def generate_leaderboard(evaluation_dir: str = EVALUATION_DIR, workers: int = os.cpu_count() or 1,
+                         force: bool = False, rebuild: bool = False) -> Path:
+    """Refresh the results table and (re)write the leaderboard if any model changed."""
+    report_file = Path(evaluation_dir) / LEADERBOARD_FILE
+    state_file = Path(evaluation_dir) / LEADERBOARD_STATE_FILE
+
+    table = ResultsTable(table_dir=str(Path(evaluation_dir) / "results_table"), evaluation_dir=evaluation_dir)
+    status = table.refresh(rebuild, workers)
+    changed = [source for source, state in status.items() if state != "cached"]
+    print(f"📥 Loaded {len(status)} sources ({len(changed)} re-read: {', '.join(changed) or 'none'})")
+
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            previous_sources = json.load(f).get("sources", [])
+    except (OSError, json.JSONDecodeError):
+        previous_sources = None
+    if not force and not changed and report_file.exists() and previous_sources == sorted(status):
+        print(f"✅ Leaderboard up to date: {report_file}")
+        return report_file
+
+    if BASELINE not in status:
+        raise FileNotFoundError("No baseline analysis in rector_reports. Run: python process_all_files.py")
+    frames = compute_leaderboard(table)
+    with open(report_file, 'w', encoding='utf-8') as f:
+        f.write(render_report(frames))
+    with open(state_file, 'w', encoding='utf-8') as f:
+        json.dump({"sources": sorted(status), "generated": datetime.now().isoformat()}, f)
+    print(f"🏆 Leaderboard saved: {report_file}")
+
+    board = frames["leaderboard"]
+    for model, row in board.iterrows():
+        print(f"   {int(row['rank'])}. {model}: {row['avg_changes']:.2f} avg changes, "
+              f"{int(row['perfect_files'])}/{int(row['files'])} perfect, {row['fix_rate']:.0%} of baseline hits fixed")
+    return report_file
+
+
+def main():
+    """Main execution function."""
+    import sys
+
+    # --force rewrites the report even if no model changed; --rebuild re-reads every model
+    force = "--force" in sys.argv
+    rebuild = "--rebuild" in sys.argv
+    workers = os.cpu_count() or 1
+    if "--workers" in sys.argv:
+        workers = int(sys.argv[sys.argv.index("--workers") + 1])
+
+    print("🏆 Multi-Model Leaderboard")
+    print("=" * 50)
+    try:
+        generate_leaderboard(workers=workers, force=force, rebuild=rebuild)
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,8 +4,7 @@ Handles API calls to different LLM providers (OpenRouter, Google AI).
 """
 
 import json
-import requests
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Union
 
 
 class MultiProviderClient:
@@ -25,9 +24,15 @@ class MultiProviderClient:
         'timeout': 300
     }
     
-    def __init__(self, providers: Dict[str, Any]):
-        """Initialize with provider configuration."""
-        self.providers = providers
+    def __init__(self, providers: Union[Dict[str, Any], Callable[[], Dict[str, Any]]]):
+        """Initialize with provider configuration, or a callable producing it on first API call."""
+        self._providers = providers
+    
+    @property
+    def providers(self) -> Dict[str, Any]:
+        if callable(self._providers):
+            self._providers = self._providers()
+        return self._providers
     
     def detect_provider(self, model_name: str) -> str:
         """Detect provider using pattern matching."""
@@ -79,6 +84,8 @@ class MultiProviderClient:
             "X-Title": "LLM PHP Migration Research"
         }
         
+        import requests
+        
         response = requests.post(
             "https://openrouter.ai/api/v1/chat/completions",
             headers=headers,
@@ -4,8 +4,6 @@
 # Import everything we need (same as notebook)
 import os
 import json
-import pandas as pd
-import numpy as np
 from pathlib import Path
 from datetime import datetime
 import warnings
@@ -68,22 +66,13 @@ from utils import load_test_files
 # Initialize multi-provider client
 multi_client = MultiProviderClient(PROVIDERS)
 
-# Load test files (same as notebook)
-test_files = {}
+# Load test files (same as notebook) - indexed lazily, content is memory-mapped on demand
 old_version_path = Path('selected_100_files/extra_large_1000_plus')
 
 if old_version_path.exists():
-    for php_file in old_version_path.rglob('*.php'):
-        try:
-            with open(php_file, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-                if content.strip():
-                    test_files[php_file.name] = content
-        except Exception as e:
-            print(f"⚠️  Could not load {php_file.name}: {e}")
-    
-    print(f"📁 Loaded {len(test_files)} PHP files")
+    test_files = load_test_files(str(old_version_path))
 else:
+    test_files = {}
     print("❌ selected_100_files directory not found")
 
 # Create migration manager 
@@ -12,11 +12,13 @@ from typing import List, Optional
 from config import config, DEFAULT_CHUNK_SIZE
 from llm_client import MultiProviderClient
 from processor import MigrationManager
-from parser import OutputParser, FileReconstructor
+from prompts import print_prompt_configuration
+from parser import OutputParser, FileReconstructor, StreamingReconstructor
 from utils import load_test_files, analyze_file_sizes
+from response_store import ResponseStore, DEFAULT_STORE_PATH
 
 
-def create_migration_system(test_files_path: str = None):
+def create_migration_system(test_files_path: str = None, store_path: Optional[str] = None):
     """Initialize the complete migration system."""
     # Load test files
     if not test_files_path:
@@ -28,14 +30,18 @@ def create_migration_system(test_files_path: str = None):
         print("❌ No test files loaded. Cannot proceed.")
         return None, None, None, None
     
-    # Initialize multi-provider client
-    multi_client = MultiProviderClient(config.get_providers())
+    # Initialize multi-provider client (provider clients are created on the first API call)
+    multi_client = MultiProviderClient(config.get_providers)
     
-    # Initialize components
-    migration_manager = MigrationManager(multi_client, test_files)
+    # Initialize components (responses go to the structured store unless disabled)
+    store = ResponseStore(store_path) if store_path else None
+    migration_manager = MigrationManager(multi_client, test_files, store)
     output_parser = OutputParser()
     file_reconstructor = FileReconstructor(output_parser)
     
+    # Chunked files are reconstructed as soon as their last chunk lands
+    migration_manager.chunk_listeners.append(StreamingReconstructor(file_reconstructor, store))
+    
     return migration_manager, output_parser, file_reconstructor, test_files
 
 
@@ -66,12 +72,32 @@ def main():
     # Actions
     parser.add_argument('--analyze', action='store_true',
                         help='Analyze file sizes only')
+    parser.add_argument('--forecast', action='store_true',
+                        help='Corpus statistics and request/token/time forecast per model')
+    parser.add_argument('--forecast-models', type=str, nargs='*',
+                        help='Models to forecast (default: --model plus every model with telemetry)')
+    parser.add_argument('--concurrency', type=int, nargs='*', default=[1, 4, 8],
+                        help='Concurrency levels to forecast')
     parser.add_argument('--migrate', action='store_true', default=True,
                         help='Perform migration (default)')
     parser.add_argument('--parse', action='store_true',
                         help='Parse existing responses')
     parser.add_argument('--reconstruct', action='store_true',
                         help='Reconstruct files from chunks')
+    parser.add_argument('--full-parse', action='store_true',
+                        help='Reparse every response instead of only new or changed ones')
+    parser.add_argument('--store', type=str, default=str(DEFAULT_STORE_PATH),
+                        help='SQLite response store for new responses')
+    parser.add_argument('--legacy-output', action='store_true',
+                        help='Write responses as text-header files instead of the response store')
+    parser.add_argument('--export-legacy', action='store_true',
+                        help='Export the response store to model_output/ and chunked_model_output/')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes for parsing and reconstruction')
+    parser.add_argument('--validate-structure', action='store_true',
+                        help='Check bracket/tag balance of each chunk response against its source chunk')
+    parser.add_argument('--structure-retries', type=int, default=1,
+                        help='Re-requests for chunks failing the structural check (default: 1)')
     
     # Test mode
     parser.add_argument('--test', action='store_true',
@@ -83,11 +109,15 @@ def main():
     print("=" * 50)
     
     # Initialize system
-    migration_manager, output_parser, file_reconstructor, test_files = create_migration_system(args.files_dir)
+    store_path = None if args.legacy_output else args.store
+    migration_manager, output_parser, file_reconstructor, test_files = create_migration_system(args.files_dir, store_path)
     
     if not migration_manager:
         sys.exit(1)
     
+    migration_manager.validate_structure = args.validate_structure
+    migration_manager.structure_retries = args.structure_retries
+    
     # Test mode
     if args.test:
         print("\n🧪 Testing provider detection...")
@@ -100,16 +130,43 @@ def main():
         analyze_file_sizes(test_files, args.chunk_size)
         return
     
+    # Corpus statistics and run forecast
+    if args.forecast:
+        print("\n🔮 Computing corpus statistics and forecast...")
+        from corpus_stats import CorpusStatistics, RunForecaster, load_latency_telemetry, print_corpus_report
+        
+        stats = CorpusStatistics(test_files, args.chunk_size)
+        telemetry = load_latency_telemetry(store_path=Path(args.store))
+        models = args.forecast_models or [args.model] + sorted(m for m in telemetry if m != args.model)
+        forecaster = RunForecaster(stats, telemetry, strategy=args.strategy, store_path=Path(args.store))
+        print_corpus_report(stats, forecaster.forecast(models, args.concurrency))
+        return
+    
+    store = migration_manager.store
+    
+    # Export stored responses to the legacy layout
+    if args.export_legacy:
+        if store is None:
+            print("❌ --export-legacy needs the response store (drop --legacy-output)")
+            return
+        exported = store.export_legacy()
+        print(f"\n📤 Exported {exported} responses from {store.db_path} to the legacy layout")
+        return
+    
     # Parse existing responses
     if args.parse:
         print("\n🔄 Parsing existing responses...")
-        output_parser.process_all_responses()
+        output_parser.process_all_responses(incremental=not args.full_parse, workers=args.workers)
+        if store is not None:
+            output_parser.process_store_responses(store)
         return
     
     # Reconstruct files from chunks
     if args.reconstruct:
         print("\n🔧 Reconstructing files from chunks...")
-        file_reconstructor.reconstruct_all_files()
+        file_reconstructor.reconstruct_all_files(workers=args.workers)
+        if store is not None:
+            file_reconstructor.reconstruct_from_store(store)
         return
     
     # Migration workflow
@@ -121,6 +178,7 @@ def main():
             print("❌ No files selected for migration")
             return
         
+        print_prompt_configuration()
         print(f"\n🚀 Starting migration of {len(files_to_migrate)} files...")
         print(f"📋 Model: {args.model}")
         print(f"📋 Strategy: {args.strategy}")
@@ -140,10 +198,12 @@ def main():
         
         # Automatic post-processing
         print("\n🔄 Post-processing: Parsing responses...")
-        output_parser.process_all_responses()
+        if store is not None:
+            output_parser.process_store_responses(store)
+        else:
+            output_parser.process_all_responses(incremental=not args.full_parse, workers=args.workers)
         
-        print("\n🔧 Post-processing: Reconstructing chunked files...")
-        file_reconstructor.reconstruct_all_files()
+        # Chunked files were already reconstructed as each one's last chunk landed
         
         print("\n🎉 Full migration pipeline completed!")
 
@@ -151,17 +211,16 @@ def main():
 def determine_files_to_migrate(args, test_files) -> List[str]:
     """Determine which files to migrate based on arguments."""
     if args.files:
-        # Specific files requested
-        available_files = set(test_files.keys())
-        requested_files = set(args.files)
-        valid_files = list(requested_files & available_files)
+        # Specific files requested (relative paths or unambiguous bare filenames)
+        resolved = {name: test_files.resolve(name) for name in args.files}
+        valid_files = sorted({rel_path for rel_path in resolved.values() if rel_path})
         
         if not valid_files:
             print(f"❌ None of the requested files found: {args.files}")
-            print(f"💡 Available files: {sorted(available_files)}")
+            print(f"💡 Available files: {sorted(test_files.keys())}")
             return []
         
-        invalid_files = requested_files - available_files
+        invalid_files = {name for name, rel_path in resolved.items() if rel_path is None}
         if invalid_files:
             print(f"⚠️  Invalid files ignored: {sorted(invalid_files)}")
         
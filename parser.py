@@ -3,11 +3,162 @@ Output Processing System
 Handles parsing of LLM responses and file reconstruction from chunks.
 """
 
+import hashlib
+import json
+import os
 import re
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Callable
 
-from utils import ensure_directory
+from utils import ensure_directory, parallel_map, output_base_name
+
+PARSE_MANIFEST_FILE = '.parse_manifest.json'
+DEFAULT_WORKERS = 1
+# Bump when extraction changes so previously failed responses are retried
+EXTRACTOR_VERSION = 2
+
+START_MARKER = re.compile(r'(?://|#)[ \t]*MIGRATION_START[ \t]*\r?\n', re.IGNORECASE)
+END_MARKER = re.compile(r'\n[ \t]*(?://|#)[ \t]*MIGRATION_END', re.IGNORECASE)
+FENCED_BLOCK = re.compile(r'^[ \t]*```[ \t]*(\w*)[ \t]*\r?\n(.*?)^[ \t]*```', re.MULTILINE | re.DOTALL)
+UNCLOSED_FENCE = re.compile(r'\n[ \t]*```[ \t]*$')
+
+
+def _parse_work_unit(unit: Tuple['OutputParser', Path, Optional[str], Optional[Dict[str, Any]], bool]) -> Dict[str, Any]:
+    """Process-pool entry point: parse one (model folder, response file) unit."""
+    parser, response_file, model_folder_name, previous, incremental = unit
+    return parser._process_response_file(response_file, model_folder_name, previous, incremental)
+
+
+def _reconstruct_work_unit(unit: Tuple['FileReconstructor', Dict[str, Any]]) -> bool:
+    """Process-pool entry point: reconstruct one chunked file."""
+    reconstructor, file_info = unit
+    return reconstructor.reconstruct_file(file_info)
+
+
+def content_hash(data: bytes) -> str:
+    """SHA-256 hex digest of raw bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def write_if_changed(output_file: Path, code: str) -> Tuple[bool, str]:
+    """Write code unless the file already holds identical content; returns (written, hash)."""
+    data = code.encode('utf-8')
+    new_hash = content_hash(data)
+    
+    if output_file.exists() and output_file.stat().st_size == len(data):
+        if content_hash(output_file.read_bytes()) == new_hash:
+            return False, new_hash
+    
+    ensure_directory(output_file.parent)
+    temp_file = output_file.with_name(f".{output_file.name}.{os.getpid()}.tmp")
+    with open(temp_file, 'w', encoding='utf-8', newline='') as f:
+        f.write(code)
+    os.replace(temp_file, output_file)
+    return True, new_hash
+
+
+def extract_code(response_content: str) -> Dict[str, Any]:
+    """Extract migrated code with a tiered salvage strategy.
+    
+    Tiers, in order: ``markers`` (MIGRATION_START/END as ``//`` or ``#`` comments),
+    ``fenced`` (the longest php/untagged fenced code block) and ``truncated``
+    (a start marker whose end marker never arrived). An empty body between both
+    markers yields no code. Returns the code, the tier
+    that matched (None if nothing did) and whether the code may be incomplete.
+    """
+    start_match = START_MARKER.search(response_content)
+    if start_match:
+        end_match = END_MARKER.search(response_content, start_match.end() - 1)
+        if end_match:
+            code = response_content[start_match.end():end_match.start()].strip()
+            if code:
+                return {'code': code, 'tier': 'markers', 'truncated': False}
+            # Both markers but nothing between them: no code, so the response is retried
+            return {'code': '', 'tier': None, 'truncated': False}
+    
+    blocks = [m.group(2) for m in FENCED_BLOCK.finditer(response_content)
+              if m.group(1).lower() == 'php' or '<?php' in m.group(2)]
+    if blocks:
+        block = max(blocks, key=len)
+        # A start marker inside the fence (end marker dropped) is not part of the code
+        block_start = START_MARKER.search(block)
+        code = (block[block_start.end():] if block_start else block).strip()
+        if code:
+            return {'code': code, 'tier': 'fenced', 'truncated': False}
+    
+    if start_match:
+        code = UNCLOSED_FENCE.sub('', response_content[start_match.end():]).strip()
+        if code:
+            return {'code': code, 'tier': 'truncated', 'truncated': True}
+    
+    return {'code': '', 'tier': None, 'truncated': False}
+
+
+def extract_migrated_code(response_content: str) -> str:
+    """Extract migrated code from a response (see ``extract_code`` for the tiers)."""
+    return extract_code(response_content)['code']
+
+
+class ParseManifest:
+    """Record of parsed responses: (path, size, mtime, hash) -> output path and hash.
+    
+    Lets incremental parsing skip responses that have not changed since the last run
+    with a single stat() per file.
+    """
+    
+    def __init__(self, manifest_file: Path):
+        self.manifest_file = manifest_file
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.dirty = False
+        
+        if manifest_file.exists():
+            try:
+                with open(manifest_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.entries = data.get('responses', {})
+                # Responses an older extractor could not parse may be salvageable now
+                if data.get('extractor_version') != EXTRACTOR_VERSION:
+                    self.entries = {k: v for k, v in self.entries.items() if v.get('output') is not None}
+                    self.dirty = True
+            except (json.JSONDecodeError, OSError) as e:
+                print(f"⚠️  Ignoring unreadable parse manifest {manifest_file}: {e}")
+    
+    @staticmethod
+    def key(response_file: Path) -> str:
+        return response_file.as_posix()
+    
+    def get(self, response_file: Path) -> Optional[Dict[str, Any]]:
+        return self.entries.get(self.key(response_file))
+    
+    def is_unchanged(self, response_file: Path, stat: os.stat_result) -> bool:
+        """True if size and mtime match the recorded entry and its output still exists."""
+        entry = self.get(response_file)
+        if not entry or entry['size'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns:
+            return False
+        return entry.get('output') is None or Path(entry['output']).exists()
+    
+    def record(self, response_file: Path, entry: Dict[str, Any]):
+        self.entries[self.key(response_file)] = entry
+        self.dirty = True
+    
+    def tier_counts(self) -> Dict[str, int]:
+        """Number of parsed responses per extraction tier (plus failures)."""
+        counts: Dict[str, int] = {}
+        for entry in self.entries.values():
+            tier = entry.get('extraction') or ('failed' if entry.get('output') is None else 'markers')
+            counts[tier] = counts.get(tier, 0) + 1
+        return counts
+    
+    def save(self):
+        """Atomically persist the manifest if anything changed."""
+        if not self.dirty:
+            return
+        ensure_directory(self.manifest_file.parent)
+        temp_file = self.manifest_file.with_suffix('.tmp')
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump({'extractor_version': EXTRACTOR_VERSION, 'responses': self.entries}, f, separators=(',', ':'))
+        os.replace(temp_file, self.manifest_file)
+        self.dirty = False
 
 
 class OutputParser:
@@ -16,16 +167,12 @@ class OutputParser:
     def __init__(self):
         self.model_output_path = Path('model_output')
         self.parsed_path = Path('new-version')
+        self.manifest_file = self.model_output_path / PARSE_MANIFEST_FILE
         ensure_directory(self.parsed_path)
     
     def extract_migrated_code(self, response_content: str) -> str:
         """Extract code between MIGRATION_START and MIGRATION_END markers."""
-        start_match = re.search(r'//\s*MIGRATION_START\s*\n', response_content, re.IGNORECASE)
-        end_match = re.search(r'\n//\s*MIGRATION_END', response_content, re.IGNORECASE)
-        
-        if start_match and end_match:
-            return response_content[start_match.end():end_match.start()].strip()
-        return ""
+        return extract_migrated_code(response_content)
     
     def extract_metadata(self, response_content: str) -> Dict[str, str]:
         """Extract metadata from response file header."""
@@ -38,30 +185,39 @@ class OutputParser:
                     metadata[f'original_{key}' if key == 'file' else key] = value.strip()
         return metadata
     
-    def parse_single_file(self, response_file: Path) -> Dict[str, Any]:
-        """Parse a single response file."""
+    def parse_single_file(self, response_file: Path, content: Optional[str] = None) -> Dict[str, Any]:
+        """Parse a single response file (or its already-read content)."""
         try:
             print(f"Processing {response_file.name}")
             
-            with open(response_file, 'r', encoding='utf-8') as f:
-                content = f.read()
+            if content is None:
+                with open(response_file, 'r', encoding='utf-8') as f:
+                    content = f.read()
             
             metadata = self.extract_metadata(content)
-            migrated_code = self.extract_migrated_code(content)
+            extraction = extract_code(content)
+            migrated_code = extraction['code']
             
             if not metadata.get('original_file'):
                 print(f"   ERROR: No original file found in metadata")
                 return {'success': False}
             
             if not migrated_code:
-                print(f"   ERROR: No migrated code found between markers")
+                print(f"   ERROR: No migrated code found (no markers or fenced php block)")
                 return {'success': False}
             
-            print(f"   SUCCESS: Found {len(migrated_code)} chars of migrated code")
+            if extraction['truncated']:
+                print(f"   ⚠️  TRUNCATED: start marker without end marker, salvaged {len(migrated_code)} chars")
+            elif extraction['tier'] != 'markers':
+                print(f"   SUCCESS: Found {len(migrated_code)} chars of migrated code ({extraction['tier']} tier)")
+            else:
+                print(f"   SUCCESS: Found {len(migrated_code)} chars of migrated code")
             return {
                 'success': True,
                 'metadata': metadata,
-                'migrated_code': migrated_code
+                'migrated_code': migrated_code,
+                'extraction': extraction['tier'],
+                'truncated': extraction['truncated']
             }
         
         except Exception as e:
@@ -76,7 +232,8 @@ class OutputParser:
         """Determine the output file path."""
         original_filename = metadata.get('original_file')
         if original_filename:
-            return model_folder / original_filename
+            # Flat layout: a relative corpus path keeps only its bare file name
+            return model_folder / f"{output_base_name(original_filename)}.php"
         
         # Fallback: derive from response filename
         php_filename = response_filename.replace('.txt', '.php') if response_filename.endswith('.txt') else f"{response_filename}.php"
@@ -96,91 +253,160 @@ class OutputParser:
             ensure_directory(model_folder)
             output_file = self._determine_output_file(metadata, response_filename, model_folder)
             
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(migrated_code)
+            written, output_hash = write_if_changed(output_file, migrated_code)
+            result['output_file'] = str(output_file)
+            result['output_hash'] = output_hash
             
-            print(f"   ✅ SAVED: {output_file}")
+            print(f"   ✅ {'SAVED' if written else 'UNCHANGED'}: {output_file}")
             return True
             
         except Exception as e:
             print(f"   ❌ SAVE ERROR: {e}")
             return False
     
-    def _process_response_files(self, response_files: List[Path], model_folder_name: str = None) -> Tuple[int, int]:
-        """Process a list of response files and return success/failed counts."""
-        success_count = 0
-        failed_count = 0
-        
-        for response_file in response_files:
-            result = self.parse_single_file(response_file)
+    def _process_response_file(self, response_file: Path, model_folder_name: str = None,
+                               previous: Optional[Dict[str, Any]] = None, incremental: bool = True) -> Dict[str, Any]:
+        """Parse and save one response; returns its status and manifest entry."""
+        stat = response_file.stat()
+        raw = response_file.read_bytes()
+        response_hash = content_hash(raw)
+        entry = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': response_hash,
+                 'output': None, 'output_hash': None, 'extraction': None, 'truncated': False}
+        
+        # Touched but identical response: refresh the stat fields only
+        if incremental and previous and previous['hash'] == response_hash and (
+                previous.get('output') is None or Path(previous['output']).exists()):
+            entry.update(output=previous.get('output'), output_hash=previous.get('output_hash'),
+                         extraction=previous.get('extraction'), truncated=previous.get('truncated', False))
+            return {'status': 'skipped', 'entry': entry}
+        
+        result = self.parse_single_file(response_file, raw.decode('utf-8', errors='replace'))
+        
+        if result['success']:
+            # Update metadata with model folder name if provided
+            if model_folder_name and 'metadata' in result:
+                result['metadata']['model_folder'] = model_folder_name
             
-            if result['success']:
-                # Update metadata with model folder name if provided
-                if model_folder_name and 'metadata' in result:
-                    result['metadata']['model_folder'] = model_folder_name
-                
-                if self.save_parsed_file(result, response_file.name, model_folder_name):
-                    success_count += 1
-                else:
-                    failed_count += 1
-            else:
-                failed_count += 1
+            if self.save_parsed_file(result, response_file.name, model_folder_name):
+                entry.update(output=result['output_file'], output_hash=result['output_hash'],
+                             extraction=result['extraction'], truncated=result['truncated'])
+                return {'status': 'success', 'entry': entry}
         
-        return success_count, failed_count
+        return {'status': 'failed', 'entry': entry}
+    
+    def _process_response_files(self, response_files: List[Path], model_folder_name: str = None,
+                                manifest: Optional[ParseManifest] = None,
+                                workers: int = DEFAULT_WORKERS) -> Tuple[int, int, int]:
+        """Process a list of response files and return success/failed/skipped counts."""
+        statuses = self._process_work_units([(f, model_folder_name) for f in response_files], manifest, workers)
+        return statuses.count('success'), statuses.count('failed'), statuses.count('skipped')
+    
+    def _process_work_units(self, units: List[Tuple[Path, Optional[str]]], manifest: Optional[ParseManifest],
+                            workers: int = DEFAULT_WORKERS) -> List[str]:
+        """Parse (response file, model folder) units, optionally across a process pool.
+        
+        With a manifest, responses whose size and mtime are unchanged are skipped
+        without being read. Returns one status per unit, in input order.
+        """
+        statuses: List[Optional[str]] = [None] * len(units)
+        pending = []
+        
+        for index, (response_file, model_folder_name) in enumerate(units):
+            if manifest and manifest.is_unchanged(response_file, response_file.stat()):
+                statuses[index] = 'skipped'
+                continue
+            previous = manifest.get(response_file) if manifest else None
+            pending.append((index, (self, response_file, model_folder_name, previous, manifest is not None)))
+        
+        outcomes = parallel_map(_parse_work_unit, [unit for _, unit in pending], workers)
+        
+        for (index, unit), outcome in zip(pending, outcomes):
+            statuses[index] = outcome['status']
+            if manifest:
+                manifest.record(unit[1], outcome['entry'])
+        
+        return statuses
     
-    def process_all_responses(self):
-        """Process all response files in model_output directory."""
+    def process_all_responses(self, incremental: bool = True, workers: int = DEFAULT_WORKERS):
+        """Process all response files in model_output directory.
+        
+        In incremental mode (default) a parse manifest is used to skip responses
+        that are unchanged since the last run; pass ``incremental=False`` to reparse everything.
+        ``workers > 1`` parses (model folder, file) units across a process pool.
+        """
         print("🔄 Processing all model responses...")
         
         if not self.model_output_path.exists():
             print(f"❌ Directory {self.model_output_path} not found")
             return
         
+        manifest = ParseManifest(self.manifest_file) if incremental else None
+        
         # Look for model subfolders
-        model_folders = [d for d in self.model_output_path.iterdir() if d.is_dir()]
+        model_folders = sorted(d for d in self.model_output_path.iterdir() if d.is_dir())
         
         if not model_folders:
             # Fallback: process files directly (old structure)
-            response_files = list(self.model_output_path.glob('*.txt'))
+            response_files = sorted(self.model_output_path.glob('*.txt'))
             if response_files:
                 print(f"📁 Found {len(response_files)} response files in old structure")
-                success, failed = self._process_response_files(response_files)
+                success, failed, skipped = self._process_response_files(response_files, manifest=manifest,
+                                                                        workers=workers)
+                if manifest:
+                    manifest.save()
                 print(f"\n🎉 Processing completed!")
                 print(f"✅ Successfully processed: {success} files")
                 print(f"❌ Failed to process: {failed} files")
+                print(f"⏭️  Unchanged (skipped): {skipped} files")
             else:
                 print("❌ No model folders or .txt files found in model_output/")
             return
         
         print(f"📁 Found {len(model_folders)} model folders:")
+        units = []
         for folder in model_folders:
-            print(f"   📂 {folder.name}/")
+            response_files = sorted(folder.rglob('*.txt'))
+            print(f"   📂 {folder.name}/ ({len(response_files)} response files)")
+            units.extend((response_file, folder.name) for response_file in response_files)
         
-        total_success = 0
-        total_failed = 0
+        if workers > 1:
+            print(f"⚙️  Parsing {len(units)} responses across {workers} worker processes")
         
-        # Process each model folder
-        for model_folder in model_folders:
-            print(f"\n🔄 Processing model: {model_folder.name}")
-            
-            response_files = list(model_folder.glob('*.txt'))
-            print(f"   📄 Found {len(response_files)} response files")
+        statuses = self._process_work_units(units, manifest, workers)
+        if manifest:
+            manifest.save()
+        
+        # Per-model summary, in folder order
+        total_success = total_failed = total_skipped = 0
+        
+        for folder in model_folders:
+            folder_statuses = [status for (_, name), status in zip(units, statuses) if name == folder.name]
+            success_count = folder_statuses.count('success')
+            failed_count = folder_statuses.count('failed')
+            skipped_count = folder_statuses.count('skipped')
             
-            if not response_files:
+            print(f"\n📊 Model: {folder.name}")
+            if not folder_statuses:
                 print("   ⚠️  No .txt files found in this model folder")
                 continue
             
-            success_count, failed_count = self._process_response_files(response_files, model_folder.name)
-            
             print(f"   ✅ Successfully processed: {success_count} files")
             print(f"   ❌ Failed to process: {failed_count} files")
+            if skipped_count:
+                print(f"   ⏭️  Unchanged (skipped): {skipped_count} files")
             
             total_success += success_count
             total_failed += failed_count
+            total_skipped += skipped_count
         
         print(f"\n🎉 Overall processing completed!")
         print(f"✅ Total successfully processed: {total_success} files")
         print(f"❌ Total failed to process: {total_failed} files")
+        print(f"⏭️  Total unchanged (skipped): {total_skipped} files")
+        if manifest:
+            salvaged = {tier: n for tier, n in manifest.tier_counts().items() if tier not in ('markers', 'failed')}
+            if salvaged:
+                print(f"🛟 Salvaged without exact markers: {salvaged}")
         
         # Show results summary
         if total_success > 0:
@@ -191,6 +417,34 @@ class OutputParser:
                     print(f"   📂 {model_folder.name}/ ({len(php_files)} files)")
 
 
+    def process_store_responses(self, store) -> Tuple[int, int]:
+        """Parse the latest single-file responses in a ResponseStore into new-version/.
+        
+        Metadata comes from typed store columns, so no header scraping or directory walks.
+        """
+        print(f"🔄 Processing single-file responses from {store.db_path}...")
+        success_count = failed_count = 0
+        
+        for record in store.iter_latest_with_content(chunked=False):
+            extraction = extract_code(record['content'])
+            migrated_code = extraction['code']
+            if not migrated_code:
+                print(f"   ERROR: No migrated code found ({record['model_folder']}/{record['file']})")
+                failed_count += 1
+                continue
+            if extraction['tier'] != 'markers':
+                print(f"   ⚠️  {record['model_folder']}/{record['file']}: salvaged via {extraction['tier']} tier")
+            
+            output_file = self.parsed_path / record['model_folder'] / f"{output_base_name(record['file'])}.php"
+            written, _ = write_if_changed(output_file, migrated_code)
+            print(f"   ✅ {'SAVED' if written else 'UNCHANGED'}: {output_file}")
+            success_count += 1
+        
+        print(f"✅ Successfully processed: {success_count} responses")
+        print(f"❌ Failed to process: {failed_count} responses")
+        return success_count, failed_count
+
+
 class FileReconstructor:
     """Reconstructs complete files from parsed chunk files."""
     
@@ -208,9 +462,9 @@ class FileReconstructor:
         
         chunked_files = []
         
-        for model_dir in self.chunked_output_path.iterdir():
+        for model_dir in sorted(self.chunked_output_path.iterdir()):
             if model_dir.is_dir():
-                for file_dir in model_dir.iterdir():
+                for file_dir in sorted(model_dir.iterdir()):
                     if file_dir.is_dir():
                         # Check if it has numbered chunk files
                         chunk_files = list(file_dir.glob('*.txt'))
@@ -263,80 +517,105 @@ class FileReconstructor:
         
         print(f"   Found chunks: {actual_numbers}")
         
-        # Parse each chunk
-        parsed_chunks = []
-        metadata = None
-        
-        for chunk_num, chunk_file in chunk_files:
-            print(f"   Processing chunk {chunk_num}...")
+        # Parse each chunk only as it is written out
+        def load_code(chunk_file: Path) -> Optional[str]:
             result = self.parser.parse_single_file(chunk_file)
-            
-            if result['success']:
-                parsed_chunks.append({
-                    'number': chunk_num,
-                    'code': result['migrated_code'],
-                    'metadata': result['metadata']
-                })
-                
-                # Use metadata from first successful chunk
-                if metadata is None:
-                    metadata = result['metadata']
-                    
-                print(f"      SUCCESS: {len(result['migrated_code'])} chars")
-            else:
-                print(f"      ERROR: Failed to parse chunk {chunk_num}")
-                parsed_chunks.append({
-                    'number': chunk_num,
-                    'code': None,
-                    'metadata': None
-                })
-        
-        if not any(chunk['code'] for chunk in parsed_chunks):
-            print("   ERROR: No chunks could be parsed successfully")
-            return False
+            return result['migrated_code'] if result['success'] else None
         
-        # Combine chunks
-        combined_code = []
+        return self.write_chunks_streaming(file_info, chunk_files, load_code)
+    
+    def write_chunks_streaming(self, file_info: Dict[str, Any], chunk_refs: List[Tuple[int, Any]],
+                               load_code: Callable[[Any], Optional[str]]) -> bool:
+        """Write parsed chunk bodies in order straight to the output file.
+        
+        Only one chunk is held in memory at a time. Output goes to a temp file that
+        is renamed over the target once complete, so readers never see a partial file.
+        Failed chunks get a placeholder comment.
+        """
+        model_folder = self.final_output_path / file_info['model']
+        output_file = model_folder / f"{file_info['filename']}.php"
+        temp_file = output_file.with_name(f".{output_file.name}.{os.getpid()}.tmp")
         successful_chunks = 0
+        total_chars = 0
         
-        for chunk in parsed_chunks:
-            if chunk['code']:
-                combined_code.append(chunk['code'])
-                successful_chunks += 1
-            else:
-                print(f"   WARNING: Chunk {chunk['number']} failed - adding placeholder comment")
-                combined_code.append(f"// ERROR: Chunk {chunk['number']} failed to parse")
-        
-        final_code = ''.join(combined_code)
-        print(f"   Combined {successful_chunks}/{len(parsed_chunks)} chunks successfully")
-        print(f"   Final code length: {len(final_code)} characters")
-        
-        # Save reconstructed file
-        return self.save_reconstructed_file(file_info, final_code, metadata)
-    
-    def save_reconstructed_file(self, file_info: Dict[str, Any], code: str, metadata: Optional[Dict[str, str]]) -> bool:
-        """Save the reconstructed complete file."""
         try:
-            # Create model folder in final output
-            model_folder = self.final_output_path / file_info['model']
-            ensure_directory(model_folder)
-            
-            # Save the reconstructed file
-            output_file = model_folder / f"{file_info['filename']}.php"
+            ensure_directory(output_file.parent)
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                for chunk_num, ref in chunk_refs:
+                    print(f"   Processing chunk {chunk_num}...")
+                    code = load_code(ref)
+                    
+                    if code:
+                        print(f"      SUCCESS: {len(code)} chars")
+                        successful_chunks += 1
+                    else:
+                        print(f"      ERROR: Failed to parse chunk {chunk_num}")
+                        print(f"   WARNING: Chunk {chunk_num} failed - adding placeholder comment")
+                        code = f"// ERROR: Chunk {chunk_num} failed to parse"
+                    
+                    f.write(code)
+                    total_chars += len(code)
             
-            with open(output_file, 'w', encoding='utf-8') as f:
-                # Write clean PHP code without metadata header
-                f.write(code)
-            
-            print(f"   SAVED: {output_file}")
-            return True
+            if successful_chunks == 0:
+                temp_file.unlink()
+                print("   ERROR: No chunks could be parsed successfully")
+                return False
             
+            os.replace(temp_file, output_file)
         except Exception as e:
             print(f"   ERROR saving file: {e}")
+            if temp_file.exists():
+                temp_file.unlink()
             return False
+        
+        print(f"   Combined {successful_chunks}/{len(chunk_refs)} chunks successfully")
+        print(f"   Final code length: {total_chars} characters")
+        print(f"   SAVED: {output_file}")
+        return True
     
-    def reconstruct_all_files(self):
-        """Reconstruct all chunked files found."""
+    def reconstruct_from_store(self, store) -> Tuple[int, int]:
+        """Reconstruct every chunked file from the latest chunk responses in a ResponseStore."""
+        print("🔧 Reconstructing chunked files from response store...")
+        
+        groups: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        for record in store.latest(chunked=True):
+            groups.setdefault((record['model_folder'], record['file']), []).append(record)
+        
+        successful = failed = 0
+        for (model_folder, filename), records in groups.items():
+            print(f"\nReconstructing {filename} from {len(records)} stored chunks (model: {model_folder})")
+            
+            expected = records[-1]['total_chunks'] or len(records)
+            missing = set(range(1, expected + 1)) - {r['chunk'] for r in records}
+            if missing:
+                print(f"   WARNING: Missing chunks: {sorted(missing)}")
+            
+            chunk_refs = [(record['chunk'], record['id']) for record in records]
+            if self.reconstruct_from_refs(model_folder, filename, chunk_refs, store):
+                successful += 1
+            else:
+                failed += 1
+        
+        print(f"\n🎉 Store reconstruction completed: {successful} succeeded, {failed} failed")
+        return successful, failed
+    
+    def reconstruct_from_refs(self, model_folder: str, filename: str, chunk_refs: List[Tuple[int, Any]],
+                              store=None) -> bool:
+        """Reconstruct a file from chunk references: store row ids or response file paths."""
+        file_info = {'model': model_folder, 'filename': output_base_name(filename), 'chunk_count': len(chunk_refs)}
+        
+        def load_code(ref: Any) -> Optional[str]:
+            if ref is None:
+                return None
+            if isinstance(ref, int):
+                return self.parser.extract_migrated_code(store.content(ref)) or None
+            result = self.parser.parse_single_file(Path(ref))
+            return result['migrated_code'] if result['success'] else None
+        
+        return self.write_chunks_streaming(file_info, chunk_refs, load_code)
+    
+    def reconstruct_all_files(self, workers: int = DEFAULT_WORKERS):
+        """Reconstruct all chunked files found (across a process pool if workers > 1)."""
         print("🔧 Starting file reconstruction...")
         
         chunked_files = self.find_chunked_files()
@@ -349,14 +628,9 @@ class FileReconstructor:
         for file_info in chunked_files:
             print(f"   {file_info['model']}/{file_info['filename']}.php ({file_info['chunk_count']} chunks)")
         
-        successful = 0
-        failed = 0
-        
-        for file_info in chunked_files:
-            if self.reconstruct_file(file_info):
-                successful += 1
-            else:
-                failed += 1
+        outcomes = parallel_map(_reconstruct_work_unit, [(self, file_info) for file_info in chunked_files], workers)
+        successful = sum(1 for ok in outcomes if ok)
+        failed = len(outcomes) - successful
         
         print(f"\n🎉 Reconstruction completed!")
         print(f"✅ Successfully reconstructed: {successful} files")
@@ -368,3 +642,29 @@ class FileReconstructor:
                 if model_folder.is_dir():
                     php_files = list(model_folder.glob('*.php'))
                     print(f"   {model_folder.name}/ ({len(php_files)} files)")
+
+
+class StreamingReconstructor:
+    """Reconstructs a chunked file the moment its last chunk lands.
+    
+    Register an instance as a MigrationManager chunk listener. It only remembers a
+    reference (store row id or response path) per chunk; when every chunk of a file
+    has been attempted it streams the parsed bodies into the output file.
+    """
+    
+    def __init__(self, reconstructor: FileReconstructor, store=None):
+        self.reconstructor = reconstructor
+        self.store = store
+        self.pending: Dict[Tuple[str, str], Dict[int, Any]] = {}
+    
+    def __call__(self, model_folder: str, filename: str, chunk_number: int, total_chunks: int, ref: Any):
+        landed = self.pending.setdefault((model_folder, filename), {})
+        landed[chunk_number] = ref
+        
+        if len(landed) < total_chunks:
+            return
+        
+        del self.pending[(model_folder, filename)]
+        print(f"\n🔧 Last chunk of {filename} landed - reconstructing now")
+        chunk_refs = sorted(landed.items())
+        self.reconstructor.reconstruct_from_refs(model_folder, filename, chunk_refs, self.store)
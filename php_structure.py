@@ -0,0 +1,153 @@
+"""
+PHP Structural Validator
+Single-pass scanner comparing brace/paren/bracket balance and PHP open/close tags
+of a migrated chunk against its source chunk, skipping strings, comments and heredocs.
+"""
+
+import re
+from typing import Dict, List, Tuple
+
+# Scanner modes
+HTML = 'html'
+CODE = 'code'
+LINE_COMMENT = 'line_comment'
+BLOCK_COMMENT = 'block_comment'
+SINGLE_QUOTED = 'single_quoted'
+DOUBLE_QUOTED = 'double_quoted'
+BACKTICK = 'backtick'
+HEREDOC = 'heredoc'
+
+# (mode, heredoc identifier)
+ScanState = Tuple[str, str]
+INITIAL_STATE: ScanState = (HTML, '')
+
+PAIRS = {'{': ('braces', 1), '}': ('braces', -1),
+         '(': ('parens', 1), ')': ('parens', -1),
+         '[': ('brackets', 1), ']': ('brackets', -1)}
+QUOTE_MODES = {"'": SINGLE_QUOTED, '"': DOUBLE_QUOTED, '`': BACKTICK}
+QUOTE_CHARS = {SINGLE_QUOTED: "'", DOUBLE_QUOTED: '"', BACKTICK: '`'}
+
+OPEN_TAG = re.compile(r'<\?(?:php\b|=)?', re.IGNORECASE)
+HEREDOC_START = re.compile(r'<<<[ \t]*(["\']?)([A-Za-z_]\w*)\1\r?\n')
+
+
+def _heredoc_end(code: str, pos: int, identifier: str) -> int:
+    """Index just past the closing identifier of a heredoc whose body starts at pos, or -1."""
+    closing = re.compile(r'^[ \t]*' + re.escape(identifier) + r'\b', re.MULTILINE)
+    match = closing.search(code, pos)
+    return match.end() if match else -1
+
+
+def scan_structure(code: str, state: ScanState = INITIAL_STATE) -> Tuple[Dict[str, int], ScanState]:
+    """Scan code once, returning its structural signature and the final scanner state.
+
+    The signature holds the net balance of braces, parens and brackets plus the
+    number of PHP open and close tags, counting only real code tokens.
+    """
+    signature = {'braces': 0, 'parens': 0, 'brackets': 0, 'open_tags': 0, 'close_tags': 0}
+    mode, heredoc_id = state
+    pos, length = 0, len(code)
+
+    while pos < length:
+        if mode == HTML:
+            match = OPEN_TAG.search(code, pos)
+            if not match:
+                break
+            signature['open_tags'] += 1
+            mode, pos = CODE, match.end()
+
+        elif mode == CODE:
+            char = code[pos]
+            pair = code[pos:pos + 2]
+            if pair == '?>':
+                signature['close_tags'] += 1
+                mode, pos = HTML, pos + 2
+            elif pair in ('//', '/*'):
+                mode, pos = (LINE_COMMENT if pair == '//' else BLOCK_COMMENT), pos + 2
+            elif char == '#' and pair != '#[':  # '#[' opens a PHP 8 attribute, not a comment
+                mode, pos = LINE_COMMENT, pos + 1
+            elif char in QUOTE_MODES:
+                mode, pos = QUOTE_MODES[char], pos + 1
+            elif char == '<' and code.startswith('<<<', pos):
+                match = HEREDOC_START.match(code, pos)
+                if match:
+                    mode, heredoc_id, pos = HEREDOC, match.group(2), match.end()
+                else:
+                    pos += 3
+            else:
+                if char in PAIRS:
+                    key, delta = PAIRS[char]
+                    signature[key] += delta
+                pos += 1
+
+        elif mode == LINE_COMMENT:
+            newline = code.find('\n', pos)
+            # Only this line can end the comment: never search past it
+            close_tag = code.find('?>', pos, newline if newline != -1 else length)
+            if close_tag != -1:
+                signature['close_tags'] += 1
+                mode, pos = HTML, close_tag + 2
+            elif newline != -1:
+                mode, pos = CODE, newline + 1
+            else:
+                pos = length
+
+        elif mode == BLOCK_COMMENT:
+            end = code.find('*/', pos)
+            if end == -1:
+                pos = length
+            else:
+                mode, pos = CODE, end + 2
+
+        elif mode == HEREDOC:
+            end = _heredoc_end(code, pos, heredoc_id)
+            if end == -1:
+                pos = length
+            else:
+                mode, heredoc_id, pos = CODE, '', end
+
+        else:  # Quoted strings
+            quote = QUOTE_CHARS[mode]
+            while pos < length:
+                char = code[pos]
+                if char == '\\':
+                    pos += 2
+                    continue
+                pos += 1
+                if char == quote:
+                    mode = CODE
+                    break
+
+    return signature, (mode, heredoc_id)
+
+
+def chunk_start_state(code: str, previous_end: ScanState) -> ScanState:
+    """State to scan a line-aligned chunk from, given where the previous chunk ended."""
+    mode, heredoc_id = previous_end
+    # Chunks are split on line boundaries, so a trailing line comment ended with that line
+    if mode == LINE_COMMENT:
+        return (CODE, '')
+    # Docblock continuation lines mean the chunk starts inside a block comment
+    if mode == CODE:
+        first_line = next((line.strip() for line in code.split('\n', 20) if line.strip()), '')
+        if first_line.startswith('*'):
+            return (BLOCK_COMMENT, '')
+    return (mode, heredoc_id)
+
+
+def validate_chunk(source_code: str, migrated_code: str, state: ScanState = INITIAL_STATE) -> List[str]:
+    """Compare a migrated chunk's structure with its source chunk; returns issues (empty if OK)."""
+    source_signature, source_end = scan_structure(source_code, state)
+    migrated_signature, migrated_end = scan_structure(migrated_code, state)
+
+    issues = []
+    for key, source_value in source_signature.items():
+        migrated_value = migrated_signature[key]
+        if migrated_value != source_value:
+            label = key.replace('_', ' ')
+            issues.append(f"{label}: source {source_value:+d}, migrated {migrated_value:+d}")
+
+    if migrated_end[0] != source_end[0]:
+        issues.append(f"ends in {migrated_end[0].replace('_', ' ')} (source ends in {source_end[0].replace('_', ' ')})")
+
+    return issues
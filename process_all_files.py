@@ -8,26 +8,53 @@ Generates individual reports and aggregated metadata.
 """
 
 import json
+import io
 import os
 import csv
 from pathlib import Path
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Any
-import concurrent.futures
-from rector_analyzer import RectorAnalyzer
+from typing import Dict, List, Any, Optional, Tuple
+from file_metrics import metrics_engine
+from rector_analyzer import RectorAnalyzer, RectorWorkerPool, DEFAULT_BATCH_SIZE
+from rector_cache import RectorResultCache, DEFAULT_CACHE_DIR
+from rector_daemon import RectorDaemonPool
+from report_store import (BlobStore, BLOBS_DIR, SUMMARY_COLUMNS_FILE, write_summary_columns, load_summary_columns,
+                          iter_metadata_files, read_dataset_info)
+from rule_subset import RuleSubsetPlanner, analyze_with_subsets, DEFAULT_AUDIT_EVERY
+from utils import discover_models
 
 class BatchRectorProcessor:
     """Process all files in the organized dataset with Rector."""
     
-    def __init__(self, dataset_dir: str = "organized_dataset", model_name: str = None, evaluation_mode: bool = False):
+    def __init__(self, dataset_dir: str = "organized_dataset", model_name: str = None, evaluation_mode: bool = False,
+                 use_cache: bool = True, cache_dir: str = DEFAULT_CACHE_DIR,
+                 rule_subsets: bool = False, audit_every: int = DEFAULT_AUDIT_EVERY,
+                 use_daemon: bool = False, compact_reports: bool = False,
+                 rector_bin: Optional[List[str]] = None, reports_dir: Optional[str] = None):
         if evaluation_mode and model_name:
             self.dataset_dir = Path(f"new-version/{model_name}")
-            self.reports_dir = Path(f"evaluation_reports/{model_name}")
-            self.analyzer = RectorAnalyzer(reports_dir=str(self.reports_dir))
+            self.reports_dir = Path(reports_dir or f"evaluation_reports/{model_name}")
         else:
             self.dataset_dir = Path(dataset_dir)
-            self.reports_dir = Path("rector_reports")
-            self.analyzer = RectorAnalyzer()
+            self.reports_dir = Path(reports_dir or "rector_reports")
+        # rector_bin swaps the Rector executable (e.g. fake_rector.py for offline benchmarks)
+        self.analyzer = RectorAnalyzer(reports_dir=str(self.reports_dir), rector_bin=rector_bin)
+        
+        # Unchanged files (same content, rector.php and Rector version) reuse stored analyses
+        self.cache = RectorResultCache(cache_dir) if use_cache else None
+        self.analyzer.cache = self.cache
+        
+        # Optionally run only the rules the baseline reports saw on each original file
+        self.subset_planner = RuleSubsetPlanner(audit_every=audit_every) if rule_subsets else None
+        
+        # Optionally analyze through warm Rector daemons instead of one CLI process per batch
+        self.use_daemon = use_daemon
+        
+        # Compact storage: diffs in a blob store, unindented JSON, columnar summary
+        self.compact_reports = compact_reports
+        if compact_reports:
+            self.analyzer.blob_store = BlobStore(self.analyzer.reports_dir / BLOBS_DIR)
         
         self.model_name = model_name
         self.evaluation_mode = evaluation_mode
@@ -93,14 +120,20 @@ class BatchRectorProcessor:
     
     def process_single_file(self, file_path: Path) -> Dict[str, Any]:
         """Process a single file and return results."""
+        print(f"📄 Processing {file_path.name}...")
         try:
-            print(f"📄 Processing {file_path.name}...")
-            
-            # Get file metrics
-            file_metrics = self.analyzer.get_file_metrics(str(file_path))
-            
             # Run Rector analysis
             analysis_result = self.analyzer.analyze_single_file(str(file_path))
+        except Exception as e:
+            print(f"❌ Exception processing {file_path.name}: {str(e)}")
+            return None
+        return self.build_result(file_path, analysis_result)
+    
+    def build_result(self, file_path: Path, analysis_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Save the individual report for an analyzed file and return its structured result."""
+        try:
+            # Get file metrics
+            file_metrics = self.analyzer.get_file_metrics(str(file_path))
             
             if "error" in analysis_result:
                 print(f"❌ Error analyzing {file_path.name}: {analysis_result['error']}")
@@ -122,6 +155,7 @@ class BatchRectorProcessor:
                 "filename": file_path.name,
                 "original_path": self.get_original_path(file_path.name),
                 "file_metrics": file_metrics,
+                "content_hash": metrics_engine.content_hash(file_path),
                 "rector_analysis": analysis_result["rector_analysis"],
                 "analysis_metadata": analysis_result["analysis_metadata"],
                 "report_path": report_path
@@ -134,19 +168,177 @@ class BatchRectorProcessor:
             print(f"❌ Exception processing {file_path.name}: {str(e)}")
             return None
     
-    def process_all_files(self, max_workers: int = 4) -> List[Dict[str, Any]]:
-        """Process all files in the dataset."""
+    def rule_set_mode(self) -> str:
+        """Which rules the analyses ran: the full config or per-file baseline subsets."""
+        return "baseline_subset" if self.subset_planner is not None else "full"
+    
+    def load_previous_results(self) -> Optional[List[Dict[str, Any]]]:
+        """Per-file results of the previous run from metadata.json (None if unusable).
+        
+        Results are only reusable if they were produced with the same Rector version,
+        rector.php and rule-set mode (the same inputs as the result cache key).
+        """
+        metadata_file = self.reports_dir / "metadata.json"
+        if not metadata_file.exists():
+            return None
+        try:
+            dataset_info = read_dataset_info(metadata_file)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Could not read previous metadata {metadata_file}: {e}")
+            return None
+        
+        previous_version = dataset_info.get("rector_version")
+        if previous_version != self.analyzer.rector_version:
+            print(f"⚠️  Previous run used Rector {previous_version}, now {self.analyzer.rector_version}: full rebuild")
+            return None
+        if dataset_info.get("config_hash") != self.analyzer.config_hash():
+            print("⚠️  Rector config changed since the previous run: full rebuild")
+            return None
+        if dataset_info.get("rule_set") != self.rule_set_mode():
+            print(f"⚠️  Previous run used the {dataset_info.get('rule_set')} rule set, now {self.rule_set_mode()}: full rebuild")
+            return None
+        
+        try:
+            results = list(iter_metadata_files(metadata_file))
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Could not read previous metadata {metadata_file}: {e}")
+            return None
+        if dataset_info.get("storage", {}).get("format") == "compact":
+            # Compact metadata keeps rules_triggered only in the columnar summary
+            columns = load_summary_columns(self.reports_dir)
+            if columns is None:
+                print(f"⚠️  {SUMMARY_COLUMNS_FILE} missing for compact metadata: full rebuild")
+                return None
+            rules_by_file = dict(zip((str(name) for name in columns["filename"]), columns.rules()))
+            columns.close()
+            for result in results:
+                result["rector_analysis"]["rules_triggered"] = rules_by_file.get(result["filename"], [])
+        return results
+    
+    def plan_incremental(self, php_files: List[Path], previous: List[Dict[str, Any]]
+                         ) -> Tuple[List[Path], List[Dict[str, Any]], List[str]]:
+        """Split files into (added/changed files, unchanged previous results, deleted filenames).
+        
+        Files are compared by content hash; previous entries without one count as changed.
+        """
+        previous_by_name = {result["filename"]: result for result in previous}
+        changed, unchanged = [], []
+        for file_path in php_files:
+            result = previous_by_name.get(file_path.name)
+            if result is not None and result.get("content_hash") == metrics_engine.content_hash(file_path):
+                unchanged.append(result)
+            else:
+                changed.append(file_path)
+        current_names = {file_path.name for file_path in php_files}
+        deleted = sorted(name for name in previous_by_name if name not in current_names)
+        return changed, unchanged, deleted
+    
+    def process_all_files(self, max_workers: int = 4, batch_size: int = DEFAULT_BATCH_SIZE,
+                          incremental: bool = False) -> List[Dict[str, Any]]:
+        """Process all files in the dataset.
+        
+        Files are analyzed ``batch_size`` at a time per Rector invocation;
+        ``batch_size=1`` runs Rector once per file. With ``max_workers > 1``
+        batches run on a pool of Rector workers with isolated configs and caches.
+        With ``incremental`` only files added or changed since the previous
+        metadata.json are analyzed; unchanged results are reused and deleted
+        files are dropped.
+        """
+        php_files, pending, unchanged = self.prepare_run(incremental)
+        if not unchanged and len(pending) == len(php_files):
+            return self._run_analysis(php_files, max_workers, batch_size)
+        fresh = self._run_analysis(pending, max_workers, batch_size) if pending else []
+        return self.merge_results(php_files, unchanged, fresh)
+    
+    def prepare_run(self, incremental: bool = False) -> Tuple[List[Path], List[Path], List[Dict[str, Any]]]:
+        """(all PHP files, files to analyze, reusable previous results) for a run.
+        
+        With ``incremental`` reports of deleted files are removed and only added or
+        changed files are returned for analysis.
+        """
         php_files = self.find_all_php_files()
         print(f"🚀 Found {len(php_files)} PHP files to process")
         print("=" * 60)
         
-        results = []
+        previous = self.load_previous_results() if incremental else None
+        if previous is None:
+            return php_files, php_files, []
         
-        # Process files (using single thread to avoid Rector conflicts)
+        changed, unchanged, deleted = self.plan_incremental(php_files, previous)
+        print(f"♻️  Incremental run: {len(changed)} added/changed, {len(unchanged)} unchanged, "
+              f"{len(deleted)} deleted")
+        for filename in deleted:
+            report_file = self.analyzer.individual_reports_dir / f"{Path(filename).stem}_rector.json"
+            report_file.unlink(missing_ok=True)
+        return php_files, changed, unchanged
+    
+    def merge_results(self, php_files: List[Path], unchanged: List[Dict[str, Any]],
+                      fresh: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Reused and fresh results in file order."""
+        merged = {result["filename"]: result for result in unchanged}
+        merged.update((result["filename"], result) for result in fresh)
+        return [merged[file_path.name] for file_path in php_files if file_path.name in merged]
+    
+    def build_results(self, php_files: List[Path], analyses: Dict[Path, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Per-file results (reports saved) for analyses produced elsewhere, e.g. a shared worker pool."""
+        results = []
         for file_path in php_files:
-            result = self.process_single_file(file_path)
+            result = self.build_result(file_path, analyses[file_path])
             if result:
                 results.append(result)
+        return results
+    
+    @contextmanager
+    def warm_daemons(self, max_workers: int):
+        """Serve this processor's Rector runs from warm daemons while the block runs, when enabled."""
+        if self.use_daemon:
+            daemon_pool = RectorDaemonPool(self.analyzer.project_dir, size=max_workers)
+            if daemon_pool.start():
+                print(f"🔥 {len(daemon_pool.daemons)} warm Rector daemons (Rector {daemon_pool.version})")
+                self.analyzer.daemon_pool = daemon_pool
+            else:
+                print("⚠️  Falling back to the Rector CLI")
+                daemon_pool.close()
+        
+        try:
+            yield
+        finally:
+            if self.analyzer.daemon_pool is not None:
+                print(f"🔥 Daemon stats: {self.analyzer.daemon_pool.stats}")
+                self.analyzer.daemon_pool.close()
+                self.analyzer.daemon_pool = None
+    
+    def analyze_files(self, php_files: List[Path], max_workers: int, batch_size: int) -> Dict[Path, Dict[str, Any]]:
+        """Rector analyses of files with the configured strategy: rule subsets, a worker pool or batches."""
+        if self.subset_planner is not None:
+            return analyze_with_subsets(self.analyzer, self.subset_planner, php_files, batch_size, max_workers)
+        if max_workers > 1 and len(php_files) > 1:
+            print(f"⚙️  Running Rector on {max_workers} workers")
+            with RectorWorkerPool(self.analyzer, max_workers) as pool:
+                analyses = pool.analyze(php_files, batch_size)
+                pool.print_timings()
+            return analyses
+        return self.analyzer.analyze_files(php_files, batch_size)
+    
+    def _run_analysis(self, php_files: List[Path], max_workers: int, batch_size: int) -> List[Dict[str, Any]]:
+        """Analyze files, through warm daemons when enabled."""
+        with self.warm_daemons(max_workers):
+            return self._process_files(php_files, max_workers, batch_size)
+    
+    def _process_files(self, php_files: List[Path], max_workers: int, batch_size: int) -> List[Dict[str, Any]]:
+        """Analyze files with the configured strategy and build per-file results."""
+        results = []
+        
+        if self.subset_planner is not None or (max_workers > 1 and len(php_files) > 1) or batch_size > 1:
+            results = self.build_results(php_files, self.analyze_files(php_files, max_workers, batch_size))
+        else:
+            for file_path in php_files:
+                result = self.process_single_file(file_path)
+                if result:
+                    results.append(result)
+        
+        if self.cache is not None:
+            self.cache.print_summary()
         
         print("\n🎉 Batch processing complete!")
         print(f"✅ Successfully processed: {len(results)} files")
@@ -166,6 +358,8 @@ class BatchRectorProcessor:
                 "analysis_method": "rector_php_version_upgrades_llm_evaluation",
                 "llm_model": self.model_name,
                 "rector_version": self.analyzer.rector_version,
+                "config_hash": self.analyzer.config_hash(),
+                "rule_set": self.rule_set_mode(),
                 "analysis_date": datetime.now().isoformat(),
                 "evaluation_type": "llm_generated_code_analysis",
                 "focus": "php_version_specific_changes_on_llm_migrated_code"
@@ -176,6 +370,8 @@ class BatchRectorProcessor:
                 "total_files": len(results),
                 "analysis_method": "rector_php_version_upgrades_only",
                 "rector_version": self.analyzer.rector_version,
+                "config_hash": self.analyzer.config_hash(),
+                "rule_set": self.rule_set_mode(),
                 "analysis_date": datetime.now().isoformat(),
                 "wordpress_version": "4.0",
                 "focus": "php_version_specific_changes_only"
@@ -190,27 +386,29 @@ class BatchRectorProcessor:
     
     def generate_enhanced_csv(self, results: List[Dict[str, Any]]) -> str:
         """Generate enhanced CSV from all results - VERSION SPECIFIC ONLY."""
-        csv_lines = [
-            "file_id,filename,original_path,lines_of_code,file_size_kb,"
-            "php_version_changes,has_version_changes"
-        ]
+        # csv quotes fields that need it (original paths may contain commas or quotes)
+        output = io.StringIO()
+        writer = csv.writer(output, lineterminator="\n")
+        writer.writerow(["file_id", "filename", "original_path", "lines_of_code", "file_size_kb",
+                         "php_version_changes", "has_version_changes"])
         
         for result in results:
             rector = result["rector_analysis"]
             metrics = result["file_metrics"]
             
-            csv_line = (
-                f"{result['file_id']},"
-                f"{result['filename']},"
-                f"{result['original_path']},"
-                f"{metrics['lines_of_code']},"
-                f"{metrics['file_size_kb']:.1f},"
-                f"{rector['php_version_changes']},"
-                f"{rector['has_diff']}"
-            )
-            csv_lines.append(csv_line)
-        
-        return "\n".join(csv_lines)
+            writer.writerow([
+                result['file_id'],
+                result['filename'],
+                result['original_path'],
+                metrics['lines_of_code'],
+                f"{metrics['file_size_kb']:.1f}",
+                rector['php_version_changes'],
+                rector['has_diff'],
+            ])
+        
+        # Rows end in "\n" (lineterminator above); like the previous "\n".join output,
+        # the last row has no newline after it
+        return output.getvalue().rstrip("\n")
     
     def save_results(self, results: List[Dict[str, Any]]) -> None:
         """Save all results to files."""
@@ -221,8 +419,23 @@ class BatchRectorProcessor:
         # Generate and save enhanced metadata
         enhanced_metadata = self.generate_enhanced_metadata(results)
         metadata_file = self.reports_dir / "metadata.json"
-        with open(metadata_file, 'w', encoding='utf-8') as f:
-            json.dump(enhanced_metadata, f, indent=2, ensure_ascii=False)
+        if self.compact_reports:
+            # Rules live in the columnar summary instead of being repeated per file
+            enhanced_metadata["dataset_info"]["storage"] = {"format": "compact", "summary": SUMMARY_COLUMNS_FILE}
+            enhanced_metadata["files"] = [
+                {**r, "rector_analysis": {k: v for k, v in r["rector_analysis"].items() if k != "rules_triggered"}}
+                for r in results
+            ]
+            with open(metadata_file, 'w', encoding='utf-8') as f:
+                json.dump(enhanced_metadata, f, ensure_ascii=False, separators=(',', ':'))
+            summary_file = self.reports_dir / SUMMARY_COLUMNS_FILE
+            write_summary_columns(results, summary_file)
+            print(f"🗜️  Columnar summary saved: {summary_file}")
+        else:
+            with open(metadata_file, 'w', encoding='utf-8') as f:
+                json.dump(enhanced_metadata, f, indent=2, ensure_ascii=False)
+            # A columnar summary from an earlier compact run would now be stale
+            (self.reports_dir / SUMMARY_COLUMNS_FILE).unlink(missing_ok=True)
         print(f"📊 Metadata saved: {metadata_file}")
         
         # Generate and save enhanced CSV
@@ -265,9 +478,31 @@ def main():
     """Main execution function."""
     import sys
     
-    # Check if we're running in evaluation mode
-    if len(sys.argv) > 1 and sys.argv[1] in ["gemini_1_5_flash", "mistralai_mistral_small_3_2_24b_instruct_free"]:
-        model_name = sys.argv[1]
+    # Cache flags: --no-cache skips the Rector result cache, --clear-cache empties it first
+    use_cache = "--no-cache" not in sys.argv
+    if "--clear-cache" in sys.argv:
+        removed = RectorResultCache().clear()
+        print(f"🗑️  Cleared {removed} cached Rector analyses")
+    # --rule-subsets: evaluate with per-file rule subsets from rector_reports/ baselines
+    rule_subsets = "--rule-subsets" in sys.argv
+    # --daemon: analyze through warm Rector daemons (rector_daemon.php)
+    use_daemon = "--daemon" in sys.argv
+    # --compact-reports: blob-stored diffs, compact JSON and a columnar summary.npz
+    compact_reports = "--compact-reports" in sys.argv
+    # Only added/changed files are re-analyzed against the previous metadata.json;
+    # --full-rebuild analyzes every file again
+    incremental = "--full-rebuild" not in sys.argv
+    flags = ("--no-cache", "--clear-cache", "--rule-subsets", "--daemon", "--compact-reports", "--full-rebuild")
+    args = [arg for arg in sys.argv[1:] if arg not in flags]
+    
+    # Check if we're running in evaluation mode (models are discovered from new-version/)
+    available_models = [model for model, output in discover_models().items() if output["files"]]
+    if args and args[0] not in available_models:
+        print(f"❌ Unknown model: {args[0]} (no PHP files in new-version/{args[0]}/)")
+        print(f"Available models: {', '.join(available_models) or 'none'}")
+        return
+    if args:
+        model_name = args[0]
         print("🔬 LLM Evaluation - Rector Analysis Tool")
         print("=" * 50)
         print(f"Evaluating LLM-generated code from model: {model_name}")
@@ -275,21 +510,24 @@ def main():
         print(f"Output directory: evaluation_reports/{model_name}/")
         print()
         
-        processor = BatchRectorProcessor(model_name=model_name, evaluation_mode=True)
+        processor = BatchRectorProcessor(model_name=model_name, evaluation_mode=True, use_cache=use_cache,
+                                         rule_subsets=rule_subsets, use_daemon=use_daemon,
+                                         compact_reports=compact_reports)
     else:
         print("🔬 Rector Batch Analysis Tool")
         print("=" * 50)
         print("Processing all files in organized dataset with Rector...")
         print()
         print("Usage for LLM evaluation:")
-        print("  python process_all_files.py <model_name>")
-        print("  Available models: gemini_1_5_flash, mistralai_mistral_small_3_2_24b_instruct_free")
+        print("  python process_all_files.py <model_name> [--no-cache] [--clear-cache] [--rule-subsets] [--daemon]"
+              " [--compact-reports] [--full-rebuild]")
+        print(f"  Available models: {', '.join(available_models) or 'none (no output in new-version/)'}")
         print()
         
-        processor = BatchRectorProcessor()
+        processor = BatchRectorProcessor(use_cache=use_cache, use_daemon=use_daemon, compact_reports=compact_reports)
     
     # Process all files
-    results = processor.process_all_files()
+    results = processor.process_all_files(incremental=incremental)
     
     if results:
         # Save results
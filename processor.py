@@ -3,48 +3,58 @@ Code Processing Engine
 Handles file migration, chunking, and API interactions.
 """
 
+import time
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Union, Mapping, Callable
 
 from config import DEFAULT_CHUNK_SIZE
+from corpus import Corpus, CorpusFile
 from llm_client import MultiProviderClient
+from parser import extract_migrated_code
+from php_structure import INITIAL_STATE, ScanState, chunk_start_state, scan_structure, validate_chunk
 from prompts import prompt_manager
-from utils import normalize_model_name, chunk_code, ensure_directory
+from response_store import ResponseStore, write_legacy_response
+from utils import normalize_model_name, iter_chunks, ensure_directory, output_base_name
+
+# Where a saved response lives: a ResponseStore row id, or a legacy response file path
+ResponseRef = Union[int, Path]
 
 
 class MigrationManager:
     """Manages the migration process for PHP files."""
     
-    def __init__(self, multi_client: MultiProviderClient, test_files: Dict[str, str]):
+    def __init__(self, multi_client: MultiProviderClient, test_files: Mapping[str, str],
+                 store: Optional[ResponseStore] = None, validate_structure: bool = False,
+                 structure_retries: int = 1):
         self.multi_client = multi_client
-        self.test_files = test_files
+        # Responses go to the structured store when given, else to legacy text-header files
+        self.store = store
+        # Called as listener(model_folder, filename, chunk, total_chunks, ref) after every chunk attempt;
+        # ref is the store row id / response path, or None if the chunk failed
+        self.chunk_listeners: List[Callable[[str, str, int, int, Any], None]] = []
+        self.last_response_ref: Optional[ResponseRef] = None
+        # Structural gate: compare bracket/tag balance of each migrated chunk with its source
+        self.validate_structure = validate_structure
+        self.structure_retries = structure_retries
+        self.flagged_chunks: List[Dict[str, Any]] = []
+        # Plain dicts of contents are still accepted and wrapped in an in-memory corpus
+        self.test_files = test_files if isinstance(test_files, Corpus) else Corpus.from_texts(test_files)
     
     @staticmethod
     def save_response(response_data: Dict[str, Any], file_path: Path, metadata: Dict[str, Any] = None):
         """Save API response with consistent metadata format."""
-        ensure_directory(file_path.parent)
-        
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write("=== RAW MODEL RESPONSE ===\n")
-            
-            # Write metadata
-            if metadata:
-                for key, value in metadata.items():
-                    f.write(f"{key.capitalize()}: {value}\n")
-            
-            f.write(f"Length: {len(response_data['content'])} characters\n")
-            f.write(f"Usage: {response_data.get('usage', {})}\n")
-            f.write(f"Timestamp: {datetime.now()}\n")
-            f.write("=" * 50 + "\n\n")
-            f.write(response_data['content'])
+        write_legacy_response(file_path, response_data['content'], metadata,
+                              response_data.get('usage', {}), datetime.now())
     
     def process_api_call(self, model_name: str, prompt: str, output_path: Path, metadata: Dict[str, Any]) -> Optional[str]:
         """Unified API call processing with error handling."""
         print(f"🔗 Making API call via multi-provider client...")
         
-        # Make API call
+        # Make API call (latency is recorded for run forecasting)
+        started = time.perf_counter()
         result = self.multi_client.make_api_call(model_name, prompt)
+        latency = time.perf_counter() - started
         print(f"📊 Provider: {result.get('provider', 'unknown').upper()}")
         
         if not result['success']:
@@ -61,112 +71,202 @@ class MigrationManager:
         
         # Save response
         metadata['provider'] = result.get('provider', 'unknown').upper()
-        self.save_response(result, output_path, metadata)
-        print(f"✅ Response saved to: {output_path}")
+        if self.store is not None:
+            response_id = self.store.append(raw_response, metadata, result.get('usage', {}), latency)
+            self.last_response_ref = response_id
+            print(f"✅ Response stored: {self.store.db_path}#{response_id}")
+        else:
+            metadata['latency'] = f"{latency:.3f}s"
+            self.save_response(result, output_path, metadata)
+            self.last_response_ref = output_path
+            print(f"✅ Response saved to: {output_path}")
         
         return raw_response
     
+    @staticmethod
+    def single_output_path(filename: str, model_name: str) -> Path:
+        """Response path for a file migrated in one request."""
+        return Path('model_output') / normalize_model_name(model_name) / f"{output_base_name(filename)}.txt"
+    
     def migrate_file_single(self, filename: str, original_code: str, model_name: str, strategy: str) -> Optional[str]:
         """Migrate single file using multi-provider client."""
         prompt = prompt_manager.create_prompt(original_code, strategy)
         print(f"📏 Prompt length: {len(prompt):,} characters")
         
-        # Create output path
-        model_short = normalize_model_name(model_name)
-        base_name = filename.replace('.php', '')
-        output_file = Path('model_output') / model_short / f"{base_name}.txt"
+        output_file = self.single_output_path(filename, model_name)
         
         return self.process_api_call(model_name, prompt, output_file, {
             'file': filename, 'model': model_name, 'strategy': strategy
         })
     
-    def migrate_file_chunked(self, filename: str, original_code: str, model_name: str, strategy: str, chunk_size: int) -> List[Optional[str]]:
-        """Migrate large file using organized chunking."""
-        chunks = chunk_code(original_code, chunk_size)
+    def check_chunk_structure(self, filename: str, chunk_number: int, source_code: str, start_state: ScanState,
+                              response: Optional[str], request: Callable[[], Optional[str]]) -> Optional[str]:
+        """Validate a chunk response and re-request it while it fails the structural gate.
+        
+        Returns the response to keep; chunks still failing after the retries are
+        recorded in ``flagged_chunks`` so they can be reviewed before reconstruction.
+        """
+        attempt = 0
+        while response is not None:
+            issues = validate_chunk(source_code, extract_migrated_code(response), start_state)
+            if not issues:
+                if attempt:
+                    print(f"✅ Chunk {chunk_number} passed structural check after {attempt} retr{'y' if attempt == 1 else 'ies'}")
+                return response
+            
+            print(f"⚠️  Chunk {chunk_number} failed structural check: {'; '.join(issues)}")
+            if attempt >= self.structure_retries:
+                break
+            
+            attempt += 1
+            print(f"🔁 Re-requesting chunk {chunk_number} (retry {attempt}/{self.structure_retries})")
+            previous_ref = self.last_response_ref
+            retried = request()
+            if retried is None:
+                self.last_response_ref = previous_ref
+                break
+            response = retried
+        
+        if response is not None:
+            self.flagged_chunks.append({'file': filename, 'chunk': chunk_number, 'issues': issues,
+                                        'ref': self.last_response_ref})
+        return response
+    
+    def migrate_file_chunked(self, filename: str, original_code: Union[str, CorpusFile], model_name: str, strategy: str, chunk_size: int) -> List[Optional[ResponseRef]]:
+        """Migrate large file using organized chunking.
+        
+        Chunks are streamed as offset-backed descriptors: each chunk's code is only
+        decoded while its prompt is rendered, and responses are not kept in memory.
+        Returns a reference per chunk instead of its text: the store row id when a
+        ResponseStore is used, else the chunked_model_output/ file; None for failed chunks.
+        """
+        # Descriptors are just line/byte offsets, so planning them all up front is cheap
+        chunks = list(iter_chunks(original_code, chunk_size))
         total_chunks = len(chunks)
         
         print(f"📦 Split into {total_chunks} chunks of ~{chunk_size} lines each")
         
         # Create organized folder structure
         model_short = normalize_model_name(model_name)
-        file_base = filename.replace('.php', '')
-        
-        file_dir = Path('chunked_model_output') / model_short / file_base
-        ensure_directory(file_dir)
-        print(f"📁 Saving chunks to: {file_dir}")
+        file_dir = Path('chunked_model_output') / model_short / output_base_name(filename)
+        if self.store is None:
+            ensure_directory(file_dir)
+            print(f"📁 Saving chunks to: {file_dir}")
         
         # Process chunks
         chunk_strategy = f"chunk_{strategy}" if not strategy.startswith('chunk_') else strategy
-        all_responses = []
+        saved_chunks = []
+        scan_state = INITIAL_STATE
         
-        for i, chunk_info in enumerate(chunks, 1):
-            print(f"\n[Chunk {i}/{total_chunks}] Processing lines {chunk_info['start_line']}-{chunk_info['end_line']}...")
+        for i, chunk in enumerate(chunks, 1):
+            print(f"\n[Chunk {i}/{total_chunks}] Processing lines {chunk.start_line}-{chunk.end_line}...")
             
             # Create prompt and make API call
+            chunk_code = chunk.code
             prompt = prompt_manager.create_prompt(
-                chunk_info['code'], chunk_strategy,
-                filename=filename, start_line=chunk_info['start_line'],
-                end_line=chunk_info['end_line'], total_lines=chunk_info['total_lines'],
+                chunk_code, chunk_strategy,
+                filename=filename, start_line=chunk.start_line,
+                end_line=chunk.end_line, total_lines=chunk.total_lines,
                 chunk_number=i, total_chunks=total_chunks
             )
             
             print(f"📏 Chunk prompt length: {len(prompt):,} characters")
-            response = self.process_api_call(model_name, prompt, file_dir / f"{i}.txt", {
-                'file': filename, 'model': model_name, 'strategy': chunk_strategy, 'chunk': i
-            })
+            chunk_file = file_dir / f"{i}.txt"
+            metadata = {
+                'file': filename, 'model': model_name, 'strategy': chunk_strategy,
+                'chunk': i, 'total_chunks': total_chunks
+            }
+            response = self.process_api_call(model_name, prompt, chunk_file, dict(metadata))
+            
+            if self.validate_structure:
+                # Chunks are line-aligned, so the scanner state carries over from the previous chunk
+                start_state = chunk_start_state(chunk_code, scan_state)
+                _, scan_state = scan_structure(chunk_code, start_state)
+                response = self.check_chunk_structure(
+                    filename, i, chunk_code, start_state, response,
+                    lambda: self.process_api_call(model_name, prompt, chunk_file, dict(metadata)))
             
-            all_responses.append(response)
+            saved_chunks.append(self.last_response_ref if response is not None else None)
             status = "✅" if response else "❌"
             print(f"{status} Chunk {i} {'processed successfully' if response else 'failed'}")
+            
+            ref = self.last_response_ref if response is not None else None
+            for listener in self.chunk_listeners:
+                listener(model_short, filename, i, total_chunks, ref)
         
         # Summary
-        successful_chunks = sum(1 for r in all_responses if r is not None)
+        successful_chunks = sum(1 for r in saved_chunks if r is not None)
         print(f"\n🎉 Chunked migration completed!")
         print(f"✅ Successful chunks: {successful_chunks}/{total_chunks}")
-        print(f"📁 All chunks saved in: {file_dir}")
+        flagged = [c['chunk'] for c in self.flagged_chunks if c['file'] == filename]
+        if flagged:
+            print(f"⚠️  Chunks failing structural check: {flagged}")
+        print(f"📁 All chunks saved in: {self.store.db_path if self.store is not None else file_dir}")
         
-        return all_responses
+        return saved_chunks
     
     def migrate_file(self, filename: str, model_name: str, strategy: str = "basic", 
-                    chunk_size: int = None, auto_chunk: bool = True) -> Union[str, List[Optional[str]], None]:
-        """Enhanced migration function with multi-provider support."""
+                    chunk_size: int = None, auto_chunk: bool = True) -> Union[str, List[Optional[ResponseRef]], None]:
+        """Enhanced migration function with multi-provider support.
+        
+        Returns the response text for a single-request file, the per-chunk response
+        references for a chunked file (see migrate_file_chunked), or None on failure.
+        """
         
         chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
         
-        if filename not in self.test_files:
+        rel_path = self.test_files.resolve(filename)
+        if rel_path is None:
             print(f"❌ File '{filename}' not found")
             return None
         
-        original_code = self.test_files[filename]
-        line_count = len(original_code.split('\n'))
+        source = self.test_files.files[rel_path]
+        line_count = source.line_count
         
-        print(f"🚀 Migrating {filename} using {model_name} with {strategy} strategy...")
-        print(f"📏 Input code length: {len(original_code):,} characters ({line_count:,} lines)")
+        print(f"🚀 Migrating {rel_path} using {model_name} with {strategy} strategy...")
+        print(f"📏 Input code length: {source.size:,} bytes ({line_count:,} lines)")
         
         # Decide processing method
         if auto_chunk and line_count > chunk_size:
             print(f"📦 Large file detected ({line_count} lines) - using organized chunking")
-            return self.migrate_file_chunked(filename, original_code, model_name, strategy, chunk_size)
+            return self.migrate_file_chunked(rel_path, source, model_name, strategy, chunk_size)
         else:
             print(f"📄 Processing as single file ({line_count} lines, chunk limit: {chunk_size})")
-            return self.migrate_file_single(filename, original_code, model_name, strategy)
+            return self.migrate_file_single(rel_path, source.read_text(), model_name, strategy)
     
     def batch_migrate(self, filenames: List[str], model: str = "gemini-1.5-pro", strategy: str = "basic", 
-                     chunk_size: int = None, auto_chunk: bool = True) -> List[Union[str, List[Optional[str]], None]]:
-        """Migrate multiple files with multi-provider chunking support."""
+                     chunk_size: int = None, auto_chunk: bool = True
+                     ) -> List[Union[ResponseRef, List[Optional[ResponseRef]], None]]:
+        """Migrate multiple files with multi-provider chunking support.
+        
+        Results hold where each response was saved rather than the response text,
+        so memory stays flat over long batches: per file a ResponseRef (store row id
+        with a ResponseStore, else the model_output/ file), a list of them per chunk
+        for chunked files, or None if the file failed.
+        """
         chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
         provider = self.multi_client.detect_provider(model)
         
         print(f"🔄 Batch migrating {len(filenames)} files using {provider.upper()}")
         if auto_chunk:
             print(f"📦 Auto-chunking enabled for files > {chunk_size} lines")
-        
+
+        # Outputs are flat per model, so files sharing a bare name would overwrite each other
+        output_names: Dict[str, List[str]] = {}
+        for filename in filenames:
+            output_names.setdefault(output_base_name(self.test_files.resolve(filename) or filename), []).append(filename)
+        for name, colliding in output_names.items():
+            if len(colliding) > 1:
+                print(f"⚠️  {colliding} share the output name {name}; only the last one's output is kept")
+
         results = []
         stats = {'files': 0, 'chunks': 0, 'success_files': 0, 'success_chunks': 0}
         
         for i, filename in enumerate(filenames, 1):
             print(f"\n[{i}/{len(filenames)}] Processing {filename}...")
             result = self.migrate_file(filename, model, strategy, chunk_size=chunk_size, auto_chunk=auto_chunk)
+            if isinstance(result, str):  # Single file: keep only where the response lives
+                result = self.last_response_ref
             results.append(result)
             
             # Update statistics
@@ -193,8 +193,10 @@ class PromptManager:
 # Global prompt manager instance
 prompt_manager = PromptManager()
 
-# Initialize and show available strategies
-print("✅ Prompting strategies configured")
-print(f"📋 Available strategies: {prompt_manager.get_available_strategies()}")
-print("🔧 All prompts configured to prevent placing MIGRATION markers inside PHP code")
-print("⚠️  Chunking strategies include warnings about NOT completing code structures")
+
+def print_prompt_configuration():
+    """Show the configured prompting strategies (called when a migration starts, not on import)."""
+    print("✅ Prompting strategies configured")
+    print(f"📋 Available strategies: {prompt_manager.get_available_strategies()}")
+    print("🔧 All prompts configured to prevent placing MIGRATION markers inside PHP code")
+    print("⚠️  Chunking strategies include warnings about NOT completing code structures")
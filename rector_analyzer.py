@@ -7,19 +7,92 @@ File-by-file analysis using Rector professional tool.
 Generates pure Rector data without research estimations.
 """
 
+import contextvars
+import copy
 import json
+import queue
+import shutil
 import subprocess
 import os
 import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+
+from file_metrics import metrics_engine
+from rector_cache import RectorResultCache, sha256_file
+from report_store import BlobStore, save_compact_report
+
+SINGLE_FILE_TIMEOUT = 60  # seconds per Rector invocation for one file
+DEFAULT_BATCH_SIZE = 25  # files per Rector invocation in batched mode
+BASE_CONFIG_FILE = "rector.php"
+
+# Worker config: the project's rector.php plus an isolated cache directory
+WORKER_CONFIG_TEMPLATE = """<?php
+
+declare(strict_types=1);
+
+use Rector\\Config\\RectorConfig;
+
+return static function (RectorConfig $rectorConfig): void {{
+    $baseConfig = require {base_config};
+    // Closures and RectorConfig::configure() builders are both invokable; anything
+    // else would silently run no rules and report every file as clean
+    if (!is_callable($baseConfig)) {{
+        throw new \\RuntimeException('Base Rector config ' . {base_config} . ' must return a closure or RectorConfig::configure() builder');
+    }}
+    $baseConfig($rectorConfig);
+
+    $rectorConfig->cacheDirectory({cache_dir});
+    // Parallelism comes from the Python worker pool, one Rector process per worker
+    $rectorConfig->disableParallel();
+}};
+"""
+
+
+def rector_command() -> str:
+    """Rector executable for the current OS."""
+    import platform
+    if platform.system() == "Windows":
+        return "vendor\\bin\\rector.bat"
+    return "vendor/bin/rector"
+
+
+# Rector version per project directory, resolved once per process
+_rector_versions: Dict[Tuple[str, ...], str] = {}
+
+
+def get_rector_version(project_dir: Path, command: Optional[List[str]] = None) -> str:
+    """Get Rector version for metadata (cached, so only the first call spawns Rector)."""
+    command = command or [rector_command()]
+    key = (os.path.abspath(project_dir), *command)
+    if key not in _rector_versions:
+        version = "unknown"
+        try:
+            result = subprocess.run([*command, "--version"], 
+                                  capture_output=True, text=True, cwd=project_dir)
+            if result.returncode == 0:
+                # Extract version from output like "Rector 2.1.0" (or "Rector 2.1.0-replay" from fake_rector.py)
+                version_match = re.search(r'Rector (\d+\.\d+\.\d+(?:-[\w.]+)?)', result.stdout)
+                version = version_match.group(1) if version_match else "unknown"
+        except Exception:
+            pass
+        _rector_versions[key] = version
+    return _rector_versions[key]
+
 
 class RectorAnalyzer:
     """Analyze individual PHP files using Rector professional tool."""
     
-    def __init__(self, project_dir: str = ".", reports_dir: str = "rector_reports"):
+    def __init__(self, project_dir: str = ".", reports_dir: str = "rector_reports",
+                 rector_bin: Optional[List[str]] = None):
         self.project_dir = Path(project_dir)
+        # Command that runs Rector; fake_rector.fake_rector_command() replays recorded output instead
+        self.rector_bin = list(rector_bin) if rector_bin else [rector_command()]
         self.reports_dir = self.project_dir / reports_dir
         self.individual_reports_dir = self.reports_dir / "individual_files"
         
@@ -27,27 +100,68 @@ class RectorAnalyzer:
         self.reports_dir.mkdir(parents=True, exist_ok=True)
         self.individual_reports_dir.mkdir(parents=True, exist_ok=True)
         
+        # Optional --config override (worker pools use per-worker configs)
+        self.config_path: Optional[Path] = None
+        # Optional result cache keyed by (content, rector.php, Rector version)
+        self.cache: Optional[RectorResultCache] = None
+        self.base_config_path = self.project_dir / BASE_CONFIG_FILE
+        self._config_hash: Optional[str] = None
+        # Optional pool of warm Rector daemons (see rector_daemon.py) used instead of the CLI
+        self.daemon_pool = None
+        # Set to write compact reports with diffs in this blob store (see report_store.py)
+        self.blob_store: Optional[BlobStore] = None
+        
         # Get Rector version
         self.rector_version = self._get_rector_version()
     
     def _get_rector_version(self) -> str:
         """Get Rector version for metadata."""
-        try:
-            import platform
-            if platform.system() == "Windows":
-                rector_cmd = "vendor\\bin\\rector.bat"
+        return get_rector_version(self.project_dir, self.rector_bin)
+    
+    def config_hash(self) -> str:
+        """Hash of the Rector config the results depend on."""
+        if self._config_hash is None:
+            self._config_hash = sha256_file(self.base_config_path) if self.base_config_path.exists() else "no-config"
+        return self._config_hash
+    
+    def _cache_enabled(self) -> bool:
+        # Without a known Rector version a cached result cannot be trusted
+        return self.cache is not None and self.rector_version != "unknown"
+    
+    def _rebase_result(self, result: Dict[str, Any], file_path: Path) -> Dict[str, Any]:
+        """Point a cached result (possibly for an identical file elsewhere) at file_path."""
+        result["file_path"] = str(file_path)
+        raw = result.get("raw_rector_output")
+        if raw:
+            try:
+                rector_file = Path(os.path.relpath(file_path.absolute(), self.project_dir.absolute())).as_posix()
+            except ValueError:  # Different drive on Windows
+                rector_file = file_path.absolute().as_posix()
+            for entry in raw.get("file_diffs", []) + raw.get("errors", []):
+                if "file" in entry:
+                    entry["file"] = rector_file
+            if "changed_files" in raw:
+                raw["changed_files"] = [rector_file for _ in raw["changed_files"]]
+        return result
+    
+    def lookup_cached(self, file_paths: List[Path]) -> Tuple[Dict[Path, Dict[str, Any]], List[Path]]:
+        """Split files into cached results and files that still need Rector."""
+        if not self._cache_enabled():
+            return {}, list(file_paths)
+        
+        hits, misses = {}, []
+        for path in file_paths:
+            cached = self.cache.get(metrics_engine.content_hash(path), self.config_hash(), self.rector_version) if path.exists() else None
+            if cached is None:
+                misses.append(path)
             else:
-                rector_cmd = "vendor/bin/rector"
-            
-            result = subprocess.run([rector_cmd, "--version"], 
-                                  capture_output=True, text=True, cwd=self.project_dir)
-            if result.returncode == 0:
-                # Extract version from output like "Rector 2.1.0"
-                version_match = re.search(r'Rector (\d+\.\d+\.\d+)', result.stdout)
-                return version_match.group(1) if version_match else "unknown"
-        except Exception:
-            pass
-        return "unknown"
+                hits[path] = self._rebase_result(cached, path)
+        return hits, misses
+    
+    def store_cached(self, file_path: Path, result: Dict[str, Any]):
+        """Remember a fresh analysis result."""
+        if self._cache_enabled() and file_path.exists():
+            self.cache.put(metrics_engine.content_hash(file_path), self.config_hash(), self.rector_version, result)
     
     def analyze_single_file(self, file_path: str) -> Dict[str, Any]:
         """Analyze a single PHP file with Rector."""
@@ -56,24 +170,22 @@ class RectorAnalyzer:
         if not file_path.exists():
             return {"error": f"File not found: {file_path}"}
         
-        print(f"🔍 Analyzing {file_path.name}...")
+        hits, _ = self.lookup_cached([file_path])
+        if hits:
+            print(f"🗄️  Cached analysis for {file_path.name}")
+            return hits[file_path]
         
-        # Determine the correct Rector command based on OS
-        import platform
-        if platform.system() == "Windows":
-            rector_cmd = "vendor\\bin\\rector.bat"
-        else:
-            rector_cmd = "vendor/bin/rector"
+        result = self._analyze_uncached(file_path)
+        self.store_cached(file_path, result)
+        return result
+    
+    def _analyze_uncached(self, file_path: Path) -> Dict[str, Any]:
+        """Run Rector on one file, bypassing the result cache."""
+        print(f"🔍 Analyzing {file_path.name}...")
         
         try:
             # Run Rector with direct file path (no environment variable needed)
-            result = subprocess.run([
-                rector_cmd, 
-                "process", 
-                str(file_path.absolute()),  # Pass file path directly
-                "--dry-run",
-                "--output-format", "json"
-            ], capture_output=True, text=True, cwd=self.project_dir, timeout=60)
+            result = self._run_rector([file_path], timeout=SINGLE_FILE_TIMEOUT)
             
             # Rector can return different codes: 0 (no changes), 1 (changes found), 2 (with output)
             if result.returncode in [0, 1, 2] and result.stdout.strip():
@@ -94,6 +206,122 @@ class RectorAnalyzer:
         except Exception as e:
             return {"error": str(e)}
     
+    def _run_rector(self, file_paths: List[Path], timeout: float = SINGLE_FILE_TIMEOUT) -> subprocess.CompletedProcess:
+        """Run one ``rector process --dry-run`` over the given files and return the completed process."""
+        if self.daemon_pool is not None and self.config_path is None:
+            try:
+                return self.daemon_pool.run(file_paths, timeout)
+            except Exception as e:
+                print(f"⚠️  Rector daemon failed ({e}), falling back to the CLI")
+        
+        command = [*self.rector_bin, "process"]
+        command.extend(str(Path(path).absolute()) for path in file_paths)  # Pass file paths directly
+        command.extend(["--dry-run", "--output-format", "json"])
+        if self.config_path is not None:
+            command.extend(["--config", str(self.config_path)])
+        return subprocess.run(command, capture_output=True, text=True, cwd=self.project_dir, timeout=timeout)
+    
+    def _match_key(self, file_path: Any) -> str:
+        """Normalized absolute path used to match Rector's file entries to inputs."""
+        path = Path(str(file_path).replace('\\', '/'))
+        if not path.is_absolute():
+            path = self.project_dir / path
+        return os.path.normcase(os.path.abspath(path))
+    
+    def split_rector_output(self, rector_output: Dict[str, Any], file_paths: List[Path]) -> Dict[Path, Optional[Dict[str, Any]]]:
+        """Split one multi-file Rector JSON output into per-file outputs.
+        
+        Each changed file gets the output a single-file run would have produced
+        (``totals`` plus its own ``file_diffs``/``changed_files``/``errors``);
+        unchanged files map to None.
+        """
+        by_key = {self._match_key(path): path for path in file_paths}
+        diffs: Dict[Path, List[Dict[str, Any]]] = {}
+        errors: Dict[Path, List[Dict[str, Any]]] = {}
+        
+        for bucket, entries in ((diffs, rector_output.get("file_diffs", [])),
+                                (errors, rector_output.get("errors", []))):
+            for entry in entries:
+                path = by_key.get(self._match_key(entry.get("file", "")))
+                if path is None:
+                    # Rector reports paths relative to its working directory; fall back to a suffix match
+                    entry_file = str(entry.get("file", "")).replace('\\', '/')
+                    path = next((p for p in file_paths if entry_file and Path(p).as_posix().endswith(entry_file)), None)
+                if path is not None:
+                    bucket.setdefault(path, []).append(entry)
+        
+        outputs: Dict[Path, Optional[Dict[str, Any]]] = {}
+        for path in file_paths:
+            if path not in diffs and path not in errors:
+                outputs[path] = None
+                continue
+            output = {"totals": {"changed_files": len(diffs.get(path, [])), "errors": len(errors.get(path, []))}}
+            if path in diffs:
+                output["file_diffs"] = diffs[path]
+                output["changed_files"] = [entry["file"] for entry in diffs[path]]
+            if path in errors:
+                output["errors"] = errors[path]
+            outputs[path] = output
+        return outputs
+    
+    def _analyze_batch(self, file_paths: List[Path]) -> Optional[Dict[Path, Dict[str, Any]]]:
+        """Analyze files with one Rector invocation; None if the batch run itself failed."""
+        try:
+            result = self._run_rector(file_paths, timeout=SINGLE_FILE_TIMEOUT * len(file_paths))
+        except subprocess.TimeoutExpired:
+            return None
+        
+        if result.returncode not in [0, 1, 2]:
+            return None
+        if not result.stdout.strip():
+            return {path: self._create_empty_result(path) for path in file_paths} if result.returncode == 0 else None
+        try:
+            rector_output = json.loads(result.stdout)
+        except json.JSONDecodeError:
+            return None
+        
+        results = {}
+        for path, output in self.split_rector_output(rector_output, file_paths).items():
+            results[path] = self._process_rector_output(output, path) if output else self._create_empty_result(path)
+        return results
+    
+    def analyze_files(self, file_paths: Iterable[str], batch_size: int = DEFAULT_BATCH_SIZE,
+                      check_cache: bool = True) -> Dict[Path, Dict[str, Any]]:
+        """Analyze many files with one Rector invocation per batch.
+        
+        Saves the PHP/Rector bootstrap and cache warm-up per file. Results match
+        ``analyze_single_file``; a batch whose run fails is retried file by file.
+        Fresh results are always written to the result cache; ``check_cache=False``
+        skips the lookup for callers that already did it.
+        """
+        paths = [Path(p) for p in file_paths]
+        results: Dict[Path, Dict[str, Any]] = {}
+        
+        for path in paths:
+            if not path.exists():
+                results[path] = {"error": f"File not found: {path}"}
+        existing = [path for path in paths if path not in results]
+        cached = {}
+        if check_cache:
+            cached, existing = self.lookup_cached(existing)
+        results.update(cached)
+        if cached:
+            print(f"🗄️  {len(cached)} cached analyses, {len(existing)} files to analyze")
+        
+        for start in range(0, len(existing), max(batch_size, 1)):
+            batch = existing[start:start + max(batch_size, 1)]
+            print(f"🔍 Analyzing batch of {len(batch)} files ({start + 1}-{start + len(batch)} of {len(existing)})...")
+            batch_results = self._analyze_batch(batch) if len(batch) > 1 else None
+            if batch_results is None:
+                if len(batch) > 1:
+                    print(f"⚠️  Batch run failed, analyzing {len(batch)} files individually")
+                batch_results = {path: self._analyze_uncached(path) for path in batch}
+            for path, result in batch_results.items():
+                self.store_cached(path, result)
+            results.update(batch_results)
+        
+        return {path: results[path] for path in paths}
+    
     def _create_empty_result(self, file_path: Path) -> Dict[str, Any]:
         """Create result structure for files with no Rector changes."""
         return {
@@ -169,19 +397,19 @@ class RectorAnalyzer:
         base_name = Path(filename).stem
         report_file = self.individual_reports_dir / f"{base_name}_rector.json"
         
+        if self.blob_store is not None:
+            save_compact_report(analysis_result, report_file, self.blob_store)
+            return str(report_file)
+        
         with open(report_file, 'w', encoding='utf-8') as f:
             json.dump(analysis_result, f, indent=2, ensure_ascii=False)
         
         return str(report_file)
     
     def count_total_lines(self, file_path):
-        """Count all lines in the file - simple line counting"""
+        """Count all lines in the file (as readlines() would)"""
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = f.readlines()
-            
-            # Simply count all lines
-            return len(lines)
+            return metrics_engine.measure_file(file_path)["lines"]
         except Exception as e:
             print(f"Error counting lines in {file_path}: {e}")
             return 0
@@ -194,16 +422,113 @@ class RectorAnalyzer:
             return {"lines_of_code": 0, "file_size_kb": 0}
         
         try:
-            # Use simple line counting method
-            total_lines = self.count_total_lines(file_path)
+            # One mapped read gives line count, size and content hash (shared with the result cache)
+            metrics = metrics_engine.measure_file(file_path)
             
             return {
-                "lines_of_code": total_lines,
-                "file_size_kb": round(file_path.stat().st_size / 1024, 1)
+                "lines_of_code": metrics["lines"],
+                "file_size_kb": round(metrics["bytes"] / 1024, 1)
             }
         except Exception:
             return {"lines_of_code": 0, "file_size_kb": 0}
 
+def php_string(value: Any) -> str:
+    """Single-quoted PHP string literal."""
+    return "'" + str(value).replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+
+def write_worker_config(base_config: Path, worker_dir: Path) -> Path:
+    """Write a Rector config that loads base_config with its own cache directory."""
+    cache_dir = worker_dir / "cache"
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    config_file = worker_dir / "rector.php"
+    config_file.write_text(WORKER_CONFIG_TEMPLATE.format(
+        base_config=php_string(Path(base_config).absolute()),
+        cache_dir=php_string(cache_dir.absolute())), encoding='utf-8')
+    return config_file
+
+
+class RectorWorkerPool:
+    """Pool of Rector workers, each with its own config and cache directory.
+    
+    Batches of files are analyzed concurrently (Rector runs out of process, so
+    threads are enough); per-worker timing is collected in ``timings``.
+    """
+    
+    def __init__(self, analyzer: RectorAnalyzer, workers: int = 4, base_config: Optional[Path] = None):
+        self.analyzer = analyzer
+        self.workers = max(workers, 1)
+        self.base_config = Path(base_config) if base_config else analyzer.project_dir / BASE_CONFIG_FILE
+        self.work_dir = Path(tempfile.mkdtemp(prefix="rector_workers_"))
+        self.timings = [{"worker": i, "batches": 0, "files": 0, "seconds": 0.0} for i in range(self.workers)]
+        self._idle: "queue.Queue[int]" = queue.Queue()
+        self._analyzers = []
+        self._lock = threading.Lock()
+        
+        for worker_id in range(self.workers):
+            worker_analyzer = copy.copy(analyzer)
+            # Daemons already run with isolated configs; CLI workers need their own
+            if analyzer.daemon_pool is None:
+                worker_analyzer.config_path = write_worker_config(self.base_config, self.work_dir / f"worker_{worker_id}")
+            self._analyzers.append(worker_analyzer)
+            self._idle.put(worker_id)
+    
+    def __enter__(self) -> "RectorWorkerPool":
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def close(self):
+        """Remove worker configs and caches."""
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+    
+    def _run_batch(self, batch: List[Path], batch_size: int) -> Dict[Path, Dict[str, Any]]:
+        worker_id = self._idle.get()
+        try:
+            started = time.perf_counter()
+            results = self._analyzers[worker_id].analyze_files(batch, batch_size, check_cache=False)
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                timing = self.timings[worker_id]
+                timing["batches"] += 1
+                timing["files"] += len(batch)
+                timing["seconds"] += elapsed
+            return results
+        finally:
+            self._idle.put(worker_id)
+    
+    def analyze(self, file_paths: Iterable[str], batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[Path, Dict[str, Any]]:
+        """Analyze files across the pool; results keep input order."""
+        paths = [Path(p) for p in file_paths]
+        # Cached results never reach a worker
+        results, pending = self.analyzer.lookup_cached([path for path in paths if path.exists()])
+        missing = [path for path in paths if not path.exists()]
+        pending.extend(missing)
+        if results:
+            print(f"🗄️  {len(results)} cached analyses, {len(pending)} files to analyze")
+        
+        # Keep every worker busy even when there are fewer files than workers x batch_size
+        batch_size = max(1, min(batch_size, -(-len(pending) // self.workers)))
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            # Batches run in the caller's context (e.g. its per-model output buffer in evaluate_llm_models)
+            futures = [executor.submit(contextvars.copy_context().run, self._run_batch, batch, batch_size)
+                       for batch in batches]
+            for future in futures:
+                results.update(future.result())
+        return {path: results[path] for path in paths}
+    
+    def print_timings(self):
+        """Print per-worker batch counts and busy time."""
+        print("\n⏱️  Rector worker timing:")
+        for timing in self.timings:
+            rate = timing["files"] / timing["seconds"] if timing["seconds"] else 0.0
+            print(f"   worker {timing['worker']}: {timing['batches']} batches, {timing['files']} files, "
+                  f"{timing['seconds']:.1f}s ({rate:.2f} files/s)")
+
+
 def main():
     """Test single file analysis."""
     analyzer = RectorAnalyzer()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Rector Result Cache
+===================
+
+File-per-key cache of Rector analyses keyed by (file content hash,
+Rector config hash, Rector version), so unchanged files are not re-analyzed.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+DEFAULT_CACHE_DIR = ".rector_cache"
+
+
+def sha256_file(file_path: Path) -> str:
+    """SHA-256 of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class RectorResultCache:
+    """Content-addressed store of Rector analysis results.
+
+    Entries live in ``<cache_dir>/<key[:2]>/<key>.json`` and are written
+    atomically, so concurrent workers can share one cache.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.stats = {"hits": 0, "misses": 0, "writes": 0}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(content_hash: str, config_hash: str, rector_version: str) -> str:
+        return hashlib.sha256(f"{content_hash}:{config_hash}:{rector_version}".encode()).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def get(self, content_hash: str, config_hash: str, rector_version: str) -> Optional[Dict[str, Any]]:
+        """Cached analysis result, or None on a miss."""
+        entry_file = self._entry_path(self.make_key(content_hash, config_hash, rector_version))
+        try:
+            with open(entry_file, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self._count("misses")
+            return None
+        self._count("hits")
+        return entry["result"]
+
+    def put(self, content_hash: str, config_hash: str, rector_version: str, result: Dict[str, Any]):
+        """Store an analysis result (error results are never cached)."""
+        if "error" in result:
+            return
+        key = self.make_key(content_hash, config_hash, rector_version)
+        entry_file = self._entry_path(key)
+        entry_file.parent.mkdir(parents=True, exist_ok=True)
+
+        entry = {"content_hash": content_hash, "config_hash": config_hash,
+                 "rector_version": rector_version, "result": result}
+        temp_file = entry_file.with_name(f".{entry_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temp_file, entry_file)
+        self._count("writes")
+
+    def _iter_entries(self):
+        for entry_file in self.cache_dir.glob("*/*.json"):
+            try:
+                with open(entry_file, 'r', encoding='utf-8') as f:
+                    yield entry_file, json.load(f)
+            except (OSError, json.JSONDecodeError):
+                yield entry_file, None
+
+    def invalidate(self, content_hash: Optional[str] = None, config_hash: Optional[str] = None,
+                   rector_version: Optional[str] = None) -> int:
+        """Remove entries matching every given field (all entries if none given); returns the count."""
+        if content_hash is None and config_hash is None and rector_version is None:
+            return self.clear()
+
+        criteria = {"content_hash": content_hash, "config_hash": config_hash, "rector_version": rector_version}
+        removed = 0
+        for entry_file, entry in self._iter_entries():
+            if entry is None or all(value is None or entry.get(field) == value for field, value in criteria.items()):
+                entry_file.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def prune(self, config_hash: str, rector_version: str) -> int:
+        """Remove entries made with a different config or Rector version; returns the count."""
+        removed = 0
+        for entry_file, entry in self._iter_entries():
+            if entry is None or entry.get("config_hash") != config_hash or entry.get("rector_version") != rector_version:
+                entry_file.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def clear(self) -> int:
+        """Remove every entry; returns the count."""
+        removed = 0
+        for entry_file in self.cache_dir.glob("*/*.json"):
+            entry_file.unlink(missing_ok=True)
+            removed += 1
+        return removed
+
+    def summary(self) -> Dict[str, Any]:
+        """Hit/miss/write counters for this run plus on-disk entry count and size."""
+        entries = list(self.cache_dir.glob("*/*.json"))
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            "entries": len(entries),
+            "size_kb": round(sum(e.stat().st_size for e in entries) / 1024, 1),
+        }
+
+    def print_summary(self):
+        info = self.summary()
+        print(f"🗄️  Rector cache: {info['hits']} hits, {info['misses']} misses "
+              f"({info['hit_rate']:.0%} hit rate), {info['writes']} writes, "
+              f"{info['entries']} entries ({info['size_kb']} KB) in {self.cache_dir}")
@@ -0,0 +1,123 @@
+<?php
+
+/**
+ * Rector Analysis Daemon
+ *
+ * Boots PHP, composer autoload and Rector's container once, then serves
+ * JSON-lines requests on stdin and answers on stdout (one line per response):
+ *
+ *   {"id": 1, "cmd": "ping"}
+ *   {"id": 2, "cmd": "process", "paths": ["/abs/file.php", ...]}
+ *   {"id": 3, "cmd": "process_code", "code": "<?php ...", "filename": "file.php"}
+ *   {"id": 4, "cmd": "shutdown"}
+ *
+ * "stdout" in a process response is exactly what
+ * `rector process <paths> --dry-run --output-format json` would print.
+ *
+ * Usage: php -d display_errors=stderr rector_daemon.php [--config rector.php]
+ */
+
+declare(strict_types=1);
+
+use Rector\Application\VersionResolver;
+use Rector\Bootstrap\RectorConfigsResolver;
+use Rector\Console\ConsoleApplication;
+use Rector\DependencyInjection\RectorContainerFactory;
+use Symfony\Component\Console\Input\ArgvInput;
+use Symfony\Component\Console\Output\BufferedOutput;
+
+require __DIR__ . '/vendor/autoload.php';
+
+function respond(array $payload): void
+{
+    $flags = JSON_UNESCAPED_SLASHES | JSON_UNESCAPED_UNICODE | JSON_INVALID_UTF8_SUBSTITUTE;
+    fwrite(STDOUT, json_encode($payload, $flags) . "\n");
+    fflush(STDOUT);
+}
+
+function runProcess(ConsoleApplication $application, array $paths, ?string $configPath): array
+{
+    $args = ['rector', 'process', ...$paths, '--dry-run', '--output-format', 'json'];
+    if ($configPath !== null) {
+        $args[] = '--config';
+        $args[] = $configPath;
+    }
+
+    // Output formatters may echo directly, so capture both channels
+    $output = new BufferedOutput();
+    ob_start();
+    try {
+        $exitCode = $application->run(new ArgvInput($args), $output);
+    } catch (\Throwable $e) {
+        ob_end_clean();
+        return ['ok' => false, 'error' => get_class($e) . ': ' . $e->getMessage()];
+    }
+    $echoed = (string) ob_get_clean();
+
+    return ['ok' => true, 'exit_code' => $exitCode, 'stdout' => $echoed . $output->fetch()];
+}
+
+$configPath = null;
+foreach ($argv as $index => $arg) {
+    if ($arg === '--config' && isset($argv[$index + 1])) {
+        $configPath = $argv[$index + 1];
+    }
+}
+
+// The configs resolver reads --config from argv, so the container matches the CLI's
+$bootstrapConfigs = (new RectorConfigsResolver())->provide();
+$container = (new RectorContainerFactory())->createFromBootstrapConfigs($bootstrapConfigs);
+$application = $container->get(ConsoleApplication::class);
+$application->setAutoExit(false);
+$application->setCatchExceptions(true);
+
+$version = class_exists(VersionResolver::class) ? VersionResolver::PACKAGE_VERSION : 'unknown';
+respond(['event' => 'ready', 'version' => $version, 'pid' => getmypid()]);
+
+$served = 0;
+while (($line = fgets(STDIN)) !== false) {
+    $line = trim($line);
+    if ($line === '') {
+        continue;
+    }
+
+    $request = json_decode($line, true);
+    if (!is_array($request)) {
+        respond(['id' => null, 'ok' => false, 'error' => 'invalid JSON request']);
+        continue;
+    }
+    $id = $request['id'] ?? null;
+    $cmd = $request['cmd'] ?? '';
+
+    switch ($cmd) {
+        case 'ping':
+            respond(['id' => $id, 'ok' => true, 'version' => $version, 'served' => $served,
+                     'memory' => memory_get_usage(true)]);
+            break;
+
+        case 'process':
+            $result = runProcess($application, array_map('strval', $request['paths'] ?? []), $configPath);
+            $served++;
+            respond(['id' => $id] + $result);
+            break;
+
+        case 'process_code':
+            $filename = basename((string) ($request['filename'] ?? 'snippet.php'));
+            $directory = sys_get_temp_dir() . '/rector_daemon_' . getmypid();
+            @mkdir($directory, 0777, true);
+            $path = $directory . '/' . $filename;
+            file_put_contents($path, (string) ($request['code'] ?? ''));
+            $result = runProcess($application, [$path], $configPath);
+            @unlink($path);
+            $served++;
+            respond(['id' => $id, 'path' => $path] + $result);
+            break;
+
+        case 'shutdown':
+            respond(['id' => $id, 'ok' => true]);
+            exit(0);
+
+        default:
+            respond(['id' => $id, 'ok' => false, 'error' => "unknown command: {$cmd}"]);
+    }
+}
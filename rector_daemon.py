@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Rector Daemon Client
+====================
+
+Keeps warm `rector_daemon.php` processes (PHP, autoload and Rector's container
+loaded once) and sends them analysis requests over a JSON-lines pipe, with
+pooling, health checks and automatic restarts.
+"""
+
+import itertools
+import json
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+from rector_analyzer import BASE_CONFIG_FILE, SINGLE_FILE_TIMEOUT, write_worker_config
+
+DAEMON_SCRIPT = "rector_daemon.php"
+STARTUP_TIMEOUT = 120  # seconds to boot PHP + Rector's container
+PING_TIMEOUT = 10
+MAX_REQUESTS = 200  # restart a daemon after this many requests to bound memory growth
+
+
+class RectorDaemonError(Exception):
+    """A daemon died, timed out or answered with an error."""
+
+
+class RectorDaemon:
+    """One warm Rector process speaking the JSON-lines protocol."""
+
+    def __init__(self, project_dir: Path = Path("."), config_path: Optional[Path] = None,
+                 php: str = "php", max_requests: int = MAX_REQUESTS):
+        self.project_dir = Path(project_dir)
+        self.config_path = Path(config_path) if config_path else None
+        self.php = php
+        self.max_requests = max_requests
+        self.version = "unknown"
+        self.process: Optional[subprocess.Popen] = None
+        self._lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._ids = itertools.count(1)
+        self._served = 0
+
+    def start(self):
+        """Launch the daemon and wait for its ready event."""
+        command = [self.php, "-d", "display_errors=stderr", str(self.project_dir / DAEMON_SCRIPT)]
+        if self.config_path is not None:
+            command.extend(["--config", str(self.config_path)])
+        self.process = subprocess.Popen(command, cwd=self.project_dir, stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                        text=True, encoding='utf-8', bufsize=1)
+        self._lines = queue.Queue()
+        self._served = 0
+        threading.Thread(target=self._read_stdout, args=(self.process, self._lines), daemon=True).start()
+
+        ready = self._read_message(STARTUP_TIMEOUT)
+        if ready.get("event") != "ready":
+            self.stop()
+            raise RectorDaemonError(f"daemon did not start: {ready}")
+        self.version = ready.get("version", "unknown")
+
+    @staticmethod
+    def _read_stdout(process: subprocess.Popen, lines: "queue.Queue[Optional[str]]"):
+        for line in process.stdout:
+            lines.put(line)
+        lines.put(None)  # EOF
+
+    def _read_message(self, timeout: float) -> Dict[str, Any]:
+        while True:
+            try:
+                line = self._lines.get(timeout=timeout)
+            except queue.Empty:
+                raise RectorDaemonError(f"no response within {timeout}s")
+            if line is None:
+                raise RectorDaemonError("daemon exited")
+            try:
+                return json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Stray non-protocol output
+
+    def request(self, payload: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """Send one request and wait for the response with the same id."""
+        if not self.is_running():
+            self.start()
+        request_id = next(self._ids)
+        try:
+            self.process.stdin.write(json.dumps({"id": request_id, **payload}) + "\n")
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise RectorDaemonError(f"daemon pipe closed: {e}")
+
+        while True:
+            message = self._read_message(timeout)
+            if message.get("id") == request_id:
+                return message
+
+    def is_running(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def ping(self) -> bool:
+        """Health check: True if the daemon answers in time."""
+        try:
+            return self.is_running() and self.request({"cmd": "ping"}, PING_TIMEOUT).get("ok", False)
+        except RectorDaemonError:
+            return False
+
+    def process_paths(self, file_paths: List[Path], timeout: float) -> subprocess.CompletedProcess:
+        """Analyze files; returns what the Rector CLI would have returned."""
+        response = self.request({"cmd": "process", "paths": [str(Path(p).absolute()) for p in file_paths]}, timeout)
+        self._served += 1
+        if not response.get("ok"):
+            raise RectorDaemonError(response.get("error", "unknown daemon error"))
+        return subprocess.CompletedProcess(["rector_daemon", *map(str, file_paths)],
+                                           response["exit_code"], response["stdout"], "")
+
+    def process_code(self, code: str, filename: str = "snippet.php",
+                     timeout: float = SINGLE_FILE_TIMEOUT) -> Dict[str, Any]:
+        """Analyze a code string; returns the decoded Rector JSON output."""
+        response = self.request({"cmd": "process_code", "code": code, "filename": filename}, timeout)
+        self._served += 1
+        if not response.get("ok"):
+            raise RectorDaemonError(response.get("error", "unknown daemon error"))
+        stdout = response["stdout"].strip()
+        return json.loads(stdout) if stdout else {}
+
+    def needs_recycle(self) -> bool:
+        return self._served >= self.max_requests
+
+    def stop(self):
+        """Ask the daemon to exit, killing it if it does not."""
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            try:
+                self.process.stdin.write(json.dumps({"id": 0, "cmd": "shutdown"}) + "\n")
+                self.process.stdin.flush()
+                self.process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+
+    def restart(self):
+        self.stop()
+        self.start()
+
+
+class RectorDaemonPool:
+    """Pool of warm daemons, each with its own config and cache directory.
+
+    ``run`` has the same shape as ``RectorAnalyzer._run_rector``; assign the pool
+    to ``analyzer.daemon_pool`` to route analyses through it.
+    """
+
+    def __init__(self, project_dir: Path = Path("."), size: int = 1, base_config: Optional[Path] = None,
+                 php: str = "php", max_requests: int = MAX_REQUESTS):
+        self.project_dir = Path(project_dir)
+        self.base_config = Path(base_config) if base_config else self.project_dir / BASE_CONFIG_FILE
+        self.work_dir = Path(tempfile.mkdtemp(prefix="rector_daemons_"))
+        self.stats = {"requests": 0, "restarts": 0, "failures": 0}
+        self._lock = threading.Lock()
+        self._idle: "queue.Queue[RectorDaemon]" = queue.Queue()
+        self.daemons = []
+
+        for worker_id in range(max(size, 1)):
+            config = write_worker_config(self.base_config, self.work_dir / f"daemon_{worker_id}")
+            daemon = RectorDaemon(self.project_dir, config, php, max_requests)
+            self.daemons.append(daemon)
+            self._idle.put(daemon)
+
+    def __enter__(self) -> "RectorDaemonPool":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def version(self) -> str:
+        return next((d.version for d in self.daemons if d.version != "unknown"), "unknown")
+
+    def start(self) -> bool:
+        """Start every daemon; returns False if any failed to boot."""
+        started = True
+        for daemon in self.daemons:
+            try:
+                daemon.start()
+            except (RectorDaemonError, OSError) as e:
+                print(f"⚠️  Rector daemon failed to start: {e}")
+                started = False
+        return started
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def run(self, file_paths: List[Path], timeout: float = SINGLE_FILE_TIMEOUT) -> subprocess.CompletedProcess:
+        """Analyze files on the next idle daemon, restarting it once if it is unhealthy."""
+        daemon = self._idle.get()
+        try:
+            if daemon.needs_recycle() or (daemon.process is not None and not daemon.ping()):
+                self._count("restarts")
+                daemon.restart()
+            self._count("requests")
+            try:
+                return daemon.process_paths(file_paths, timeout)
+            except RectorDaemonError:
+                self._count("failures")
+                self._count("restarts")
+                daemon.restart()
+                return daemon.process_paths(file_paths, timeout)
+        finally:
+            self._idle.put(daemon)
+
+    def health(self) -> List[bool]:
+        """Ping every daemon (only while no requests are running)."""
+        return [daemon.ping() for daemon in self.daemons]
+
+    def close(self):
+        for daemon in self.daemons:
+            daemon.stop()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Compact Report Storage
+======================
+
+Opt-in compact layout for Rector reports: diff text goes to a compressed,
+content-addressed blob store, per-file reports become compact JSON holding
+diff references, and per-file summaries are written as a columnar .npz so
+readers load only the columns they need.
+"""
+
+import copy
+import hashlib
+import json
+import os
+import zlib
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Optional, Sequence
+
+import numpy as np
+
+BLOBS_DIR = "blobs"
+SUMMARY_COLUMNS_FILE = "summary.npz"
+COMPACT_FORMAT = "compact-v1"
+STREAM_CHUNK_SIZE = 1 << 16  # characters read at a time by the streaming metadata reader
+
+
+class BlobStore:
+    """zlib-compressed blobs addressed by the SHA-256 of their text."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def _blob_path(self, ref: str) -> Path:
+        return self.root / ref[:2] / f"{ref}.z"
+
+    def put(self, text: str) -> str:
+        """Store text (once per distinct content) and return its reference."""
+        data = text.encode('utf-8')
+        ref = hashlib.sha256(data).hexdigest()
+        blob_file = self._blob_path(ref)
+        if not blob_file.exists():
+            blob_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = blob_file.with_name(f".{blob_file.name}.{os.getpid()}.tmp")
+            temp_file.write_bytes(zlib.compress(data, 9))
+            os.replace(temp_file, blob_file)
+        return ref
+
+    def get(self, ref: str) -> str:
+        return zlib.decompress(self._blob_path(ref).read_bytes()).decode('utf-8')
+
+
+def compact_report(analysis_result: Dict[str, Any], blob_store: BlobStore) -> Dict[str, Any]:
+    """Copy of a report with every diff moved to the blob store (``diff`` -> ``diff_ref``)."""
+    report = copy.deepcopy(analysis_result)
+    for file_diff in report.get("raw_rector_output", {}).get("file_diffs", []):
+        if "diff" in file_diff:
+            file_diff["diff_ref"] = blob_store.put(file_diff.pop("diff"))
+    report["storage"] = {"format": COMPACT_FORMAT, "blobs": BLOBS_DIR}
+    return report
+
+
+def save_compact_report(analysis_result: Dict[str, Any], report_file: Path, blob_store: BlobStore):
+    """Write a compact (unindented, diff-free) report."""
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump(compact_report(analysis_result, blob_store), f, ensure_ascii=False, separators=(',', ':'))
+
+
+def load_report(report_file: Path, load_diffs: bool = False) -> Dict[str, Any]:
+    """Load a per-file report in either layout.
+
+    Compact reports keep ``diff_ref`` entries unless ``load_diffs`` is set, in which
+    case the original ``diff`` text is restored; use ``load_diff`` for one diff.
+    """
+    report_file = Path(report_file)
+    with open(report_file, 'r', encoding='utf-8') as f:
+        report = json.load(f)
+
+    storage = report.pop("storage", None)
+    if storage and load_diffs:
+        blob_store = BlobStore(report_file.parent.parent / storage["blobs"])
+        for file_diff in report.get("raw_rector_output", {}).get("file_diffs", []):
+            if "diff_ref" in file_diff:
+                file_diff["diff"] = blob_store.get(file_diff.pop("diff_ref"))
+    return report
+
+
+def load_diff(reports_dir: Path, ref: str) -> str:
+    """Load one externalised diff by reference."""
+    return BlobStore(Path(reports_dir) / BLOBS_DIR).get(ref)
+
+
+def write_summary_columns(results: List[Dict[str, Any]], summary_file: Path):
+    """Write per-file results as columns; rules are dictionary-encoded in CSR form."""
+    rule_names: Dict[str, int] = {}
+    rule_codes: List[int] = []
+    rule_offsets = [0]
+    for result in results:
+        for rule in result["rector_analysis"]["rules_triggered"]:
+            rule_codes.append(rule_names.setdefault(rule, len(rule_names)))
+        rule_offsets.append(len(rule_codes))
+
+    columns = {
+        "file_id": np.array([r["file_id"] for r in results], dtype=np.int32),
+        "filename": np.array([r["filename"] for r in results], dtype=str),
+        "original_path": np.array([r["original_path"] for r in results], dtype=str),
+        "lines_of_code": np.array([r["file_metrics"]["lines_of_code"] for r in results], dtype=np.int32),
+        "file_size_kb": np.array([r["file_metrics"]["file_size_kb"] for r in results], dtype=np.float32),
+        "php_version_changes": np.array([r["rector_analysis"]["php_version_changes"] for r in results], dtype=np.int32),
+        "has_diff": np.array([r["rector_analysis"]["has_diff"] for r in results], dtype=bool),
+        "diff_line_count": np.array([r["rector_analysis"]["diff_line_count"] for r in results], dtype=np.int32),
+        "rule_offsets": np.array(rule_offsets, dtype=np.int32),
+        "rule_codes": np.array(rule_codes, dtype=np.int16),
+        "rule_names": np.array(list(rule_names), dtype=str),
+    }
+    # np.savez adds .npz to names without it; write to a temp name then swap in
+    temp_file = summary_file.with_name(f".{summary_file.stem}.{os.getpid()}.tmp.npz")
+    np.savez_compressed(temp_file, **columns)
+    os.replace(temp_file, summary_file)
+
+
+class SummaryColumns:
+    """Lazy reader for a columnar summary: each column is decompressed on first access."""
+
+    def __init__(self, summary_file: Path):
+        self.summary_file = Path(summary_file)
+        self._npz = np.load(self.summary_file, allow_pickle=False)
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name not in self._columns:
+            self._columns[name] = self._npz[name]
+        return self._columns[name]
+
+    def __len__(self) -> int:
+        return len(self["rule_offsets"]) - 1
+
+    def rules(self) -> List[List[str]]:
+        """rules_triggered per file, decoded from the CSR columns."""
+        names, codes, offsets = self["rule_names"], self["rule_codes"], self["rule_offsets"]
+        return [[str(names[c]) for c in codes[offsets[i]:offsets[i + 1]]] for i in range(len(self))]
+
+    def close(self):
+        self._npz.close()
+
+
+def load_summary_columns(reports_dir: Path) -> Optional[SummaryColumns]:
+    """Open the columnar summary of a reports directory, if it has one."""
+    summary_file = Path(reports_dir) / SUMMARY_COLUMNS_FILE
+    return SummaryColumns(summary_file) if summary_file.exists() else None
+
+
+class _JsonStream:
+    """Incremental reader over a JSON text file: decodes one value at a time with raw_decode."""
+
+    def __init__(self, f, chunk_size: int = STREAM_CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """Append the next chunk, dropping what was consumed; False at end of file."""
+        if self.eof:
+            return False
+        # Read at least as much as is pending so an entry larger than a chunk costs O(size) retries
+        chunk = self.f.read(max(self.chunk_size, len(self.buffer) - self.pos))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ('' at end of file)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"expected {char!r} in JSON stream, found {self.peek()!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode the next complete value, reading more input until it is whole."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number or literal at the buffer's end may continue in the next chunk
+            if end == len(self.buffer) and not isinstance(value, (dict, list, str)) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def _project(entry: Dict[str, Any], fields: Sequence[str]) -> Dict[str, Any]:
+    """Copy only the given (dotted) fields of an entry, keeping their nesting."""
+    projected: Dict[str, Any] = {}
+    for field in fields:
+        *parents, leaf = field.split(".")
+        source = entry
+        for key in parents:
+            source = source.get(key) if isinstance(source, dict) else None
+        if not isinstance(source, dict) or leaf not in source:
+            continue
+        target = projected
+        for key in parents:
+            target = target.setdefault(key, {})
+        target[leaf] = source[leaf]
+    return projected
+
+
+def iter_metadata_files(metadata_file: Path, fields: Optional[Sequence[str]] = None,
+                        chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """Stream the ``files`` entries of a metadata.json one at a time.
+
+    Only one entry is decoded at a time, so memory stays bounded by the largest
+    entry. ``fields`` (dotted paths such as ``"rector_analysis.rules_triggered"``)
+    projects each entry down to what the caller needs.
+    """
+    with open(metadata_file, 'r', encoding='utf-8') as f:
+        stream = _JsonStream(f, chunk_size)
+        stream.expect("{")
+        while stream.peek() not in ("}", ""):
+            key = stream.value()
+            stream.expect(":")
+            if key != "files":
+                stream.value()  # Skip (dataset_info is small)
+            else:
+                stream.expect("[")
+                while stream.peek() != "]":
+                    entry = stream.value()
+                    yield _project(entry, fields) if fields else entry
+                    if stream.peek() == ",":
+                        stream.pos += 1
+                stream.expect("]")
+            if stream.peek() == ",":
+                stream.pos += 1
+
+
+def read_dataset_info(metadata_file: Path, chunk_size: int = STREAM_CHUNK_SIZE) -> Dict[str, Any]:
+    """The ``dataset_info`` of a metadata.json, without decoding the ``files`` entries."""
+    with open(metadata_file, 'r', encoding='utf-8') as f:
+        stream = _JsonStream(f, chunk_size)
+        stream.expect("{")
+        while stream.peek() not in ("}", ""):
+            key = stream.value()
+            stream.expect(":")
+            if key == "dataset_info":
+                return stream.value()
+            if key == "files":
+                # Entries come first in this file: skip them one at a time
+                stream.expect("[")
+                while stream.peek() != "]":
+                    stream.value()
+                    if stream.peek() == ",":
+                        stream.pos += 1
+                stream.expect("]")
+            else:
+                stream.value()
+            if stream.peek() == ",":
+                stream.pos += 1
+    return {}
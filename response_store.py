@@ -0,0 +1,186 @@
+"""
+Structured Response Store
+Append-only SQLite store for model responses with typed metadata, usage and raw
+content, plus export to the legacy model_output/ text-header layout.
+"""
+
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterator
+
+from utils import normalize_model_name, ensure_directory, output_base_name
+
+DEFAULT_STORE_PATH = Path('responses.sqlite3')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    file TEXT NOT NULL,
+    model TEXT NOT NULL,
+    model_folder TEXT NOT NULL,
+    strategy TEXT NOT NULL,
+    chunk INTEGER,
+    total_chunks INTEGER,
+    provider TEXT,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    usage TEXT,
+    latency REAL,
+    length INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_model ON responses(model_folder);
+CREATE INDEX IF NOT EXISTS idx_responses_strategy ON responses(strategy);
+CREATE INDEX IF NOT EXISTS idx_responses_file ON responses(file);
+CREATE INDEX IF NOT EXISTS idx_responses_lookup ON responses(model_folder, file, chunk, id);
+"""
+
+# Columns returned by metadata queries (everything but the raw content)
+META_COLUMNS = ('id', 'file', 'model', 'model_folder', 'strategy', 'chunk', 'total_chunks',
+                'provider', 'prompt_tokens', 'completion_tokens', 'usage', 'latency', 'length', 'created_at')
+
+
+def write_legacy_response(file_path: Path, content: str, metadata: Optional[Dict[str, Any]],
+                          usage: Dict[str, Any], timestamp: Any):
+    """Write a response in the legacy text-header format read by OutputParser."""
+    ensure_directory(file_path.parent)
+
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write("=== RAW MODEL RESPONSE ===\n")
+
+        # Write metadata
+        if metadata:
+            for key, value in metadata.items():
+                f.write(f"{key.capitalize()}: {value}\n")
+
+        f.write(f"Length: {len(content)} characters\n")
+        f.write(f"Usage: {usage}\n")
+        f.write(f"Timestamp: {timestamp}\n")
+        f.write("=" * 50 + "\n\n")
+        f.write(content)
+
+
+class ResponseStore:
+    """Append-only, indexed store of raw model responses.
+
+    The database (and its directory) is only created when the store is first
+    used, so commands that never touch responses leave no file behind.
+    """
+
+    def __init__(self, db_path: Path = DEFAULT_STORE_PATH):
+        self.db_path = Path(db_path)
+        self._connection: Optional[sqlite3.Connection] = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            ensure_directory(self.db_path.parent)
+            self._connection = sqlite3.connect(str(self.db_path))
+            self._connection.row_factory = sqlite3.Row
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def append(self, content: str, metadata: Dict[str, Any], usage: Optional[Dict[str, Any]] = None,
+               latency: Optional[float] = None) -> int:
+        """Append one response; returns its row id."""
+        usage = usage or {}
+        model = metadata['model']
+        with self.connection:
+            cursor = self.connection.execute(
+                """INSERT INTO responses (file, model, model_folder, strategy, chunk, total_chunks,
+                       provider, prompt_tokens, completion_tokens, usage, latency, length,
+                       created_at, content)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (metadata['file'], model, normalize_model_name(model), metadata['strategy'],
+                 metadata.get('chunk'), metadata.get('total_chunks'), metadata.get('provider'),
+                 usage.get('prompt_tokens'), usage.get('completion_tokens'),
+                 json.dumps(usage, default=str), latency, len(content),
+                 datetime.now().isoformat(sep=' '), content))
+        return cursor.lastrowid
+
+    def _row_to_dict(self, row: sqlite3.Row) -> Dict[str, Any]:
+        record = dict(row)
+        if record.get('usage'):
+            record['usage'] = json.loads(record['usage'])
+        return record
+
+    def latest(self, model_folder: Optional[str] = None, file: Optional[str] = None,
+               chunked: Optional[bool] = None, with_content: bool = False) -> List[Dict[str, Any]]:
+        """Latest response per (model, file, chunk), ordered by model, file and chunk."""
+        columns = ', '.join(f"r.{c}" for c in META_COLUMNS + (('content',) if with_content else ()))
+        conditions, params = [], []
+        if model_folder is not None:
+            conditions.append("model_folder = ?")
+            params.append(model_folder)
+        if file is not None:
+            conditions.append("file = ?")
+            params.append(file)
+        if chunked is not None:
+            conditions.append("chunk IS NOT NULL" if chunked else "chunk IS NULL")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        query = f"""
+            SELECT {columns} FROM responses r
+            JOIN (SELECT MAX(id) AS id FROM responses {where}
+                  GROUP BY model_folder, file, IFNULL(chunk, 0)) latest ON latest.id = r.id
+            ORDER BY r.model_folder, r.file, IFNULL(r.chunk, 0)"""
+        return [self._row_to_dict(row) for row in self.connection.execute(query, params)]
+
+    def content(self, response_id: int) -> str:
+        row = self.connection.execute("SELECT content FROM responses WHERE id = ?", (response_id,)).fetchone()
+        if row is None:
+            raise KeyError(response_id)
+        return row['content']
+
+    def iter_latest_with_content(self, **filters) -> Iterator[Dict[str, Any]]:
+        """Latest responses with content, fetched one row at a time."""
+        for record in self.latest(**filters):
+            record['content'] = self.content(record['id'])
+            yield record
+
+    def models(self) -> List[str]:
+        return [row[0] for row in self.connection.execute(
+            "SELECT DISTINCT model_folder FROM responses ORDER BY model_folder")]
+
+    def usage_summary(self) -> List[Dict[str, Any]]:
+        """Request count, token totals and mean latency per model and strategy."""
+        rows = self.connection.execute("""
+            SELECT model, strategy, COUNT(*) AS requests,
+                   SUM(prompt_tokens) AS prompt_tokens, SUM(completion_tokens) AS completion_tokens,
+                   AVG(latency) AS mean_latency
+            FROM responses GROUP BY model, strategy ORDER BY model, strategy""")
+        return [dict(row) for row in rows]
+
+    def telemetry(self) -> List[Dict[str, Any]]:
+        """(model, prompt_tokens, completion_tokens, latency) for every stored response."""
+        rows = self.connection.execute(
+            "SELECT model, prompt_tokens, completion_tokens, latency FROM responses")
+        return [dict(row) for row in rows]
+
+    def export_legacy(self, base_dir: Path = Path('.')) -> int:
+        """Write the latest responses to model_output/ and chunked_model_output/ text files."""
+        exported = 0
+        for record in self.iter_latest_with_content():
+            file_base = output_base_name(record['file'])
+            metadata = {'file': record['file'], 'model': record['model'], 'strategy': record['strategy']}
+            if record['chunk'] is not None:
+                metadata['chunk'] = record['chunk']
+                metadata['total_chunks'] = record['total_chunks']
+                path = base_dir / 'chunked_model_output' / record['model_folder'] / file_base / f"{record['chunk']}.txt"
+            else:
+                path = base_dir / 'model_output' / record['model_folder'] / f"{file_base}.txt"
+            metadata['provider'] = record['provider']
+            if record['latency'] is not None:
+                metadata['latency'] = f"{record['latency']:.3f}s"
+
+            write_legacy_response(path, record['content'], metadata, record['usage'] or {}, record['created_at'])
+            exported += 1
+        return exported
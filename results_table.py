@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Results Table
+=============
+
+Materialises the baseline's and every model's per-file Rector results into
+one typed columnar table (plus a long table of triggered rules), cached per
+source as Parquet and rebuilt only for sources whose reports changed.
+Without a Parquet engine (pyarrow/fastparquet) partitions are pickled.
+"""
+
+import importlib.util
+import json
+import os
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+import pandas as pd
+
+from rule_matrix import BASELINE_DIR, EVALUATION_DIR, discover_sources, load_source, split_rule, _source_stamp
+from utils import parallel_map
+
+RESULTS_TABLE_DIR = "evaluation_reports/results_table"
+MANIFEST_FILE = "manifest.json"
+
+FILE_DTYPES = {
+    "file_id": "int32",
+    "filename": "string",
+    "original_path": "string",
+    "size_category": "string",
+    "lines_of_code": "int32",
+    "file_size_kb": "float32",
+    "php_version_changes": "int32",
+    "has_diff": "bool",
+    "diff_line_count": "int32",
+    "rule_count": "int16",
+    "content_hash": "string",
+}
+RULE_DTYPES = {"filename": "string", "rule": "string", "rule_name": "string", "php_version": "string"}
+CATEGORY_COLUMNS = ("source", "size_category", "php_version", "rule")
+
+
+def parquet_engine() -> Optional[str]:
+    """Installed Parquet engine, if any."""
+    for engine in ("pyarrow", "fastparquet"):
+        if importlib.util.find_spec(engine) is not None:
+            return engine
+    return None
+
+
+def source_frames(reports_dir: Path) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """(files, rules) frames for one reports directory."""
+    rows = load_source(reports_dir)
+    files = pd.DataFrame([{**{k: v for k, v in row.items() if k != "rules"}, "rule_count": len(row["rules"])}
+                          for row in rows], columns=list(FILE_DTYPES))
+    files["size_category"] = files["size_category"].fillna("unknown")
+    files = files.astype(FILE_DTYPES)
+
+    rules = pd.DataFrame([(row["filename"], rule, *reversed(split_rule(rule)))
+                          for row in rows for rule in row["rules"]], columns=list(RULE_DTYPES))
+    return files, rules.astype(RULE_DTYPES)
+
+
+class ResultsTable:
+    """Cached cross-model results: ``files`` (one row per source×file) and ``rules`` (one row per hit)."""
+
+    def __init__(self, table_dir: str = RESULTS_TABLE_DIR, baseline_dir: str = BASELINE_DIR,
+                 evaluation_dir: str = EVALUATION_DIR):
+        self.table_dir = Path(table_dir)
+        self.baseline_dir = baseline_dir
+        self.evaluation_dir = evaluation_dir
+        self.engine = parquet_engine()
+        self.files = pd.DataFrame()
+        self.rules = pd.DataFrame()
+
+    def _partition(self, source: str, table: str) -> Path:
+        suffix = "parquet" if self.engine else "pkl"
+        return self.table_dir / f"{source}.{table}.{suffix}"
+
+    def _write(self, frame: pd.DataFrame, path: Path):
+        temp_file = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        if self.engine:
+            frame.to_parquet(temp_file, engine=self.engine, index=False)
+        else:
+            frame.to_pickle(temp_file)
+        os.replace(temp_file, path)
+
+    def _read(self, path: Path) -> pd.DataFrame:
+        return pd.read_parquet(path, engine=self.engine) if self.engine else pd.read_pickle(path)
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self.table_dir / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def refresh(self, rebuild: bool = False, workers: int = 1) -> Dict[str, str]:
+        """Bring the cache up to date and load it; returns what happened per source.
+
+        Stale sources are re-read on ``workers`` processes.
+        """
+        self.table_dir.mkdir(parents=True, exist_ok=True)
+        manifest = self._load_manifest()
+        sources = discover_sources(self.baseline_dir, self.evaluation_dir)
+        status = {}
+
+        stale = {}
+        for source, reports_dir in sources.items():
+            stamp = _source_stamp(reports_dir)
+            entry = manifest.get(source, {})
+            if (not rebuild and entry.get("stamp") == stamp and entry.get("engine") == self.engine
+                    and all(self._partition(source, table).exists() for table in ("files", "rules"))):
+                status[source] = "cached"
+            else:
+                stale[source] = stamp
+
+        frames = parallel_map(source_frames, [sources[source] for source in stale], workers)
+        for (source, stamp), source_tables in zip(stale.items(), frames):
+            for frame, table in zip(source_tables, ("files", "rules")):
+                self._write(frame, self._partition(source, table))
+            manifest[source] = {"stamp": stamp, "engine": self.engine}
+            status[source] = "rebuilt"
+
+        for source in [s for s in manifest if s not in sources]:
+            for table in ("files", "rules"):
+                self._partition(source, table).unlink(missing_ok=True)
+            del manifest[source]
+            status[source] = "removed"
+
+        with open(self.table_dir / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+        self.files = self._concat(sources, "files", FILE_DTYPES)
+        self.rules = self._concat(sources, "rules", RULE_DTYPES)
+        return status
+
+    def _concat(self, sources: Dict[str, Path], table: str, dtypes: Dict[str, str]) -> pd.DataFrame:
+        frames = [self._read(self._partition(source, table)).assign(source=source) for source in sources]
+        if not frames:
+            return pd.DataFrame(columns=["source", *dtypes])
+        frame = pd.concat(frames, ignore_index=True)
+        if "size_category" in frame:
+            # Model metadata has no size categories: take them from whichever source knows the file
+            known = frame[frame["size_category"] != "unknown"].drop_duplicates("filename")
+            categories = frame["filename"].map(known.set_index("filename")["size_category"])
+            frame["size_category"] = categories.fillna(frame["size_category"])
+        for column in CATEGORY_COLUMNS:
+            if column in frame:
+                frame[column] = frame[column].astype("category")
+        return frame[["source", *dtypes]]
+
+    def summary(self) -> pd.DataFrame:
+        """Per source: files, perfect files, remaining changes and rule hits."""
+        grouped = self.files.groupby("source", observed=True)
+        return pd.DataFrame({
+            "files": grouped.size(),
+            "perfect_files": grouped["php_version_changes"].apply(lambda changes: int((changes == 0).sum())),
+            "total_changes": grouped["php_version_changes"].sum(),
+            "avg_changes": grouped["php_version_changes"].mean().round(2),
+            "rule_hits": grouped["rule_count"].sum(),
+        })
+
+    def by_category(self) -> pd.DataFrame:
+        """Remaining changes per source and size category."""
+        return self.files.pivot_table(index="source", columns="size_category", values="php_version_changes",
+                                      aggfunc="sum", fill_value=0, observed=True)
+
+    def by_php_version(self) -> pd.DataFrame:
+        """Rule hits per source and PHP version."""
+        return self.rules.pivot_table(index="source", columns="php_version", values="filename",
+                                      aggfunc="count", fill_value=0, observed=True)
+
+
+def load_results_table(rebuild: bool = False, workers: int = 1, **kwargs) -> ResultsTable:
+    """Refreshed results table (only changed sources are re-read)."""
+    table = ResultsTable(**kwargs)
+    table.refresh(rebuild, workers)
+    return table
+
+
+def main():
+    """Main execution function."""
+    import sys
+
+    # --rebuild re-reads every source's reports
+    rebuild = "--rebuild" in sys.argv
+
+    print("🗃️  Cross-Model Results Table")
+    print("=" * 50)
+    table = ResultsTable()
+    status = table.refresh(rebuild)
+    storage = f"Parquet ({table.engine})" if table.engine else "pickle (install pyarrow for Parquet)"
+    print(f"📦 {len(table.files)} file rows, {len(table.rules)} rule rows in {table.table_dir} [{storage}]")
+    for source, state in status.items():
+        print(f"   {source}: {state}")
+
+    if not table.files.empty:
+        with pd.option_context("display.width", 160, "display.max_columns", 20):
+            print("\n📊 Summary per source:")
+            print(table.summary().to_string())
+            print("\n📂 Remaining changes per size category:")
+            print(table.by_category().to_string())
+
+
+if __name__ == "__main__":
+    main()
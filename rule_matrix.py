@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+File × Rule Matrix
+==================
+
+Loads the baseline `rector_reports` and every model's `evaluation_reports`
+once into an integer-coded sparse (CSR) file×rule matrix, cached on disk,
+and answers cross-model questions with vectorized queries: rules fixed,
+rules introduced, residual rules per PHP version and per size category.
+"""
+
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+from report_store import SUMMARY_COLUMNS_FILE, load_summary_columns, iter_metadata_files
+
+BASELINE = "baseline"
+BASELINE_DIR = "rector_reports"
+EVALUATION_DIR = "evaluation_reports"
+MATRIX_CACHE_FILE = "rule_matrix.npz"
+# Per-file fields read from metadata.json (streamed, everything else is skipped)
+SOURCE_FIELDS = ("file_id", "filename", "original_path", "size_category", "file_metrics", "content_hash",
+                 "rector_analysis.php_version_changes", "rector_analysis.rules_triggered",
+                 "rector_analysis.has_diff", "rector_analysis.diff_line_count")
+
+
+@lru_cache(maxsize=None)
+def split_rule(rule: str) -> Tuple[str, str]:
+    """(php_version, short rule name) of a Rector rule class, e.g. ('PHP 54', 'LongArrayToShortArrayRector')."""
+    parts = rule.split("\\")
+    php_version = parts[1].replace('Php', 'PHP ') if len(parts) > 1 else "Unknown"
+    return php_version, parts[-1]
+
+
+def discover_sources(baseline_dir: str = BASELINE_DIR, evaluation_dir: str = EVALUATION_DIR) -> Dict[str, Path]:
+    """Source name -> reports directory for the baseline and every evaluated model."""
+    sources = {}
+    if (Path(baseline_dir) / "metadata.json").exists():
+        sources[BASELINE] = Path(baseline_dir)
+    for metadata_file in sorted(Path(evaluation_dir).glob("*/metadata.json")):
+        sources[metadata_file.parent.name] = metadata_file.parent
+    return sources
+
+
+def load_source(reports_dir: Path) -> List[Dict[str, Any]]:
+    """Flat per-file rows (identity, metrics, Rector counts and rules) of one reports directory."""
+    columns = load_summary_columns(reports_dir)
+    rules_by_file = {}
+    if columns is not None:
+        rules_by_file = dict(zip((str(name) for name in columns["filename"]), columns.rules()))
+        columns.close()
+
+    rows = []
+    for file_data in iter_metadata_files(reports_dir / "metadata.json", SOURCE_FIELDS):
+        rector = file_data["rector_analysis"]
+        rules = rector.get("rules_triggered")
+        if rules is None:
+            rules = rules_by_file.get(file_data["filename"], [])
+        metrics = file_data.get("file_metrics", {})
+        rows.append({
+            "file_id": file_data.get("file_id", 0),
+            "filename": file_data["filename"],
+            "original_path": file_data.get("original_path", ""),
+            "size_category": file_data.get("size_category"),
+            "lines_of_code": metrics.get("lines_of_code", 0),
+            "file_size_kb": metrics.get("file_size_kb", 0.0),
+            "php_version_changes": rector["php_version_changes"],
+            "has_diff": rector.get("has_diff", False),
+            "diff_line_count": rector.get("diff_line_count", 0),
+            "content_hash": file_data.get("content_hash"),
+            "rules": rules,
+        })
+    return rows
+
+
+def _source_stamp(reports_dir: Path) -> str:
+    """Changes whenever a source's metadata or columnar summary is rewritten."""
+    stamp = []
+    for name in ("metadata.json", SUMMARY_COLUMNS_FILE):
+        path = reports_dir / name
+        if path.exists():
+            info = path.stat()
+            stamp.append(f"{name}:{info.st_size}:{info.st_mtime_ns}")
+    return "|".join(stamp)
+
+
+class RuleMatrix:
+    """Sparse file×rule matrices, one block of rows per source, sharing file and rule codes.
+
+    Row ``s * n_files + f`` holds the rules source ``s`` left in file ``f``
+    (``rule_codes[rule_offsets[row]:rule_offsets[row + 1]]``). ``analyzed``
+    marks which files each source actually has a report for.
+    """
+
+    def __init__(self, sources: List[str], stamps: List[str], filenames: np.ndarray, categories: np.ndarray,
+                 rule_names: np.ndarray, rule_offsets: np.ndarray, rule_codes: np.ndarray,
+                 analyzed: np.ndarray, changes: np.ndarray):
+        self.sources = list(sources)
+        self.stamps = list(stamps)
+        self.filenames = filenames
+        self.categories = categories
+        self.rule_names = rule_names
+        self.rule_offsets = rule_offsets
+        self.rule_codes = rule_codes
+        self.analyzed = analyzed
+        self.changes = changes
+        self.rule_versions = np.array([split_rule(str(rule))[0] for rule in rule_names], dtype=str)
+        self._dense: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def build(cls, source_dirs: Dict[str, Path]) -> "RuleMatrix":
+        """Read every source's reports once and encode them."""
+        loaded = {name: load_source(path) for name, path in source_dirs.items()}
+
+        file_index: Dict[str, int] = {}
+        categories: Dict[str, str] = {}
+        rule_index: Dict[str, int] = {}
+        for rows in loaded.values():
+            for row in rows:
+                file_index.setdefault(row["filename"], len(file_index))
+                if row["size_category"]:
+                    categories.setdefault(row["filename"], row["size_category"])
+
+        n_files = len(file_index)
+        analyzed = np.zeros((len(loaded), n_files), dtype=bool)
+        changes = np.zeros((len(loaded), n_files), dtype=np.int32)
+        row_rules: List[List[int]] = [[] for _ in range(len(loaded) * n_files)]
+        for s, rows in enumerate(loaded.values()):
+            for row in rows:
+                f = file_index[row["filename"]]
+                analyzed[s, f] = True
+                changes[s, f] = row["php_version_changes"]
+                row_rules[s * n_files + f] = sorted({rule_index.setdefault(rule, len(rule_index))
+                                                     for rule in row["rules"]})
+
+        rule_offsets = np.zeros(len(row_rules) + 1, dtype=np.int32)
+        rule_offsets[1:] = np.cumsum([len(codes) for codes in row_rules])
+        rule_codes = np.fromiter((code for codes in row_rules for code in codes), dtype=np.int16,
+                                 count=int(rule_offsets[-1]))
+        filenames = list(file_index)
+        return cls(
+            sources=list(loaded),
+            stamps=[_source_stamp(path) for path in source_dirs.values()],
+            filenames=np.array(filenames, dtype=str),
+            categories=np.array([categories.get(name, "unknown") for name in filenames], dtype=str),
+            rule_names=np.array(list(rule_index), dtype=str),
+            rule_offsets=rule_offsets,
+            rule_codes=rule_codes,
+            analyzed=analyzed,
+            changes=changes,
+        )
+
+    def save(self, cache_file: Path):
+        cache_file = Path(cache_file)
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = cache_file.with_name(f".{cache_file.stem}.{os.getpid()}.tmp.npz")
+        np.savez_compressed(temp_file, sources=np.array(self.sources, dtype=str),
+                            stamps=np.array(self.stamps, dtype=str), filenames=self.filenames,
+                            categories=self.categories, rule_names=self.rule_names,
+                            rule_offsets=self.rule_offsets, rule_codes=self.rule_codes,
+                            analyzed=self.analyzed, changes=self.changes)
+        os.replace(temp_file, cache_file)
+
+    @classmethod
+    def load(cls, cache_file: Path) -> "RuleMatrix":
+        with np.load(cache_file, allow_pickle=False) as data:
+            return cls(sources=[str(s) for s in data["sources"]], stamps=[str(s) for s in data["stamps"]],
+                       filenames=data["filenames"], categories=data["categories"],
+                       rule_names=data["rule_names"], rule_offsets=data["rule_offsets"],
+                       rule_codes=data["rule_codes"], analyzed=data["analyzed"], changes=data["changes"])
+
+    def dense(self, source: str) -> np.ndarray:
+        """Boolean files×rules matrix of one source."""
+        if source not in self._dense:
+            s = self.sources.index(source)
+            n_files = len(self.filenames)
+            offsets = self.rule_offsets[s * n_files:(s + 1) * n_files + 1]
+            codes = self.rule_codes[offsets[0]:offsets[-1]]
+            rows = np.repeat(np.arange(n_files), np.diff(offsets))
+            matrix = np.zeros((n_files, len(self.rule_names)), dtype=bool)
+            matrix[rows, codes] = True
+            self._dense[source] = matrix
+        return self._dense[source]
+
+    def _compared(self, model: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(baseline, model, files analyzed by both) restricted to shared files."""
+        both = self.analyzed[self.sources.index(BASELINE)] & self.analyzed[self.sources.index(model)]
+        return self.dense(BASELINE), self.dense(model), both
+
+    def _by_rule(self, matrix: np.ndarray, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        counts = matrix.sum(axis=0)
+        order = np.argsort(-counts, kind="stable")
+        order = order[counts[order] > 0][:limit]
+        return [{"rule": str(self.rule_names[i]), "php_version": str(self.rule_versions[i]),
+                 "file_count": int(counts[i])} for i in order]
+
+    def fixed(self, model: str) -> List[Dict[str, Any]]:
+        """Rules present in the baseline that the model's output no longer triggers, per rule."""
+        baseline, migrated, both = self._compared(model)
+        return self._by_rule(baseline & ~migrated & both[:, None])
+
+    def introduced(self, model: str) -> List[Dict[str, Any]]:
+        """Rules the model's output triggers that the original file did not, per rule."""
+        baseline, migrated, both = self._compared(model)
+        return self._by_rule(migrated & ~baseline & both[:, None])
+
+    def residual_by_version(self, source: str) -> Dict[str, int]:
+        """(file, rule) hits still present, grouped by the rule's PHP version."""
+        versions, codes = np.unique(self.rule_versions, return_inverse=True)
+        per_rule = self.dense(source).sum(axis=0)
+        totals = np.bincount(codes, weights=per_rule, minlength=len(versions))
+        return {str(version): int(total) for version, total in zip(versions, totals) if total}
+
+    def by_category(self, model: str) -> Dict[str, Dict[str, int]]:
+        """Per size category: files compared, rule hits fixed, introduced and residual."""
+        baseline, migrated, both = self._compared(model)
+        fixed = (baseline & ~migrated).sum(axis=1)
+        introduced = (migrated & ~baseline).sum(axis=1)
+        residual = migrated.sum(axis=1)
+        summary = {}
+        for category in np.unique(self.categories[both]):
+            mask = both & (self.categories == category)
+            summary[str(category)] = {"files": int(mask.sum()), "fixed": int(fixed[mask].sum()),
+                                      "introduced": int(introduced[mask].sum()),
+                                      "residual": int(residual[mask].sum())}
+        return summary
+
+    def compare(self, model: str) -> Dict[str, Any]:
+        """Headline numbers for one model against the baseline."""
+        baseline, migrated, both = self._compared(model)
+        mask = both[:, None]
+        return {
+            "model": model,
+            "files": int(both.sum()),
+            "baseline_hits": int((baseline & mask).sum()),
+            "residual_hits": int((migrated & mask).sum()),
+            "fixed_hits": int((baseline & ~migrated & mask).sum()),
+            "introduced_hits": int((migrated & ~baseline & mask).sum()),
+            "clean_files": int((both & ~migrated.any(axis=1)).sum()),
+        }
+
+
+def load_rule_matrix(baseline_dir: str = BASELINE_DIR, evaluation_dir: str = EVALUATION_DIR,
+                     cache_file: Optional[Path] = None, rebuild: bool = False) -> RuleMatrix:
+    """Cached matrix over the baseline and all evaluated models, rebuilt when any source changed."""
+    source_dirs = discover_sources(baseline_dir, evaluation_dir)
+    if BASELINE not in source_dirs:
+        raise FileNotFoundError(f"No baseline analysis in {baseline_dir}. Run: python process_all_files.py")
+
+    cache_file = Path(cache_file) if cache_file else Path(evaluation_dir) / MATRIX_CACHE_FILE
+    stamps = [_source_stamp(path) for path in source_dirs.values()]
+    if not rebuild and cache_file.exists():
+        try:
+            matrix = RuleMatrix.load(cache_file)
+            if matrix.sources == list(source_dirs) and matrix.stamps == stamps:
+                return matrix
+        except (OSError, KeyError, ValueError) as e:
+            print(f"⚠️  Ignoring unreadable rule matrix cache {cache_file}: {e}")
+
+    matrix = RuleMatrix.build(source_dirs)
+    matrix.save(cache_file)
+    print(f"🧮 Rule matrix built: {len(matrix.sources)} sources × {len(matrix.filenames)} files × "
+          f"{len(matrix.rule_names)} rules → {cache_file}")
+    return matrix
+
+
+def print_comparison(matrix: RuleMatrix, models: List[str]):
+    """Print fixed/introduced/residual summaries for each model."""
+    for model in models:
+        info = matrix.compare(model)
+        print(f"\n🤖 {model}: {info['files']} files compared, {info['clean_files']} clean")
+        print(f"   Baseline rule hits: {info['baseline_hits']} | Fixed: {info['fixed_hits']} | "
+              f"Introduced: {info['introduced_hits']} | Residual: {info['residual_hits']}")
+
+        residual = matrix.residual_by_version(model)
+        if residual:
+            print("   Residual by PHP version: " + ", ".join(f"{v}: {n}" for v, n in residual.items()))
+        for category, counts in matrix.by_category(model).items():
+            print(f"   {category}: {counts['files']} files, fixed {counts['fixed']}, "
+                  f"introduced {counts['introduced']}, residual {counts['residual']}")
+        for rule in matrix.introduced(model)[:5]:
+            print(f"   ⚠️  Introduced {split_rule(rule['rule'])[1]} ({rule['php_version']}) in {rule['file_count']} files")
+
+
+def main():
+    """Main execution function."""
+    import sys
+
+    # --rebuild ignores the cached matrix
+    rebuild = "--rebuild" in sys.argv
+    requested = [arg for arg in sys.argv[1:] if arg != "--rebuild"]
+
+    print("🧮 Cross-Model Rule Comparison")
+    print("=" * 50)
+    try:
+        matrix = load_rule_matrix(rebuild=rebuild)
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        return
+
+    models = [source for source in matrix.sources if source != BASELINE]
+    unknown = [model for model in requested if model not in models]
+    if unknown:
+        print(f"❌ No evaluation reports for: {', '.join(unknown)}")
+        print(f"   Available models: {', '.join(models) or 'none'}")
+        return
+    print_comparison(matrix, requested or models)
+
+
+if __name__ == "__main__":
+    main()
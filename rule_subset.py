@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Rule-Subset Rector Configs
+==========================
+
+Builds Rector configs holding only the rules the baseline reports saw fire on
+each original file (plus a safety margin of common rules), so evaluating the
+migrated files does far less work than the full UP_TO_PHP_83 set.
+"""
+
+import contextvars
+import copy
+import hashlib
+import json
+import shutil
+import subprocess
+import tempfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional, Set, Tuple
+
+from rector_analyzer import RectorAnalyzer, DEFAULT_BATCH_SIZE, php_string
+
+DEFAULT_BASELINE_DIR = "rector_reports/individual_files"
+DEFAULT_MARGIN = 5  # most common baseline rules always added to a subset
+DEFAULT_AUDIT_EVERY = 10  # every Nth file is analyzed with the full set
+
+# Prints which of the rule classes given as arguments are configurable
+CONFIGURABLE_CHECK = """require 'vendor/autoload.php';
+foreach (array_slice($argv, 1) as $rule) {
+    if (is_a($rule, 'Rector\\Contract\\Rector\\ConfigurableRectorInterface', true)) {
+        echo $rule, PHP_EOL;
+    }
+}"""
+
+SUBSET_CONFIG_TEMPLATE = """<?php
+
+declare(strict_types=1);
+
+use Rector\\Config\\RectorConfig;
+use Rector\\Contract\\Rector\\ConfigurableRectorInterface;
+
+return static function (RectorConfig $rectorConfig): void {{
+    $rules = array_values(array_filter([
+{rules}
+    ], 'class_exists'));
+
+    foreach ($rules as $rule) {{
+        // Configurable rules need the level sets' configuration: the planner sends their files to the full set
+        if (is_a($rule, ConfigurableRectorInterface::class, true)) {{
+            throw new \\RuntimeException('Configurable rule ' . $rule . ' cannot run in a rule subset');
+        }}
+    }}
+
+    if ($rules !== []) {{
+        $rectorConfig->rules($rules);
+    }}
+    $rectorConfig->cacheDirectory({cache_dir});
+    $rectorConfig->disableParallel();
+}};
+"""
+
+
+def load_baseline_rules(baseline_dir: str = DEFAULT_BASELINE_DIR) -> Dict[str, List[str]]:
+    """Map original file stem -> rules triggered in its baseline report."""
+    baseline = {}
+    for report_file in sorted(Path(baseline_dir).glob("*_rector.json")):
+        try:
+            with open(report_file, 'r', encoding='utf-8') as f:
+                report = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️  Skipping unreadable baseline report {report_file}: {e}")
+            continue
+        stem = report_file.name[:-len("_rector.json")]
+        baseline[stem] = report.get("rector_analysis", {}).get("rules_triggered", [])
+    return baseline
+
+
+def find_configurable_rules(rules: Iterable[str], project_dir: Path = Path("."),
+                            php: str = "php") -> Optional[Set[str]]:
+    """Rules that implement ConfigurableRectorInterface, or None if PHP could not tell."""
+    rules = sorted(set(rules))
+    if not rules:
+        return set()
+    try:
+        result = subprocess.run([php, "-r", CONFIGURABLE_CHECK, "--", *rules],
+                                capture_output=True, text=True, cwd=project_dir, timeout=60)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        print(f"⚠️  Could not check for configurable rules: {e}")
+        return None
+    if result.returncode != 0:
+        print(f"⚠️  Could not check for configurable rules: {result.stderr.strip()[-500:]}")
+        return None
+    return set(result.stdout.split())
+
+
+class RuleSubsetPlanner:
+    """Plan which rules to run per migrated file from the baseline reports."""
+
+    def __init__(self, baseline_dir: str = DEFAULT_BASELINE_DIR, margin: int = DEFAULT_MARGIN,
+                 audit_every: int = DEFAULT_AUDIT_EVERY):
+        self.baseline = load_baseline_rules(baseline_dir)
+        self.audit_every = audit_every
+        counts = Counter(rule for rules in self.baseline.values() for rule in set(rules))
+        self.common_rules = [rule for rule, _ in counts.most_common(margin)]
+
+    def rules_for(self, file_path: Path) -> Optional[Tuple[str, ...]]:
+        """Sorted rule subset for a file, or None if it has no baseline report."""
+        rules = self.baseline.get(Path(file_path).stem)
+        if rules is None:
+            return None
+        return tuple(sorted(set(rules) | set(self.common_rules)))
+
+    def plan(self, file_paths: List[Path], batch_size: int = DEFAULT_BATCH_SIZE,
+             configurable: Iterable[str] = ()) -> Tuple[List[Tuple[Tuple[str, ...], List[Path]]], List[Path]]:
+        """Plan per-batch subsets; returns ([(rules, files)], files needing the full set).
+
+        Files with similar subsets are batched together and each batch runs the
+        union of its files' rules. Files without a baseline (or with an empty
+        subset, which would run no rules at all), files whose subset has a
+        ``configurable`` rule (it only works with the level sets' configuration)
+        and every ``audit_every``-th file go to the full set.
+        """
+        configurable = set(configurable)
+        subset_files = []
+        full_set = []
+        for index, path in enumerate(file_paths):
+            rules = self.rules_for(path)
+            if (not rules or configurable.intersection(rules)
+                    or (self.audit_every and index % self.audit_every == 0)):
+                full_set.append(path)
+            else:
+                subset_files.append((rules, path))
+
+        subset_files.sort(key=lambda item: (len(item[0]), item[0]))
+        batches = []
+        for start in range(0, len(subset_files), max(batch_size, 1)):
+            batch = subset_files[start:start + max(batch_size, 1)]
+            rules = tuple(sorted(set().union(*(rules for rules, _ in batch))))
+            batches.append((rules, [path for _, path in batch]))
+        return batches, full_set
+
+    @staticmethod
+    def config_hash(rules: Tuple[str, ...]) -> str:
+        """Cache key component for a subset config."""
+        return hashlib.sha256(("subset:" + "\n".join(rules)).encode()).hexdigest()
+
+    @staticmethod
+    def write_config(rules: Tuple[str, ...], directory: Path) -> Path:
+        """Write a Rector config that runs only the given (non-configurable) rules."""
+        cache_dir = directory / "cache"
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        config_file = directory / "rector.php"
+        config_file.write_text(SUBSET_CONFIG_TEMPLATE.format(
+            rules="\n".join(f"        {php_string(rule)}," for rule in rules),
+            cache_dir=php_string(cache_dir.absolute())), encoding='utf-8')
+        return config_file
+
+    def fresh_rules(self, file_path: Path, result: Dict[str, Any]) -> List[str]:
+        """Rules a full-set run found that the file's subset would have missed."""
+        rules = self.rules_for(file_path)
+        if rules is None or "error" in result:
+            return []
+        return sorted(set(result["rector_analysis"]["rules_triggered"]) - set(rules))
+
+
+def analyze_with_subsets(analyzer: RectorAnalyzer, planner: RuleSubsetPlanner, file_paths: List[Path],
+                         batch_size: int = DEFAULT_BATCH_SIZE, max_workers: int = 1) -> Dict[Path, Dict[str, Any]]:
+    """Analyze files with per-group rule-subset configs, auditing a sample with the full set."""
+    subset_rules = {rule for path in file_paths for rule in planner.rules_for(path) or ()}
+    # Configurable rules are detected here, so their files are run, labelled and cached as the full set
+    configurable = find_configurable_rules(subset_rules, analyzer.project_dir) or set()
+    batches, full_set = planner.plan(file_paths, batch_size, configurable)
+    print(f"🎯 Rule subsets: {len(batches)} batch configs for {sum(len(paths) for _, paths in batches)} files, "
+          f"{len(full_set)} files on the full set (audit/no baseline/configurable rules)")
+
+    work_dir = Path(tempfile.mkdtemp(prefix="rector_subsets_"))
+    jobs = []
+    for index, (rules, paths) in enumerate(batches):
+        subset_analyzer = copy.copy(analyzer)
+        subset_analyzer.config_path = planner.write_config(rules, work_dir / f"subset_{index}")
+        subset_analyzer._config_hash = planner.config_hash(rules)
+        jobs.append((subset_analyzer, paths, len(rules)))
+    jobs.append((analyzer, full_set, None))
+
+    def run(job):
+        job_analyzer, paths, rule_count = job
+        results = job_analyzer.analyze_files(paths, batch_size) if paths else {}
+        for result in results.values():
+            if "error" not in result:
+                result["analysis_metadata"]["rule_set"] = "full" if rule_count is None else f"baseline_subset ({rule_count} rules)"
+        return results
+
+    results: Dict[Path, Dict[str, Any]] = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+            futures = [executor.submit(contextvars.copy_context().run, run, job) for job in jobs]
+            for future in futures:
+                results.update(future.result())
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    # Audit: rules that fired on full-set files but are outside their subsets
+    fresh = {path.name: planner.fresh_rules(path, results[path]) for path in full_set}
+    fresh = {name: rules for name, rules in fresh.items() if rules}
+    if fresh:
+        print(f"🔎 Full-set audit found rules outside the baseline subsets in {len(fresh)} files:")
+        for name, rules in fresh.items():
+            short_names = [rule.rsplit('\\', 1)[-1] for rule in rules]
+            print(f"   {name}: {', '.join(short_names)}")
+    else:
+        print(f"🔎 Full-set audit: no rules outside the baseline subsets ({len(full_set)} files)")
+
+    return {path: results[path] for path in file_paths}
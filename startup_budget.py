@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+CLI Startup Budget
+==================
+
+Measures the import cost of the CLI entry points with `python -X importtime`
+and fails if a module exceeds its budget or pulls in a heavy dependency
+(LLM SDKs, pandas, numpy) that only network or report commands need.
+
+Usage:
+    python startup_budget.py [--budget-ms 200] [--repeat 3]
+"""
+
+import argparse
+import subprocess
+import sys
+from typing import Dict, List, Any
+
+# Entry points whose non-network commands must start fast
+CHECKED_MODULES = ["migrate", "config", "llm_client", "processor", "parser", "response_store"]
+HEAVY_MODULES = ["openai", "google.genai", "requests", "pandas", "numpy"]
+
+
+def measure_import(module: str) -> Dict[str, Any]:
+    """Cumulative import time (ms) of ``module`` and the heavy modules it loaded."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        if cumulative_us.strip().isdigit():
+            cumulative[name.strip()] = int(cumulative_us) / 1000
+    return {"module": module, "import_ms": cumulative.get(module, 0.0),
+            "heavy": [name for name in HEAVY_MODULES if name in cumulative]}
+
+
+def check_budget(modules: List[str], budget_ms: float, repeat: int = 3) -> bool:
+    """Print each module's best import time; True if all are within budget and light."""
+    within = True
+    for module in modules:
+        runs = [measure_import(module) for _ in range(max(repeat, 1))]
+        best = min(runs, key=lambda run: run["import_ms"])
+        ok = best["import_ms"] <= budget_ms and not best["heavy"]
+        within &= ok
+        heavy = f" (imports {', '.join(best['heavy'])})" if best["heavy"] else ""
+        print(f"   {'✅' if ok else '❌'} {module:<16} {best['import_ms']:>7.1f} ms{heavy}")
+    return within
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check CLI import times against a budget")
+    parser.add_argument("--budget-ms", type=float, default=200.0, help="Maximum import time per module")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per module (best is kept)")
+    parser.add_argument("modules", nargs="*", default=CHECKED_MODULES)
+    args = parser.parse_args()
+
+    print(f"⏱️  Startup budget: {args.budget_ms:.0f} ms per module")
+    print("=" * 50)
+    if check_budget(args.modules, args.budget_ms, args.repeat):
+        print("✅ All modules within budget")
+        return 0
+    print("❌ Startup budget exceeded")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
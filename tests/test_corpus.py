@@ -0,0 +1,36 @@
+"""Tests for the lazy corpus index."""
+
+import pytest
+
+from corpus import Corpus
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n", "\r"])
+def test_line_endings_match_text_mode(tmp_path, newline):
+    text = "<?php\necho 1;\n\necho 2;\n"
+    (tmp_path / "a.php").write_bytes(text.replace("\n", newline).encode())
+    entry = Corpus(tmp_path).file("a.php")
+
+    assert entry.read_text() == text
+    for start in range(entry.line_count):
+        for stop in range(start + 1, entry.line_count + 1):
+            assert "\r" not in entry.slice_lines(start, stop)
+
+
+def test_crlf_lines_match_split(tmp_path):
+    text = "<?php\necho 1;\n\necho 2;\n"
+    (tmp_path / "a.php").write_bytes(text.replace("\n", "\r\n").encode())
+    entry = Corpus(tmp_path).file("a.php")
+
+    lines = text.split("\n")
+    assert list(entry.lines) == lines
+    assert entry.lines.join(1, 3) == "\n".join(lines[1:3])
+
+
+def test_blank_files_are_skipped(tmp_path):
+    (tmp_path / "empty.php").write_bytes(b"")
+    (tmp_path / "blank.php").write_bytes(b" \r\n\t\n")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "code.php").write_text("<?php\n", encoding="utf-8")
+
+    assert list(Corpus(tmp_path)) == ["sub/code.php"]
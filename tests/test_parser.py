@@ -0,0 +1,27 @@
+"""Tests for response parsing and output placement."""
+
+from parser import OutputParser, extract_code
+
+
+def test_relative_file_header_is_written_flat(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    response = tmp_path / "001_x.txt"
+    response.write_text("File: extra_large_1000_plus/001_x.php\nModel: test-model\n\n"
+                        "// MIGRATION_START\n<?php\necho 1;\n// MIGRATION_END\n", encoding="utf-8")
+
+    parser = OutputParser()
+    result = parser.parse_single_file(response)
+    assert parser.save_parsed_file(result, response.name, "test_model")
+
+    assert (tmp_path / "new-version" / "test_model" / "001_x.php").read_text(encoding="utf-8") == "<?php\necho 1;"
+    assert not (tmp_path / "new-version" / "test_model" / "extra_large_1000_plus").exists()
+
+
+def test_empty_marker_body_yields_no_code():
+    response = "Here you go:\n// MIGRATION_START\n\n// MIGRATION_END\n"
+    assert extract_code(response) == {'code': '', 'tier': None, 'truncated': False}
+
+
+def test_missing_end_marker_is_truncated():
+    response = "// MIGRATION_START\n<?php\necho 1;\n"
+    assert extract_code(response) == {'code': "<?php\necho 1;", 'tier': 'truncated', 'truncated': True}
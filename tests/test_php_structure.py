@@ -0,0 +1,53 @@
+"""Tests for the structural chunk validator."""
+
+import time
+
+from php_structure import (BLOCK_COMMENT, CODE, HTML, INITIAL_STATE, chunk_start_state, scan_structure,
+                           validate_chunk)
+
+
+def test_balanced_code_passes():
+    source = "<?php\nfunction f($a) {\n    return [$a];\n}\n"
+    migrated = "<?php\nfunction f(int $a): array {\n    return [$a];\n}\n"
+    assert validate_chunk(source, migrated) == []
+
+
+def test_missing_brace_is_reported():
+    source = "<?php\nif ($a) {\n    echo 1;\n}\n"
+    migrated = "<?php\nif ($a) {\n    echo 1;\n"
+    assert validate_chunk(source, migrated) == ["braces: source +0, migrated +1"]
+
+
+def test_tokens_in_strings_comments_and_heredocs_are_ignored():
+    code = ("<?php\n$s = '{'; $d = \"(\\\"\"; // }\n/* ] */ # )\n"
+            "$h = <<<EOT\n{ ( [\nEOT;\n")
+    signature, state = scan_structure(code)
+    assert signature == {'braces': 0, 'parens': 0, 'brackets': 0, 'open_tags': 1, 'close_tags': 0}
+    assert state == (CODE, '')
+
+
+def test_close_tag_ends_line_comment():
+    signature, state = scan_structure("<?php // note ?> <p>{</p>")
+    assert signature['close_tags'] == 1
+    assert signature['braces'] == 0
+    assert state == (HTML, '')
+
+
+def test_close_tag_on_a_later_line_does_not_end_comment():
+    signature, state = scan_structure("<?php // note\n$a = 1; ?>")
+    assert signature['close_tags'] == 1
+    assert state == INITIAL_STATE
+
+
+def test_chunk_start_state():
+    assert chunk_start_state("$a = 1;\n", ('line_comment', '')) == (CODE, '')
+    assert chunk_start_state("   * @param int $a\n   */\n", (CODE, '')) == (BLOCK_COMMENT, '')
+
+
+def test_many_line_comments_scan_in_linear_time():
+    # Each comment used to search to EOF for '?>' (O(lines x comments): ~18 s here)
+    code = "<?php\n" + "$a = 1; // c\n" * 50_000
+    started = time.perf_counter()
+    signature, _ = scan_structure(code)
+    assert time.perf_counter() - started < 5
+    assert signature['open_tags'] == 1 and signature['close_tags'] == 0
@@ -0,0 +1,68 @@
+"""Tests for the streaming metadata.json reader."""
+
+import json
+
+import pytest
+
+from report_store import iter_metadata_files, read_dataset_info
+
+CHUNK_SIZES = [1, 2, 3, 7, 64, 1 << 16]
+
+FILES = [
+    {"file_id": 1, "filename": "001_a.php", "original_path": "wordpress_4.0/wp-admin\\includes\\a.php",
+     "file_metrics": {"lines_of_code": 1342, "file_size_kb": 43.5},
+     "rector_analysis": {"php_version_changes": 12, "has_diff": True,
+                         "rules_triggered": ["Rector\\Php70\\Rector\\FuncCall\\RandomFunctionRector",
+                                             "Rector\\Php80\\Rector\\Class_\\ClassPropertyAssignToConstructorPromotionRector"]}},
+    {"file_id": 2, "filename": "002_ünïcode \"quoted\" {[,]}.php", "original_path": None,
+     "file_metrics": {"lines_of_code": 0, "file_size_kb": 0.0},
+     "rector_analysis": {"php_version_changes": 0, "has_diff": False, "rules_triggered": []}},
+    {"file_id": 123456789, "filename": "003_big.php", "original_path": "x" * 5000,
+     "file_metrics": {"lines_of_code": -1, "file_size_kb": 1.5e-3},
+     "rector_analysis": {"php_version_changes": 7, "has_diff": True, "rules_triggered": ["A\\B"] * 50}},
+]
+DATASET_INFO = {"version": "4.0_llm_evaluation", "total_files": 3, "rector_version": "2.1.0",
+                "storage": {"format": "compact", "summary": "summary.npz"}}
+
+
+@pytest.fixture(params=["indented", "compact", "files_first"])
+def metadata_file(request, tmp_path):
+    path = tmp_path / "metadata.json"
+    if request.param == "files_first":
+        metadata = {"files": FILES, "dataset_info": DATASET_INFO}
+    else:
+        metadata = {"dataset_info": DATASET_INFO, "files": FILES}
+    with open(path, 'w', encoding='utf-8') as f:
+        if request.param == "indented":
+            json.dump(metadata, f, indent=2, ensure_ascii=False)
+        else:
+            json.dump(metadata, f, ensure_ascii=False, separators=(',', ':'))
+    return path
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_files_match_json_load(metadata_file, chunk_size):
+    with open(metadata_file, 'r', encoding='utf-8') as f:
+        expected = json.load(f)["files"]
+    assert list(iter_metadata_files(metadata_file, chunk_size=chunk_size)) == expected
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_field_projection(metadata_file, chunk_size):
+    fields = ("filename", "rector_analysis.rules_triggered", "missing.field")
+    projected = list(iter_metadata_files(metadata_file, fields, chunk_size))
+    assert projected == [{"filename": entry["filename"],
+                          "rector_analysis": {"rules_triggered": entry["rector_analysis"]["rules_triggered"]}}
+                         for entry in FILES]
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_read_dataset_info(metadata_file, chunk_size):
+    assert read_dataset_info(metadata_file, chunk_size) == DATASET_INFO
+
+
+def test_truncated_file_raises(tmp_path):
+    path = tmp_path / "metadata.json"
+    path.write_text(json.dumps({"dataset_info": DATASET_INFO, "files": FILES})[:-40], encoding='utf-8')
+    with pytest.raises(ValueError):
+        list(iter_metadata_files(path, chunk_size=7))
@@ -0,0 +1,23 @@
+"""Tests for rule-subset planning."""
+
+import json
+from pathlib import Path
+
+from rule_subset import RuleSubsetPlanner
+
+
+def make_planner(tmp_path, baseline):
+    for stem, rules in baseline.items():
+        report = {"rector_analysis": {"rules_triggered": rules}}
+        (tmp_path / f"{stem}_rector.json").write_text(json.dumps(report), encoding="utf-8")
+    return RuleSubsetPlanner(baseline_dir=str(tmp_path), margin=0, audit_every=0)
+
+
+def test_files_with_configurable_rules_use_the_full_set(tmp_path):
+    planner = make_planner(tmp_path, {"a": ["R\\A"], "b": ["R\\A", "R\\Configurable"], "c": []})
+    files = [Path("a.php"), Path("b.php"), Path("c.php"), Path("d.php")]
+
+    batches, full_set = planner.plan(files, batch_size=10, configurable={"R\\Configurable"})
+
+    assert batches == [(("R\\A",), [Path("a.php")])]
+    assert full_set == [Path("b.php"), Path("c.php"), Path("d.php")]
@@ -3,11 +3,22 @@ Utility Functions
 Helper functions and shared utilities for the LLM migration tool.
 """
 
+import contextlib
+import io
 import re
+import shutil
 import subprocess
 import json
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Mapping, Union, Iterator, Tuple, Callable, Sequence
+
+from corpus import Corpus, CorpusFile, LineView, decode_source, in_memory_file
+from file_metrics import metrics_engine, chunk_line_count
+
+MIGRATED_FILES_DIR = "new-version"  # Parsed/reconstructed model output, one folder per model
+CHUNKED_OUTPUT_DIR = "chunked_model_output"  # Chunk responses, <model>/<file>/<chunk>.txt
 
 
 def normalize_model_name(model_name: str) -> str:
@@ -15,48 +26,71 @@ def normalize_model_name(model_name: str) -> str:
     return model_name.replace('/', '_').replace('-', '_').replace(':', '_').replace('.', '_').lower()
 
 
-def load_test_files(directory_path: str) -> Dict[str, str]:
-    """Load PHP files from a directory."""
-    test_files = {}
-    path = Path(directory_path)
+def output_base_name(filename: str) -> str:
+    """Bare file name without .php, used for every on-disk output of a file.
+    
+    Corpus keys are relative paths (``extra_large_1000_plus/001_x.php``), but
+    model_output/, chunked_model_output/ and new-version/ stay flat per model.
+    """
+    name = Path(filename).name
+    return name[:-len('.php')] if name.endswith('.php') else name
+
+
+def discover_models(base_dir: Union[str, Path] = ".") -> Dict[str, Dict[str, Any]]:
+    """Models with LLM output, by folder: migrated PHP files in new-version/ and chunk responses.
     
-    if not path.exists():
+    Only models with migrated files can be evaluated; chunk-only models still need
+    ``migrate.py --reconstruct``.
+    """
+    models: Dict[str, Dict[str, Any]] = {}
+    for output_dir, key in ((MIGRATED_FILES_DIR, "files"), (CHUNKED_OUTPUT_DIR, "chunked_files")):
+        root = Path(base_dir) / output_dir
+        if not root.is_dir():
+            continue
+        for folder in root.iterdir():
+            if folder.is_dir() and not folder.name.startswith('.'):
+                entry = models.setdefault(folder.name, {"files": 0, "chunked_files": 0})
+                if key == "files":
+                    entry[key] = sum(1 for _ in folder.rglob("*.php"))
+                else:
+                    entry[key] = sum(1 for file_dir in folder.iterdir() if file_dir.is_dir())
+    return dict(sorted(models.items()))
+
+
+def load_test_files(directory_path: str) -> Corpus:
+    """Index PHP files in a directory; content is memory-mapped on demand."""
+    corpus = Corpus(directory_path)
+    
+    if corpus.root is None or not corpus.root.exists():
         print(f"❌ Directory {directory_path} not found")
-        return test_files
-    
-    # Recursively find all PHP files
-    for php_file in path.rglob('*.php'):
-        try:
-            with open(php_file, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-                if content.strip():
-                    test_files[php_file.name] = content
-        except Exception as e:
-            print(f"⚠️  Could not load {php_file.name}: {e}")
-    
-    if test_files:
-        print(f"📁 Loaded {len(test_files)} PHP files:")
-        for filename in sorted(test_files.keys()):
-            size = len(test_files[filename])
-            print(f"   📄 {filename} ({size:,} chars)")
+        return corpus
+    
+    if corpus:
+        print(f"📁 Indexed {len(corpus)} PHP files ({corpus.total_size():,} bytes):")
+        for rel_path in sorted(corpus):
+            entry = corpus.files[rel_path]
+            category = f", {entry.category}" if entry.category else ""
+            print(f"   📄 {rel_path} ({entry.size:,} bytes{category})")
     else:
         print(f"❌ No PHP files found in {directory_path}")
     
-    return test_files
+    return corpus
 
 
-def analyze_file_sizes(test_files: Dict[str, str], chunk_threshold: int = 500):
+def analyze_file_sizes(test_files: Mapping[str, str], chunk_threshold: int = 500):
     """Analyze file sizes to see chunking requirements."""
     if not test_files:
         print("❌ No test files loaded")
         return
     
     # Categorize files
+    corpus = test_files if isinstance(test_files, Corpus) else Corpus.from_texts(test_files)
     small_files, large_files = [], []
-    for filename, content in test_files.items():
-        line_count = len(content.split('\n'))
-        char_count = len(content)
-        file_info = (filename, line_count, char_count)
+    for filename, entry in corpus.files.items():
+        metrics = metrics_engine.measure_entry(entry)
+        line_count = chunk_line_count(metrics)
+        char_count = metrics['bytes']
+        file_info = (filename, line_count, char_count, metrics)
         
         if line_count <= chunk_threshold:
             small_files.append(file_info)
@@ -68,7 +102,7 @@ def analyze_file_sizes(test_files: Dict[str, str], chunk_threshold: int = 500):
     
     # Small files summary
     print(f"📄 Small files (≤{chunk_threshold} lines): {len(small_files)}")
-    for filename, lines, chars in sorted(small_files, key=lambda x: x[1], reverse=True)[:10]:
+    for filename, lines, chars, _ in sorted(small_files, key=lambda x: x[1], reverse=True)[:10]:
         print(f"   {filename}: {lines:,} lines, {chars:,} chars")
     if len(small_files) > 10:
         print(f"   ... and {len(small_files) - 10} more")
@@ -76,17 +110,18 @@ def analyze_file_sizes(test_files: Dict[str, str], chunk_threshold: int = 500):
     # Large files summary
     if large_files:
         print(f"\n📦 Large files (>{chunk_threshold} lines): {len(large_files)}")
-        total_lines = sum(lines for _, lines, _ in large_files)
-        total_chunks = sum((lines + chunk_threshold - 1) // chunk_threshold for _, lines, _ in large_files)
+        total_lines = sum(lines for _, lines, _, _ in large_files)
+        total_chunks = sum((lines + chunk_threshold - 1) // chunk_threshold for _, lines, _, _ in large_files)
         
-        for filename, lines, chars in sorted(large_files, key=lambda x: x[1], reverse=True):
+        for filename, lines, chars, metrics in sorted(large_files, key=lambda x: x[1], reverse=True):
             chunks = (lines + chunk_threshold - 1) // chunk_threshold
-            print(f"   {filename}: {lines:,} lines, {chars:,} chars → {chunks} chunks")
+            print(f"   {filename}: {lines:,} lines ({metrics['code_lines']:,} code, {metrics['comment_lines']:,} comment), "
+                  f"{chars:,} chars, {metrics['functions']} functions → {chunks} chunks")
         
         print(f"\n📊 Large files summary: {total_lines:,} total lines → {total_chunks} chunks")
 
 
-def find_function_boundaries(code: str, lines: List[str]) -> List[Dict[str, Any]]:
+def find_function_boundaries(code: Union[str, CorpusFile], lines: List[str]) -> List[Dict[str, Any]]:
     """Find function boundaries using PHP tokenizer if available, else regex."""
     # Try PHP tokenizer first
     php_functions = try_php_tokenizer(code, lines)
@@ -97,8 +132,14 @@ def find_function_boundaries(code: str, lines: List[str]) -> List[Dict[str, Any]
     return find_functions_with_regex(lines)
 
 
-def try_php_tokenizer(code: str, lines: List[str]) -> List[Dict[str, Any]]:
+def try_php_tokenizer(code: Union[str, CorpusFile], lines: List[str]) -> List[Dict[str, Any]]:
     """Try to use PHP's built-in tokenizer for accurate parsing."""
+    if shutil.which('php') is None:
+        return []
+    
+    if isinstance(code, CorpusFile):
+        code = code.read_text()
+    
     try:
         php_script = f'''<?php
 $code = <<<'EOD'
@@ -253,10 +294,9 @@ def find_function_closing_brace(start_line: int, lines: List[str]) -> Optional[i
     return None
 
 
-def create_smart_chunks(lines: List[str], function_boundaries: List[Dict[str, Any]], 
-                       target_chunk_size: int, total_lines: int) -> List[Dict[str, Any]]:
-    """Create chunks that respect function boundaries."""
-    chunks = []
+def iter_chunk_boundaries(function_boundaries: List[Dict[str, Any]], target_chunk_size: int,
+                          total_lines: int) -> Iterator[Tuple[int, int]]:
+    """Yield 0-based inclusive (start, end) line ranges that respect function boundaries."""
     current_pos = 0
     functions = sorted(function_boundaries, key=lambda f: f['start_line'])
     
@@ -276,43 +316,119 @@ def create_smart_chunks(lines: List[str], function_boundaries: List[Dict[str, An
                 if func['end_line'] and func['end_line'] <= initial_end_pos + 300:  # Max extension
                     final_end_pos = max(final_end_pos, func['end_line'])
         
-        # Create chunk
-        chunk = {
-            'start_line': current_pos + 1,  # Convert to 1-based
-            'end_line': final_end_pos + 1,  # Convert to 1-based
-            'actual_size': final_end_pos - current_pos + 1,
-            'total_lines': total_lines,
-            'code': '\n'.join(lines[current_pos:final_end_pos + 1])
-        }
-        chunks.append(chunk)
-        
+        yield current_pos, final_end_pos
         current_pos = final_end_pos + 1
+
+
+def create_smart_chunks(lines: List[str], function_boundaries: List[Dict[str, Any]], 
+                       target_chunk_size: int, total_lines: int) -> List[Dict[str, Any]]:
+    """Create chunks that respect function boundaries."""
+    return [{
+        'start_line': start + 1,  # Convert to 1-based
+        'end_line': end + 1,  # Convert to 1-based
+        'actual_size': end - start + 1,
+        'total_lines': total_lines,
+        'code': join_lines(lines, start, end + 1)
+    } for start, end in iter_chunk_boundaries(function_boundaries, target_chunk_size, total_lines)]
+
+
+def join_lines(lines: Union[List[str], LineView], start: int, stop: int) -> str:
+    """Join lines[start:stop], slicing the source buffer directly when indexed."""
+    if isinstance(lines, LineView):
+        return lines.join(start, stop)
+    return '\n'.join(lines[start:stop])
+
+
+class ChunkDescriptor:
+    """A chunk of a source file described by line numbers and byte offsets.
+    
+    The chunk's code is only decoded from the source buffer when ``code`` is read.
+    """
+    
+    __slots__ = ('source', 'start_line', 'end_line', 'total_lines', 'byte_start', 'byte_end')
     
-    return chunks
+    def __init__(self, source: CorpusFile, start_line: int, end_line: int, total_lines: int):
+        self.source = source
+        self.start_line = start_line  # 1-based, inclusive
+        self.end_line = end_line  # 1-based, inclusive
+        self.total_lines = total_lines
+        self.byte_start, self.byte_end = source.byte_range(start_line - 1, end_line)
+    
+    @property
+    def actual_size(self) -> int:
+        return self.end_line - self.start_line + 1
+    
+    @property
+    def code(self) -> str:
+        return decode_source(self.source.buffer[self.byte_start:self.byte_end])
+    
+    def as_dict(self) -> Dict[str, Any]:
+        """Materialise the legacy chunk dict (including the code string)."""
+        return {
+            'start_line': self.start_line,
+            'end_line': self.end_line,
+            'actual_size': self.actual_size,
+            'total_lines': self.total_lines,
+            'code': self.code
+        }
 
 
-def chunk_code(code: str, chunk_size: int = 500) -> List[Dict[str, Any]]:
-    """Smart PHP-aware chunking using PHP tokenizer for accurate function detection."""
-    lines = code.split('\n')
-    total_lines = len(lines)
+def iter_chunks(source: Union[str, CorpusFile], chunk_size: int = 500) -> Iterator[ChunkDescriptor]:
+    """Stream PHP-aware chunk descriptors backed by offsets into the source buffer."""
+    if not isinstance(source, CorpusFile):
+        source = in_memory_file(source)
+    
+    total_lines = source.line_count
     
     if total_lines <= chunk_size:
-        return [{
-            'start_line': 1,
-            'end_line': total_lines,
-            'actual_size': total_lines,
-            'total_lines': total_lines,
-            'code': code
-        }]
+        yield ChunkDescriptor(source, 1, total_lines, total_lines)
+        return
+    
+    # Get function boundaries using smart parsing (no need to tokenize a file without functions)
+    if metrics_engine.measure_entry(source)['functions']:
+        function_boundaries = find_function_boundaries(source, source.lines)
+    else:
+        function_boundaries = []
     
-    # Get function boundaries using smart parsing
-    function_boundaries = find_function_boundaries(code, lines)
+    for start, end in iter_chunk_boundaries(function_boundaries, chunk_size, total_lines):
+        yield ChunkDescriptor(source, start + 1, end + 1, total_lines)
+
+
+def chunk_code(code: Union[str, CorpusFile], chunk_size: int = 500) -> List[Dict[str, Any]]:
+    """Smart PHP-aware chunking using PHP tokenizer for accurate function detection.
     
-    # Create chunks based on function boundaries
-    return create_smart_chunks(lines, function_boundaries, chunk_size, total_lines)
+    Materialises every chunk's code; use ``iter_chunks`` to stream descriptors instead.
+    """
+    return [chunk.as_dict() for chunk in iter_chunks(code, chunk_size)]
 
 
 def ensure_directory(path: Path) -> Path:
     """Ensure directory exists, create if it doesn't."""
     path.mkdir(parents=True, exist_ok=True)
     return path
+
+
+def _run_captured(func: Callable, item: Any) -> Tuple[Any, str]:
+    """Run func(item) in a worker, capturing what it prints."""
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        result = func(item)
+    return result, buffer.getvalue()
+
+
+def parallel_map(func: Callable, items: Sequence[Any], workers: int = 1) -> List[Any]:
+    """Apply a top-level function to items, serially or across a process pool.
+    
+    Results come back in input order, and each worker's console output is replayed
+    in that same order so logs stay deterministic.
+    """
+    if workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    
+    chunksize = max(1, len(items) // (workers * 4))
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for result, log in executor.map(partial(_run_captured, func), items, chunksize=chunksize):
+            print(log, end='')
+            results.append(result)
+    return results